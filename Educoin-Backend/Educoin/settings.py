@@ -2,6 +2,7 @@ from pathlib import Path
 from datetime import timedelta
 from decouple import config, Csv
 import os
+import tempfile
 import pymysql
 
 # Configurar pymysql como driver de MySQL
@@ -184,27 +185,98 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Subidas por partes (/api/uploads/, ver apps/activities/uploads.py). Las
+# partes se acumulan en SUBIDAS_DIR_TEMPORAL, que debe ser el mismo disco
+# para todos los workers; `python manage.py purgar_subidas` borra las abandonadas.
+SUBIDAS_DIR_TEMPORAL = config("SUBIDAS_DIR_TEMPORAL", default=os.path.join(tempfile.gettempdir(), "educoin_subidas"))
+SUBIDAS_TAMANO_MAXIMO = config("SUBIDAS_TAMANO_MAXIMO", default=100 * 1024 * 1024, cast=int)
+SUBIDAS_TAMANO_PARTE = config("SUBIDAS_TAMANO_PARTE", default=8 * 1024 * 1024, cast=int)
+
+# Descargas de entregas y adjuntos (/api/submissions/<id>/download/). Detrás
+# de nginx, con un prefijo (p. ej. /media-protegida/) la vista solo valida
+# permisos y nginx envía el archivo desde una location `internal` que
+# apunta a MEDIA_ROOT.
+DESCARGAS_X_ACCEL_PREFIJO = config("DESCARGAS_X_ACCEL_PREFIJO", default="")
+
 # ─────────────────────────────────────────────
 # Configuración de usuarios y REST
 # ─────────────────────────────────────────────
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.User'
 
+# Caché compartido entre workers: estado de los throttles de DRF, usuario
+# autenticado por JWT (apps/users/authentication.py) y contadores de logins
+# fallidos. Con CACHE_REDIS_URL usa Redis (requiere el paquete redis); si no,
+# CACHE_BACKEND/CACHE_LOCATION (por defecto archivos en el directorio
+# temporal, compartidos por los workers de una misma máquina). Para la base
+# de datos: CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache,
+# CACHE_LOCATION=educoin_cache y `python manage.py createcachetable`.
+CACHE_REDIS_URL = config("CACHE_REDIS_URL", default="")
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+            "KEY_PREFIX": "educoin",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+            "LOCATION": config("CACHE_LOCATION", default=os.path.join(tempfile.gettempdir(), "educoin_cache")),
+            "KEY_PREFIX": "educoin",
+        }
+    }
+
+# Segundos que el usuario autenticado por JWT queda en caché (se invalida
+# además al guardar el usuario o su perfil)
+JWT_USUARIO_CACHE_TIMEOUT = config("JWT_USUARIO_CACHE_TIMEOUT", default=300, cast=int)
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # Los throttles guardan su historial en CACHES['default'] (compartido)
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '30/min',
     },
+    # Listas paginadas por cursor sobre (creado, id); ver apps/common/pagination.py
+    "DEFAULT_PAGINATION_CLASS": "apps.common.pagination.CreadoCursorPagination",
 }
 
+# Los listados se paginan por cursor. Un cliente que aún espera la lista
+# simple la pide con ?paginacion=lista (completa y con su orden original);
+# en True todos los listados responden así salvo ?paginacion=cursor.
+API_LISTAS_PLANAS = config("API_LISTAS_PLANAS", default=False, cast=bool)
+
+# Stream de notificaciones (SSE, /api/notifications/stream/). El backend en
+# memoria solo avisa dentro del mismo proceso; con varios workers usar
+# apps.notifications.stream.RedisBackend (requiere el paquete redis).
+NOTIFICACIONES_STREAM_BACKEND = config(
+    "NOTIFICACIONES_STREAM_BACKEND", default="apps.notifications.stream.MemoriaBackend"
+)
+NOTIFICACIONES_REDIS_URL = config("NOTIFICACIONES_REDIS_URL", default="redis://localhost:6379/0")
+NOTIFICACIONES_STREAM_HEARTBEAT = config("NOTIFICACIONES_STREAM_HEARTBEAT", default=25, cast=int)
+NOTIFICACIONES_STREAM_DURACION = config("NOTIFICACIONES_STREAM_DURACION", default=600, cast=int)
+# Vigencia del ?ticket= del stream (se renueva con cada conexión)
+NOTIFICACIONES_STREAM_TICKET_TTL = config("NOTIFICACIONES_STREAM_TICKET_TTL", default=60, cast=int)
+# Con WSGI (gunicorn) el stream no queda abierto: el navegador reconecta cada N segundos
+NOTIFICACIONES_STREAM_SONDEO = config("NOTIFICACIONES_STREAM_SONDEO", default=15, cast=int)
+
+# Las notificaciones de calificaciones, monedas y subastas se encolan en
+# NotificationOutbox y las crea `python manage.py procesar_notificaciones`.
+# En Railway el worker corre junto a gunicorn (railway_start.sh). En True
+# (desarrollo sin worker) se procesan al confirmar la transacción, en un
+# hilo aparte del mismo proceso.
+NOTIFICACIONES_OUTBOX_SINCRONO = config("NOTIFICACIONES_OUTBOX_SINCRONO", default=False, cast=bool)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -241,6 +313,14 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@educoin.com')
 
+# Los correos se encolan en EmailOutbox y los envía `python manage.py enviar_emails`.
+# Para desarrollo sin SendGrid: apps.users.email_outbox.FakeTransport.
+# En Railway el worker corre junto a gunicorn (railway_start.sh). Con
+# EMAIL_OUTBOX_SINCRONO = True (desarrollo sin worker) se envían al confirmar
+# la transacción, en un hilo aparte.
+EMAIL_OUTBOX_TRANSPORT = config('EMAIL_OUTBOX_TRANSPORT', default='apps.users.email_outbox.SendGridTransport')
+EMAIL_OUTBOX_SINCRONO = config('EMAIL_OUTBOX_SINCRONO', default=False, cast=bool)
+
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:5173')
 EMAIL_VERIFICATION_REQUIRED = True
 PASSWORD_RESET_TIMEOUT = 3600
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Activity, Submission
+from .models import Activity, ChunkedUpload, Submission
 
 @admin.register(Activity)
 class ActivityAdmin(admin.ModelAdmin):
@@ -12,3 +12,10 @@ class SubmissionAdmin(admin.ModelAdmin):
     list_display = ('id', 'activity', 'estudiante', 'contenido', 'calificacion', 'retroalimentacion', 'creado')
     search_fields = ('contenido', 'estudiante__email')
     list_filter = ('creado', 'calificacion')
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nombre', 'usuario', 'activity', 'destino', 'recibido', 'tamano', 'estado', 'creado')
+    search_fields = ('nombre', 'sha256', 'usuario__email')
+    list_filter = ('estado', 'destino', 'creado')
+    readonly_fields = ('sha256', 'ruta', 'ultimo_error')
@@ -0,0 +1,230 @@
+"""
+Descarga de archivos de entregas y adjuntos, con permisos de la API.
+
+`servir_archivo` responde:
+- 304/412 según If-None-Match / If-Modified-Since (ETag y Last-Modified
+  del archivo en el storage);
+- 206 con un rango si llega `Range: bytes=inicio-fin` (un solo rango,
+  respetando If-Range), para reanudar descargas o buscar en un PDF;
+- 200 con FileResponse: el servidor WSGI puede enviar el archivo con
+  sendfile (wsgi.file_wrapper) sin pasarlo por memoria.
+
+Detrás de nginx, con DESCARGAS_X_ACCEL_PREFIJO la vista solo verifica
+permisos y devuelve X-Accel-Redirect: nginx envía el archivo (rangos y
+condicionales incluidos) sin ocupar un worker.
+
+`zip_entregas` arma el ZIP de todas las entregas de una actividad mientras
+se envía: cada bloque comprimido se entrega apenas se escribe, sin archivo
+temporal y con memoria constante.
+"""
+import csv
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import zipfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from django.utils.text import slugify
+
+from apps.common.renderers import Echo
+
+BLOQUE = 64 * 1024
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def nombre_estudiante(estudiante):
+    """apellido-nombre (o el usuario del email) apto para nombres de archivo"""
+    return (
+        slugify(f"{estudiante.last_name} {estudiante.first_name}")
+        or slugify(estudiante.email.split('@')[0])
+        or f"estudiante-{estudiante.pk}"
+    )
+
+
+def nombre_descarga(submission):
+    """<estudiante>_<actividad><ext> para la entrega descargada"""
+    extension = os.path.splitext(submission.archivo.name)[1].lower()
+    return f"{nombre_estudiante(submission.estudiante)}_{slugify(submission.activity.nombre)[:50]}{extension}"
+
+
+def _rango(cabecera, tamano):
+    """(inicio, fin) inclusivo, None para responder completo o False si no es satisfacible."""
+    coincidencia = _RANGO.match(cabecera or '')
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        # Sin Range, con varios rangos o mal formado: archivo completo
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        inicio, fin = max(tamano - int(fin), 0), tamano - 1
+    else:
+        inicio, fin = int(inicio), min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return False
+    return inicio, fin
+
+
+def _leer(archivo, inicio, longitud):
+    with archivo:
+        archivo.seek(inicio)
+        while longitud > 0:
+            bloque = archivo.read(min(BLOQUE, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            yield bloque
+
+
+def servir_archivo(request, archivo, nombre):
+    """Respuesta de descarga para el FieldFile `archivo` con el nombre `nombre`."""
+    if not archivo:
+        raise Http404("No hay archivo.")
+    storage = archivo.storage
+    try:
+        tamano = storage.size(archivo.name)
+    except OSError:
+        raise Http404("El archivo no existe.")
+    try:
+        modificado = int(storage.get_modified_time(archivo.name).timestamp())
+    except (NotImplementedError, OSError):
+        modificado = None
+
+    etag = quote_etag(hashlib.md5(f"{archivo.name}:{tamano}:{modificado}".encode()).hexdigest())
+    cabeceras = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=0, must-revalidate',
+        'Content-Disposition': content_disposition_header(True, nombre),
+    }
+    if modificado is not None:
+        cabeceras['Last-Modified'] = http_date(modificado)
+
+    respuesta = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if respuesta is not None:
+        for clave in ('ETag', 'Last-Modified', 'Cache-Control'):
+            if clave in cabeceras:
+                respuesta[clave] = cabeceras[clave]
+        return respuesta
+
+    tipo = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+    prefijo = getattr(settings, 'DESCARGAS_X_ACCEL_PREFIJO', '')
+    if prefijo:
+        respuesta = HttpResponse(content_type=tipo)
+        respuesta['X-Accel-Redirect'] = f"{prefijo.rstrip('/')}/{quote(archivo.name)}"
+    else:
+        rango = _rango(request.headers.get('Range'), tamano)
+        if_range = request.headers.get('If-Range')
+        if rango and if_range and if_range not in (etag, cabeceras.get('Last-Modified')):
+            # El archivo cambió desde la descarga parcial: enviarlo completo
+            rango = None
+
+        if rango is False:
+            respuesta = HttpResponse(status=416)
+            respuesta['Content-Range'] = f"bytes */{tamano}"
+            return respuesta
+        if rango:
+            inicio, fin = rango
+            respuesta = StreamingHttpResponse(
+                _leer(storage.open(archivo.name, 'rb'), inicio, fin - inicio + 1), status=206, content_type=tipo
+            )
+            respuesta['Content-Range'] = f"bytes {inicio}-{fin}/{tamano}"
+            respuesta['Content-Length'] = str(fin - inicio + 1)
+        else:
+            respuesta = FileResponse(storage.open(archivo.name, 'rb'), content_type=tipo)
+
+    for clave, valor in cabeceras.items():
+        respuesta[clave] = valor
+    return respuesta
+
+
+class _Salida(io.RawIOBase):
+    """Destino no posicionable para ZipFile: junta lo escrito hasta que se vacía."""
+
+    def __init__(self):
+        self.partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes.clear()
+        return datos
+
+
+MANIFIESTO_COLUMNAS = ["estudiante", "email", "archivo", "calificacion", "retroalimentacion", "entregado", "actualizado"]
+
+
+def _nombres_en_zip(submissions):
+    """Nombre de cada archivo dentro del ZIP (por estudiante, sin repetir)."""
+    nombres, usados = {}, set()
+    for submission in submissions:
+        if not submission.archivo:
+            continue
+        base = nombre_estudiante(submission.estudiante)
+        extension = os.path.splitext(submission.archivo.name)[1].lower()
+        nombre = f"{base}{extension}"
+        if nombre in usados:
+            nombre = f"{base}-{submission.estudiante_id}{extension}"
+        usados.add(nombre)
+        nombres[submission.pk] = nombre
+    return nombres
+
+
+def zip_entregas(submissions):
+    """
+    Genera el ZIP de `submissions` (con su estudiante cargado):
+    un archivo por estudiante y `notas.csv` con calificación y
+    retroalimentación de cada entrega. Los archivos que faltan en el
+    storage quedan en el manifiesto sin archivo.
+    """
+    submissions = list(submissions)
+    nombres = _nombres_en_zip(submissions)
+    salida = _Salida()
+    writer = csv.writer(Echo())
+    manifiesto = [writer.writerow(MANIFIESTO_COLUMNAS)]
+
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for submission in submissions:
+            nombre = nombres.get(submission.pk, '')
+            if nombre:
+                try:
+                    archivo = submission.archivo.storage.open(submission.archivo.name, 'rb')
+                except OSError:
+                    nombre = ''
+                else:
+                    info = zipfile.ZipInfo(nombre, date_time=timezone.localtime(submission.actualizado).timetuple()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    info.file_size = submission.archivo.size
+                    with archivo, zf.open(info, 'w') as destino:
+                        for bloque in iter(lambda: archivo.read(BLOQUE), b''):
+                            destino.write(bloque)
+                            datos = salida.vaciar()
+                            if datos:
+                                yield datos
+                    yield salida.vaciar()
+
+            estudiante = submission.estudiante
+            manifiesto.append(writer.writerow([
+                f"{estudiante.first_name} {estudiante.last_name}".strip() or estudiante.email,
+                estudiante.email,
+                nombre,
+                submission.calificacion if submission.calificacion is not None else "",
+                submission.retroalimentacion,
+                submission.creado.isoformat(),
+                submission.actualizado.isoformat(),
+            ]))
+
+        zf.writestr("notas.csv", "".join(manifiesto))
+    yield salida.vaciar()
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.activities import uploads
+from apps.activities.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las subidas por partes sin completar (en curso o con error) sin "
+        "actividad en las últimas --horas, junto con sus archivos temporales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horas", type=int, default=24, help="Horas sin actividad (por defecto 24).")
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(hours=options["horas"])
+        abandonadas = ChunkedUpload.objects.filter(estado__in=['en_curso', 'error'], actualizado__lt=limite)
+
+        ids = []
+        for subida in abandonadas.only("pk").iterator():
+            uploads.descartar_temporal(subida)
+            ids.append(subida.pk)
+        ChunkedUpload.objects.filter(pk__in=ids).delete()
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} subidas abandonadas eliminadas."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0004_alter_activity_valor_notas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['estudiante', 'creado'], name='activities__estudia_ebe022_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['activity', 'creado'], name='activities__activit_0ccad9_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0005_paginacion_indices'),
+        ('groups', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['group', 'habilitada', 'fecha_entrega'], name='activities__group_i_eb4a8c_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0006_actividad_estado_indice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('destino', models.CharField(choices=[('entrega', 'Entrega'), ('adjunto', 'Adjunto de actividad')], max_length=10)),
+                ('nombre', models.CharField(max_length=255)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('recibido', models.PositiveBigIntegerField(default=0)),
+                ('estado', models.CharField(choices=[('en_curso', 'En curso'), ('completa', 'Completa'), ('error', 'Error')], default='en_curso', max_length=10)),
+                ('ruta', models.CharField(blank=True, default='', max_length=255)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas', to='activities.activity')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida por partes',
+                'verbose_name_plural': 'Subidas por partes',
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['estado', 'actualizado'], name='activities__estado_9420fb_idx')],
+            },
+        ),
+    ]
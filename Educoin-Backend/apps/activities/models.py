@@ -1,7 +1,29 @@
 from django.db import models
+from django.db.models import BooleanField, Case, DateTimeField, DurationField, ExpressionWrapper, F, Value, When
 from apps.groups.models import Group
 from apps.common.models import BaseModel
 
+
+class ActivityQuerySet(models.QuerySet):
+    def con_estado(self, ahora):
+        """
+        Anota el estado de la entrega respecto de `ahora` (el mismo para toda
+        la petición): `vencida` y `restante` (timedelta hasta fecha_entrega,
+        negativo si ya venció), calculados en la consulta.
+        """
+        ahora = Value(ahora, output_field=DateTimeField())
+        return self.annotate(
+            vencida=Case(When(fecha_entrega__lt=ahora, then=Value(True)), default=Value(False), output_field=BooleanField()),
+            restante=ExpressionWrapper(F('fecha_entrega') - ahora, output_field=DurationField()),
+        )
+
+    def pendientes(self, ahora):
+        return self.filter(fecha_entrega__gte=ahora)
+
+    def vencidas(self, ahora):
+        return self.filter(fecha_entrega__lt=ahora)
+
+
 class Activity(BaseModel):
     TIPOS = [
         ('tarea', 'Tarea'),
@@ -28,22 +50,28 @@ class Activity(BaseModel):
         help_text="Archivo que el docente adjunta a la actividad"
     )
 
+    objects = ActivityQuerySet.as_manager()
+
     class Meta:
         ordering = ['-fecha_entrega']
+        indexes = [
+            # Listado del estudiante filtrado por estado/vencimiento (?estado=, ?vence_antes=)
+            models.Index(fields=['group', 'habilitada', 'fecha_entrega']),
+        ]
         verbose_name = 'Actividad'
         verbose_name_plural = 'Actividades'
 
     def __str__(self):
         return f"{self.nombre} ({self.group.nombre})"
 
-    def esta_vencida(self):
+    def esta_vencida(self, ahora=None):
         """Verifica si la actividad ya pasó su fecha y hora límite"""
         from django.utils import timezone
-        return timezone.now() > self.fecha_entrega
+        return (ahora or timezone.now()) > self.fecha_entrega
 
-    def puede_entregar(self):
+    def puede_entregar(self, ahora=None):
         """Verifica si un estudiante puede entregar esta actividad"""
-        return self.habilitada and not self.esta_vencida()
+        return self.habilitada and not self.esta_vencida(ahora)
 
 
 class Submission(BaseModel):
@@ -60,5 +88,52 @@ class Submission(BaseModel):
     class Meta:
         unique_together = ('activity', 'estudiante')
         ordering = ['-creado']
+        indexes = [
+            # Listados paginados por cursor (creado, id)
+            models.Index(fields=['estudiante', 'creado']),
+            models.Index(fields=['activity', 'creado']),
+        ]
         verbose_name = 'Entrega'
-        verbose_name_plural = 'Entregas'
\ No newline at end of file
+        verbose_name_plural = 'Entregas'
+
+
+class ChunkedUpload(BaseModel):
+    """
+    Subida por partes de un archivo de entrega (Submission.archivo) o adjunto
+    de actividad (Activity.archivo_adjunto). Las partes se escriben en un
+    archivo temporal y al completar se verifica el sha256 y se guarda en el
+    storage por contenido (ver apps/activities/uploads.py).
+    """
+    DESTINO_CHOICES = [
+        ('entrega', 'Entrega'),
+        ('adjunto', 'Adjunto de actividad'),
+    ]
+    ESTADO_CHOICES = [
+        ('en_curso', 'En curso'),
+        ('completa', 'Completa'),
+        ('error', 'Error'),
+    ]
+
+    usuario = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='subidas')
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='subidas')
+    destino = models.CharField(max_length=10, choices=DESTINO_CHOICES)
+    nombre = models.CharField(max_length=255)
+    tamano = models.PositiveBigIntegerField()
+    # sha256 declarado por el cliente; se compara con el contenido recibido al completar
+    sha256 = models.CharField(max_length=64, db_index=True)
+    recibido = models.PositiveBigIntegerField(default=0)
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='en_curso')
+    # Ruta en el storage una vez completa (compartida por subidas con el mismo contenido)
+    ruta = models.CharField(max_length=255, blank=True, default='')
+    ultimo_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        ordering = ['-creado']
+        verbose_name = 'Subida por partes'
+        verbose_name_plural = 'Subidas por partes'
+        indexes = [
+            models.Index(fields=['estado', 'actualizado']),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} ({self.recibido}/{self.tamano}) - {self.get_estado_display()}"
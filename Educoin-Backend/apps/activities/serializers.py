@@ -1,6 +1,9 @@
+from datetime import timedelta
 from rest_framework import serializers
+from django.conf import settings
 from django.utils import timezone
-from .models import Activity, Submission
+from .models import Activity, ChunkedUpload, Submission
+from . import uploads
 from apps.users.serializers import UserProfileSerializer
 
 class ActivitySerializer(serializers.ModelSerializer):
@@ -9,6 +12,7 @@ class ActivitySerializer(serializers.ModelSerializer):
     user_submission = serializers.SerializerMethodField()
     puede_entregar = serializers.SerializerMethodField()
     esta_vencida = serializers.SerializerMethodField()
+    segundos_restantes = serializers.SerializerMethodField()
     tiempo_restante = serializers.SerializerMethodField()
 
     class Meta:
@@ -22,7 +26,10 @@ class ActivitySerializer(serializers.ModelSerializer):
         # Solo retornar submissions si el usuario es docente
         request = self.context.get('request')
         if request and request.user.role == 'docente':
-            submissions = obj.submissions.select_related('estudiante').all()
+            # `entregas` viene del Prefetch de ActivityViewSet; anidado en otro serializer se consulta aquí
+            submissions = getattr(obj, 'entregas', None)
+            if submissions is None:
+                submissions = obj.submissions.select_related('estudiante')
             return SubmissionListSerializer(submissions, many=True, context=self.context).data
         return []
     
@@ -30,41 +37,62 @@ class ActivitySerializer(serializers.ModelSerializer):
         """Retornar la submission del usuario actual con calificación si existe"""
         request = self.context.get('request')
         if request and request.user.role == 'estudiante':
-            try:
-                submission = obj.submissions.get(estudiante=request.user)
-                # Incluir todos los datos de la submission incluyendo calificación
-                return {
-                    'id': submission.id,
-                    'contenido': submission.contenido,
-                    'archivo': submission.archivo.url if submission.archivo else None,
-                    'calificacion': float(submission.calificacion) if submission.calificacion is not None else None,
-                    'retroalimentacion': submission.retroalimentacion,
-                    'creado': submission.creado.isoformat() if submission.creado else None,
-                    'actualizado': submission.actualizado.isoformat() if submission.actualizado else None,
-                    'estudiante': submission.estudiante.id,
-                    'activity': submission.activity.id
-                }
-            except Submission.DoesNotExist:
+            # `entrega_usuario` viene del Prefetch de ActivityViewSet (lista de 0 o 1 elementos)
+            entregas = getattr(obj, 'entrega_usuario', None)
+            if entregas is None:
+                entregas = obj.submissions.filter(estudiante=request.user)[:1]
+            submission = next(iter(entregas), None)
+            if submission is None:
                 return None
+            # Incluir todos los datos de la submission incluyendo calificación
+            return {
+                'id': submission.id,
+                'contenido': submission.contenido,
+                'archivo': submission.archivo.url if submission.archivo else None,
+                'calificacion': float(submission.calificacion) if submission.calificacion is not None else None,
+                'retroalimentacion': submission.retroalimentacion,
+                'creado': submission.creado.isoformat() if submission.creado else None,
+                'actualizado': submission.actualizado.isoformat() if submission.actualizado else None,
+                'estudiante': submission.estudiante_id,
+                'activity': submission.activity_id
+            }
         return None
     
+    def _restante(self, obj):
+        """
+        Tiempo hasta la fecha de entrega. En el listado viene anotado por
+        Activity.objects.con_estado; si no, se calcula con un único "ahora"
+        compartido por todo el serializer (el de la vista, si lo pasó).
+        """
+        restante = getattr(obj, 'restante', None)
+        if restante is None:
+            restante = obj.fecha_entrega - self.context.setdefault('ahora', timezone.now())
+        return restante
+
     def get_puede_entregar(self, obj):
         """Indica si un estudiante puede entregar esta actividad"""
-        return obj.puede_entregar()
+        return obj.habilitada and not self.get_esta_vencida(obj)
     
     def get_esta_vencida(self, obj):
         """Indica si la actividad ya venció"""
-        return obj.esta_vencida()
+        vencida = getattr(obj, 'vencida', None)
+        if vencida is None:
+            vencida = self._restante(obj) < timedelta(0)
+        return vencida
+
+    def get_segundos_restantes(self, obj):
+        """Segundos hasta la fecha límite (0 si ya venció)"""
+        return max(int(self._restante(obj).total_seconds()), 0)
     
     def get_tiempo_restante(self, obj):
         """Devuelve el tiempo restante hasta la fecha límite"""
-        if obj.esta_vencida():
+        if self.get_esta_vencida(obj):
             return "Vencida"
         
-        diferencia = obj.fecha_entrega - timezone.now()
-        dias = diferencia.days
-        horas = diferencia.seconds // 3600
-        minutos = (diferencia.seconds % 3600) // 60
+        segundos = self.get_segundos_restantes(obj)
+        dias = segundos // 86400
+        horas = (segundos % 86400) // 3600
+        minutos = (segundos % 3600) // 60
         
         if dias > 0:
             return f"{dias} día(s) {horas} hora(s)"
@@ -166,4 +194,43 @@ class SubmissionDetailSerializer(SubmissionListSerializer):
     activity = ActivitySerializer(read_only=True)
 
     class Meta(SubmissionListSerializer.Meta):
-        fields = SubmissionListSerializer.Meta.fields + ['activity']
\ No newline at end of file
+        fields = SubmissionListSerializer.Meta.fields + ['activity']
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Inicio y estado de una subida por partes (ver uploads.py)"""
+    activity = serializers.PrimaryKeyRelatedField(queryset=Activity.objects.select_related('group__classroom'))
+
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            'id',
+            'activity',
+            'destino',
+            'nombre',
+            'tamano',
+            'sha256',
+            'recibido',
+            'estado',
+            'ruta',
+            'ultimo_error',
+            'creado',
+            'actualizado'
+        ]
+        read_only_fields = ['id', 'recibido', 'estado', 'ruta', 'ultimo_error', 'creado', 'actualizado']
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if len(value) != 64 or any(c not in '0123456789abcdef' for c in value):
+            raise serializers.ValidationError("Debe ser el sha256 del archivo en hexadecimal (64 caracteres).")
+        return value
+
+    def validate_tamano(self, value):
+        maximo = settings.SUBIDAS_TAMANO_MAXIMO
+        if not 0 < value <= maximo:
+            raise serializers.ValidationError(f"El archivo debe pesar entre 1 byte y {maximo // (1024 * 1024)} MB.")
+        return value
+
+    def validate(self, data):
+        uploads.verificar_destino(self.context['request'].user, data['activity'], data['destino'])
+        return data
@@ -1,3 +1,55 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.activities.models import Activity, Submission
+from apps.classrooms.models import Classroom
+from apps.groups.models import Group
+
+
+class ConsultasListadoActividadesTests(APITestCase):
+    """GET /api/activities/ hace las mismas consultas con 100 actividades (sin N+1)."""
+
+    ACTIVIDADES = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.docente = User.objects.create_user(
+            username="docente", email="docente@example.com", password=None, role="docente",
+        )
+        cls.estudiante = User.objects.create_user(
+            username="estudiante", email="estudiante@example.com", password=None, role="estudiante",
+        )
+        grupo = Group.objects.create(
+            nombre="Grupo", classroom=Classroom.objects.create(nombre="Clase", docente=cls.docente),
+        )
+        grupo.estudiantes.add(cls.estudiante)
+
+        actividades = Activity.objects.bulk_create([
+            Activity(group=grupo, tipo="tarea", nombre=f"Actividad {i}", fecha_entrega=timezone.now() + timedelta(days=1))
+            for i in range(cls.ACTIVIDADES)
+        ])
+        # El estudiante entrega la mitad
+        Submission.objects.bulk_create([
+            Submission(activity=actividad, estudiante=cls.estudiante, contenido="entrega")
+            for actividad in actividades[::2]
+        ])
+
+    def _listar(self, usuario):
+        self.client.force_authenticate(user=usuario)
+        response = self.client.get("/api/activities/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), self.ACTIVIDADES)
+
+    def test_estudiante(self):
+        # actividades + entregas del estudiante (prefetch)
+        with self.assertNumQueries(2):
+            self._listar(self.estudiante)
+
+    def test_docente(self):
+        # actividades + entregas de todos los estudiantes (prefetch)
+        with self.assertNumQueries(2):
+            self._listar(self.docente)
@@ -0,0 +1,201 @@
+"""
+Subidas por partes (reanudables) de entregas y adjuntos de actividades.
+
+1. POST /api/uploads/ con activity, destino ('entrega' o 'adjunto'),
+   nombre, tamano y sha256 del archivo completo.
+2. PUT /api/uploads/<id>/chunk/ con los bytes de la parte en el cuerpo y el
+   header Upload-Offset igual a `recibido`. Cada parte se recibe primero en
+   su propio archivo temporal, en bloques de 64 KB y fuera de cualquier
+   transacción (una conexión lenta no retiene locks); luego, con la subida
+   bloqueada, se agrega al archivo de la subida.
+   Si la conexión se corta, GET /api/uploads/<id>/ dice desde dónde seguir.
+3. POST /api/uploads/<id>/complete/ vuelve a verificar los permisos y el
+   plazo (verificar_destino), verifica el sha256, guarda el archivo en el
+   storage y lo asigna a la nueva entrega o a la actividad.
+
+Los archivos se guardan por contenido (`<carpeta>/<sha[:2]>/<sha><ext>`):
+dos subidas idénticas comparten el mismo archivo. Si el usuario ya subió
+ese contenido antes, la subida nace completa y no hace falta enviar partes.
+"""
+import glob
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from .models import ChunkedUpload, Submission
+
+BLOQUE = 64 * 1024
+CARPETAS = {
+    'entrega': 'submissions/',
+    'adjunto': 'activities/attachments/',
+}
+
+
+class _ArchivoTemporal(File):
+    # FileSystemStorage mueve (en lugar de copiar) los archivos que exponen temporary_file_path
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def ruta_temporal(subida):
+    return os.path.join(settings.SUBIDAS_DIR_TEMPORAL, f"{subida.pk}.part")
+
+
+def ruta_final(subida):
+    extension = os.path.splitext(subida.nombre)[1].lower()[:10]
+    return f"{CARPETAS[subida.destino]}{subida.sha256[:2]}/{subida.sha256}{extension}"
+
+
+def verificar_destino(usuario, activity, destino):
+    """Valida que `usuario` pueda subir un archivo de tipo `destino` a `activity`."""
+    if destino == 'adjunto':
+        if usuario.role != 'docente' or activity.group.classroom.docente_id != usuario.pk:
+            raise PermissionDenied("Solo el docente de la actividad puede subir adjuntos.")
+        return
+
+    if usuario.role != 'estudiante' or not activity.group.estudiantes.filter(pk=usuario.pk).exists():
+        raise PermissionDenied("Solo los estudiantes del grupo pueden entregar esta actividad.")
+    if not activity.puede_entregar():
+        raise ValidationError({"detail": "La actividad no acepta entregas (deshabilitada o vencida)."})
+    if Submission.objects.filter(activity=activity, estudiante=usuario).exists():
+        raise ValidationError({"detail": "Ya has enviado una entrega para esta actividad."})
+
+
+def iniciar(subida):
+    """Prepara el archivo temporal, o completa la subida si el usuario ya subió ese contenido."""
+    anterior = ChunkedUpload.objects.filter(
+        usuario=subida.usuario, sha256=subida.sha256, tamano=subida.tamano, destino=subida.destino,
+        estado='completa',
+    ).exclude(ruta='').first()
+    if anterior and default_storage.exists(anterior.ruta):
+        subida.recibido = subida.tamano
+        subida.ruta = anterior.ruta
+        subida.save(update_fields=['recibido', 'ruta', 'actualizado'])
+        return subida
+
+    os.makedirs(settings.SUBIDAS_DIR_TEMPORAL, exist_ok=True)
+    open(ruta_temporal(subida), 'wb').close()
+    return subida
+
+
+def recibir_parte(subida, flujo, longitud, sha256_parte=None):
+    """
+    Lee `longitud` bytes de `flujo` a un archivo temporal propio de la parte
+    y devuelve su ruta. Si la parte excede el tamaño declarado, llega
+    incompleta o no coincide con `sha256_parte`, lo borra y lanza ValueError.
+    """
+    if subida.recibido + longitud > subida.tamano:
+        raise ValueError("La parte excede el tamaño declarado del archivo.")
+
+    os.makedirs(settings.SUBIDAS_DIR_TEMPORAL, exist_ok=True)
+    descriptor, ruta = tempfile.mkstemp(prefix=f"{subida.pk}.", suffix=".chunk", dir=settings.SUBIDAS_DIR_TEMPORAL)
+    digest = hashlib.sha256()
+    escritos = 0
+    try:
+        with os.fdopen(descriptor, 'wb') as destino:
+            while escritos < longitud:
+                bloque = flujo.read(min(BLOQUE, longitud - escritos))
+                if not bloque:
+                    raise ValueError("La parte llegó incompleta.")
+                destino.write(bloque)
+                digest.update(bloque)
+                escritos += len(bloque)
+        if sha256_parte and digest.hexdigest() != sha256_parte.lower():
+            raise ValueError("El sha256 de la parte no coincide.")
+    except Exception:
+        descartar_parte(ruta)
+        raise
+    return ruta
+
+
+def agregar_parte(subida, ruta_parte):
+    """
+    Copia la parte recibida al archivo de la subida a partir de
+    subida.recibido y devuelve el nuevo total. Llamar con la subida bloqueada.
+    """
+    longitud = os.path.getsize(ruta_parte)
+    if subida.recibido + longitud > subida.tamano:
+        raise ValueError("La parte excede el tamaño declarado del archivo.")
+
+    with open(ruta_parte, 'rb') as origen, open(ruta_temporal(subida), 'r+b') as destino:
+        destino.seek(subida.recibido)
+        try:
+            for bloque in iter(lambda: origen.read(BLOQUE), b''):
+                destino.write(bloque)
+        except Exception:
+            destino.truncate(subida.recibido)
+            raise
+        destino.truncate(subida.recibido + longitud)
+    return subida.recibido + longitud
+
+
+def descartar_parte(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+
+def _sha256_archivo(ruta):
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(BLOQUE), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def descartar_temporal(subida):
+    # Incluye las partes que un proceso caído no llegó a borrar
+    for ruta in [ruta_temporal(subida), *glob.glob(os.path.join(settings.SUBIDAS_DIR_TEMPORAL, f"{subida.pk}.*.chunk"))]:
+        descartar_parte(ruta)
+
+
+def completar(subida):
+    """
+    Verifica el contenido, lo guarda en el storage (si no estaba ya) y lo
+    asigna a su destino. Lanza ValueError si el sha256 no coincide.
+    """
+    temporal = ruta_temporal(subida)
+    if not subida.ruta and (not os.path.exists(temporal) or _sha256_archivo(temporal) != subida.sha256):
+        descartar_temporal(subida)
+        subida.estado = 'error'
+        subida.ultimo_error = "El archivo recibido no coincide con el sha256 declarado."
+        subida.save(update_fields=['estado', 'ultimo_error', 'actualizado'])
+        raise ValueError(subida.ultimo_error)
+
+    destino = _destino(subida)
+
+    if not subida.ruta:
+        ruta = ruta_final(subida)
+        if not default_storage.exists(ruta):
+            with open(temporal, 'rb') as archivo:
+                ruta = default_storage.save(ruta, _ArchivoTemporal(archivo))
+        descartar_temporal(subida)
+        subida.ruta = ruta
+
+    campo = 'archivo_adjunto' if subida.destino == 'adjunto' else 'archivo'
+    getattr(destino, campo).name = subida.ruta
+    destino.save(update_fields=[campo, 'actualizado'])
+
+    subida.estado = 'completa'
+    subida.save(update_fields=['ruta', 'estado', 'actualizado'])
+    return subida
+
+
+def _destino(subida):
+    """Activity (adjunto) o la nueva Submission del estudiante (entrega)."""
+    if subida.destino == 'adjunto':
+        return subida.activity
+
+    try:
+        with transaction.atomic():
+            return Submission.objects.create(activity=subida.activity, estudiante=subida.usuario)
+    except IntegrityError:
+        # Otra entrega del mismo estudiante se creó entre la verificación y este punto
+        raise ValidationError({"detail": "Ya has enviado una entrega para esta actividad."})
@@ -1,8 +1,17 @@
+from django.urls import re_path
 from rest_framework.routers import DefaultRouter
-from .views import ActivityViewSet, SubmissionViewSet
+from .views import ActivityViewSet, ChunkedUploadViewSet, SubmissionViewSet
 
 router = DefaultRouter()
 router.register(r'activities', ActivityViewSet, basename='activity')
 router.register(r'submissions', SubmissionViewSet, basename='submission')
+router.register(r'uploads', ChunkedUploadViewSet, basename='upload')
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # Sin barra final (/api/activities/<id>/submissions.zip): es un archivo
+    re_path(
+        r'^activities/(?P<pk>[^/.]+)/submissions\.zip$',
+        ActivityViewSet.as_view({'get': 'submissions_zip'}, detail=True, **ActivityViewSet.submissions_zip.kwargs),
+        name='activity-submissions-zip-archivo',
+    ),
+]
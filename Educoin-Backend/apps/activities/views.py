@@ -1,35 +1,103 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.settings import api_settings
+import os
+from datetime import datetime, time
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import content_disposition_header
+from django.utils.text import slugify
 from apps.grades.models import Grade
 from apps.coins.models import Wallet, Period
-from .models import Activity, Submission
+from .models import Activity, ChunkedUpload, Submission
 from .serializers import (
     ActivitySerializer, 
     SubmissionSerializer, 
     SubmissionListSerializer,
-    SubmissionDetailSerializer
+    SubmissionDetailSerializer,
+    ChunkedUploadSerializer
 )
+from . import downloads, uploads
+from apps.common.renderers import ArchivoRenderer
 from apps.users.permissions import IsDocente
 
 
+def _fecha_param(request, nombre):
+    """Lee ?<nombre>= como fecha u hora ISO (aware); None si no viene."""
+    valor = request.query_params.get(nombre)
+    if not valor:
+        return None
+    try:
+        fecha = parse_datetime(valor) or parse_date(valor)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ValidationError({nombre: 'Debe ser una fecha ISO (AAAA-MM-DD o AAAA-MM-DDTHH:MM)'})
+    if not isinstance(fecha, datetime):
+        fecha = datetime.combine(fecha, time.min)
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
 class ActivityViewSet(viewsets.ModelViewSet):
+    """
+    Actividades del docente o de los grupos del estudiante.
+
+    El listado acepta ?estado=pendiente|vencida (según la fecha de entrega)
+    y ?vence_antes=AAAA-MM-DD[THH:MM]. El estado de cada actividad se
+    calcula en la consulta con un único "ahora" por petición.
+    """
     serializer_class = ActivitySerializer
 
+    def initial(self, request, *args, **kwargs):
+        self.ahora = timezone.now()
+        super().initial(request, *args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['ahora'] = getattr(self, 'ahora', None) or timezone.now()
+        return context
+
     def get_queryset(self):
         user = self.request.user
-        queryset = Activity.objects.select_related('group', 'group__classroom')
+        ahora = getattr(self, 'ahora', None) or timezone.now()
+        queryset = Activity.objects.select_related('group', 'group__classroom').con_estado(ahora)
         
+        # Prefetch con to_attr: ActivitySerializer solo lee estas listas, así
+        # el listado hace un número fijo de consultas sin importar cuántas
+        # actividades tenga la página
         if user.role == 'docente':
-            queryset = queryset.filter(group__classroom__docente=user)
+            queryset = queryset.filter(group__classroom__docente=user).prefetch_related(
+                Prefetch('submissions', queryset=Submission.objects.select_related('estudiante'), to_attr='entregas')
+            )
         elif user.role == 'estudiante':
-            queryset = queryset.filter(group__estudiantes=user, habilitada=True)
+            # Solo la entrega propia, no las de todo el grupo
+            queryset = queryset.filter(group__estudiantes=user, habilitada=True).prefetch_related(
+                Prefetch('submissions', queryset=Submission.objects.filter(estudiante=user), to_attr='entrega_usuario')
+            )
         else:
             return Activity.objects.none()
-        
-        queryset = queryset.prefetch_related('submissions__estudiante')
+
+        if self.action == 'list':
+            estado = self.request.query_params.get('estado')
+            if estado == 'pendiente':
+                queryset = queryset.pendientes(ahora)
+            elif estado == 'vencida':
+                queryset = queryset.vencidas(ahora)
+            elif estado:
+                raise ValidationError({'estado': 'Valores permitidos: pendiente, vencida'})
+
+            vence_antes = _fecha_param(self.request, 'vence_antes')
+            if vence_antes:
+                queryset = queryset.filter(fecha_entrega__lt=vence_antes)
+
         return queryset
 
     def get_permissions(self):
@@ -39,6 +107,30 @@ class ActivityViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    @action(detail=True, methods=['get'], url_path='attachment',
+            renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [ArchivoRenderer])
+    def attachment(self, request, pk=None):
+        """Descargar el archivo adjunto de la actividad (ver downloads.py)"""
+        activity = self.get_object()
+        extension = os.path.splitext(activity.archivo_adjunto.name)[1].lower()
+        return downloads.servir_archivo(request, activity.archivo_adjunto, f"{slugify(activity.nombre) or 'adjunto'}{extension}")
+
+    @action(detail=True, methods=['get'], url_path=r'submissions\.zip', url_name='submissions-zip',
+            renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [ArchivoRenderer])
+    def submissions_zip(self, request, pk=None):
+        """Descargar todas las entregas en un ZIP (con notas.csv), generado mientras se envía"""
+        if request.user.role != 'docente':
+            raise PermissionDenied("Solo el docente de la actividad puede descargar todas las entregas.")
+        activity = self.get_object()
+        submissions = getattr(activity, 'entregas', None)
+        if submissions is None:
+            submissions = activity.submissions.select_related('estudiante')
+        submissions = sorted(submissions, key=lambda s: (downloads.nombre_estudiante(s.estudiante), s.pk))
+
+        response = StreamingHttpResponse(downloads.zip_entregas(submissions), content_type='application/zip')
+        response['Content-Disposition'] = content_disposition_header(True, f"{slugify(activity.nombre) or 'actividad'}-entregas.zip")
+        return response
+
     def perform_create(self, serializer):
         group = serializer.validated_data.get('group')
         if group.classroom.docente != self.request.user:
@@ -110,6 +202,13 @@ class SubmissionViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
 
+    @action(detail=True, methods=['get'], url_path='download',
+            renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [ArchivoRenderer])
+    def download(self, request, pk=None):
+        """Descargar el archivo de la entrega: el estudiante dueño o el docente de la clase"""
+        submission = self.get_object()
+        return downloads.servir_archivo(request, submission.archivo, downloads.nombre_descarga(submission))
+
     @action(detail=True, methods=["patch"], url_path="grade")
     @transaction.atomic
     def grade_submission(self, request, pk=None):
@@ -165,4 +264,101 @@ class SubmissionViewSet(viewsets.ModelViewSet):
             "grade_id": grade.id,
             "coins_ganados": coins_ganados,
             "wallet_saldo": wallet_saldo
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+
+class ChunkedUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Subidas por partes de entregas y adjuntos (ver apps/activities/uploads.py).
+    Cada usuario solo ve y continúa sus propias subidas.
+    """
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return ChunkedUpload.objects.filter(usuario=self.request.user).select_related('activity', 'usuario')
+
+    def perform_create(self, serializer):
+        uploads.iniciar(serializer.save(usuario=self.request.user))
+
+    def _bloquear(self):
+        # Serializa partes y cierre de una misma subida (reintentos concurrentes del cliente)
+        try:
+            return self.get_queryset().select_for_update().get(pk=self.kwargs['pk'])
+        except (ChunkedUpload.DoesNotExist, ValueError):
+            raise NotFound("Subida no encontrada.")
+
+    def _conflicto_de_parte(self, subida, offset):
+        if subida.estado != 'en_curso':
+            return Response({"detail": f"La subida está {subida.get_estado_display().lower()}."}, status=status.HTTP_409_CONFLICT)
+        if offset != subida.recibido:
+            # El cliente reanuda desde `recibido`
+            return Response({"detail": "Offset incorrecto.", "recibido": subida.recibido}, status=status.HTTP_409_CONFLICT)
+        return None
+
+    @action(detail=True, methods=['put'], url_path='chunk')
+    def chunk(self, request, pk=None):
+        """Agrega una parte: cuerpo binario, header Upload-Offset y opcional X-Chunk-Sha256"""
+        try:
+            longitud = int(request.headers.get('Content-Length') or 0)
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return Response({"detail": "Faltan los headers Content-Length o Upload-Offset."}, status=status.HTTP_400_BAD_REQUEST)
+        if longitud <= 0:
+            return Response({"detail": "La parte está vacía."}, status=status.HTTP_400_BAD_REQUEST)
+        if longitud > settings.SUBIDAS_TAMANO_PARTE:
+            return Response(
+                {"detail": f"Cada parte puede pesar hasta {settings.SUBIDAS_TAMANO_PARTE} bytes."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        # Chequeo previo sin lock para no leer partes que se van a rechazar
+        subida = self.get_object()
+        conflicto = self._conflicto_de_parte(subida, offset)
+        if conflicto:
+            return conflicto
+
+        # El cuerpo se recibe fuera de la transacción: una conexión lenta no retiene el lock de la fila
+        try:
+            ruta_parte = uploads.recibir_parte(subida, request.stream, longitud, request.headers.get('X-Chunk-Sha256'))
+        except ValueError as e:
+            return Response({"detail": str(e), "recibido": subida.recibido}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                subida = self._bloquear()
+                # Otro intento pudo agregar la misma parte mientras se recibía esta
+                conflicto = self._conflicto_de_parte(subida, offset)
+                if conflicto:
+                    return conflicto
+                try:
+                    subida.recibido = uploads.agregar_parte(subida, ruta_parte)
+                except ValueError as e:
+                    return Response({"detail": str(e), "recibido": subida.recibido}, status=status.HTTP_400_BAD_REQUEST)
+                subida.save(update_fields=['recibido', 'actualizado'])
+        finally:
+            uploads.descartar_parte(ruta_parte)
+
+        return Response({"recibido": subida.recibido, "tamano": subida.tamano})
+
+    @action(detail=True, methods=['post'], url_path='complete')
+    def complete(self, request, pk=None):
+        """Verifica el sha256 y asigna el archivo a la entrega o a la actividad"""
+        with transaction.atomic():
+            subida = self._bloquear()
+            if subida.estado == 'en_curso':
+                # El plazo, `habilitada` o el grupo pueden haber cambiado desde que empezó la subida
+                uploads.verificar_destino(subida.usuario, subida.activity, subida.destino)
+                if subida.recibido < subida.tamano:
+                    return Response(
+                        {"detail": "Faltan partes por subir.", "recibido": subida.recibido},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                try:
+                    uploads.completar(subida)
+                except ValueError as e:
+                    return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            elif subida.estado == 'error':
+                return Response({"detail": subida.ultimo_error}, status=status.HTTP_409_CONFLICT)
+
+        return Response(self.get_serializer(subida).data)
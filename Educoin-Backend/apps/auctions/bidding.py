@@ -0,0 +1,126 @@
+"""
+Motor de pujas.
+
+Cada puja se procesa en su propia transacción bloqueando las filas
+involucradas siempre en el mismo orden: primero la subasta y después la
+wallet del estudiante (SELECT ... FOR UPDATE). Con la subasta bloqueada, la
+validación contra la puja más alta (resumen mantenido en Auction) y el
+registro de la nueva puja no pueden intercalarse con otra puja de la misma
+subasta, y el bloqueo de monedas se aplica con un UPDATE condicional a través
+de apps.coins.ledger.
+
+Si la base de datos aborta la transacción por un deadlock o por tiempo de
+espera de bloqueo, la puja se reintenta desde el principio.
+"""
+import logging
+import random
+import time
+from collections import namedtuple
+
+from django.db import OperationalError, connection, transaction
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
+
+from apps.coins import ledger
+from apps.coins.models import Period, Wallet
+from .models import Auction, Bid
+
+logger = logging.getLogger(__name__)
+
+MAX_REINTENTOS = 5
+
+# MySQL: 1213 = deadlock, 1205 = lock wait timeout
+CODIGOS_REINTENTABLES = {1213, 1205}
+
+ResultadoPuja = namedtuple("ResultadoPuja", ["bid", "nueva", "intentos"])
+
+
+def _es_reintentable(error):
+    codigo = error.args[0] if error.args else None
+    # SQLite no tiene bloqueos de fila: el conflicto aparece como "database is locked"
+    return codigo in CODIGOS_REINTENTABLES or "database is locked" in str(error)
+
+
+def pujar(auction_id, estudiante, cantidad, registrado_por):
+    """
+    Crea o aumenta la puja de `estudiante` en la subasta `auction_id`.
+
+    Lanza ValidationError si la subasta no está activa, si la cantidad no
+    supera la puja más alta o si el saldo disponible no alcanza. Devuelve
+    ResultadoPuja(bid, nueva, intentos).
+
+    Si se llama dentro de una transacción abierta no se reintenta: tras un
+    deadlock la transacción externa ya no es utilizable.
+    """
+    reintentar = not connection.in_atomic_block
+    intento = 1
+    while True:
+        try:
+            with transaction.atomic():
+                bid, nueva = _pujar(auction_id, estudiante, cantidad, registrado_por)
+            return ResultadoPuja(bid, nueva, intento)
+        except OperationalError as e:
+            if not reintentar or not _es_reintentable(e) or intento >= MAX_REINTENTOS:
+                raise
+            logger.warning(f"Conflicto de bloqueo en subasta {auction_id} (intento {intento}): {e}")
+            time.sleep(random.uniform(0, 0.05 * 2 ** intento))
+            intento += 1
+
+
+def _pujar(auction_id, estudiante, cantidad, registrado_por):
+    # 1. Subasta: serializa todas las pujas de la misma subasta
+    auction = Auction.objects.select_for_update().get(pk=auction_id)
+
+    if auction.estado != "active" or auction.fecha_fin < now():
+        raise ValidationError("Esta subasta ya no está activa.")
+
+    periodo_activo = Period.objects.filter(grupo_id=auction.grupo_id, activo=True).first()
+    if not periodo_activo:
+        raise ValidationError("No hay un periodo activo para este grupo.")
+
+    # 2. Wallet del estudiante
+    wallet = Wallet.objects.select_for_update().filter(
+        usuario=estudiante, grupo_id=auction.grupo_id, periodo=periodo_activo
+    ).first()
+    if wallet is None:
+        raise ValidationError("El estudiante no tiene una billetera activa en este grupo.")
+
+    existing_bid = Bid.objects.filter(auction=auction, estudiante=estudiante).first()
+    puja_max = auction.puja_max_cantidad
+
+    if existing_bid:
+        if cantidad <= (puja_max or 0) or cantidad <= existing_bid.cantidad:
+            raise ValidationError(
+                f"La nueva puja ({cantidad}) debe ser mayor que la puja actual más alta ({puja_max or 0})."
+            )
+        diferencia = cantidad - existing_bid.cantidad
+    else:
+        monto_minimo = puja_max + 1 if puja_max else auction.valor_minimo
+        if cantidad < monto_minimo:
+            raise ValidationError(f"La puja debe ser mayor o igual a {monto_minimo} Educoins.")
+        diferencia = cantidad
+
+    try:
+        ledger.bloquear(wallet, diferencia)
+    except ledger.FondosInsuficientes:
+        raise ValidationError(
+            f"Saldo insuficiente. Disponible: {wallet.saldo - wallet.bloqueado}, Necesario: {diferencia}"
+        )
+
+    if existing_bid:
+        existing_bid.cantidad = cantidad
+        existing_bid.registrado_por = registrado_por
+        existing_bid.save()
+        bid, nueva = existing_bid, False
+    else:
+        bid = Bid.objects.create(
+            auction=auction, estudiante=estudiante, cantidad=cantidad, registrado_por=registrado_por
+        )
+        nueva = True
+
+    auction.registrar_puja(bid, nueva=nueva)
+    logger.info(
+        f"Puja {'creada' if nueva else 'aumentada'} en subasta {auction.pk}: "
+        f"estudiante={estudiante.pk}, cantidad={cantidad}, bloqueado={wallet.bloqueado}"
+    )
+    return bid, nueva
@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.auctions.models import Auction
+from apps.auctions.settlement import LiquidacionError, liquidar_subasta
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierra las subastas activas cuya fecha_fin ya pasó, con la misma "
+        "liquidación que el endpoint close (cobro al ganador y liberación de "
+        "las monedas bloqueadas). Con --intervalo queda corriendo y revisa "
+        "cada N segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo", type=int, default=0,
+            help="Segundos entre revisiones. 0 (por defecto) revisa una sola vez y termina.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=100,
+            help="Subastas leídas por consulta (por defecto 100).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Solo mostrar las subastas vencidas, sin cerrarlas.",
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options["intervalo"]
+        try:
+            while True:
+                close_old_connections()
+                self._revisar(options["batch_size"], options["dry_run"])
+                if intervalo <= 0:
+                    break
+                time.sleep(intervalo)
+        except KeyboardInterrupt:
+            self.stdout.write("Detenido.")
+
+    def _revisar(self, batch_size, dry_run):
+        ahora = timezone.now()
+        vencidas = Auction.objects.filter(estado="active", fecha_fin__lte=ahora).order_by("fecha_fin", "pk")
+
+        cerradas = fallidas = revisadas = 0
+        ultima = None
+        while True:
+            lote = vencidas
+            if ultima:
+                # Paginación por (fecha_fin, pk) sobre el índice (estado, fecha_fin)
+                lote = lote.filter(
+                    Q(fecha_fin__gt=ultima[0]) | Q(fecha_fin=ultima[0], pk__gt=ultima[1])
+                )
+            lote = list(lote.values_list("fecha_fin", "pk", "titulo")[:batch_size])
+            if not lote:
+                break
+            ultima = lote[-1][:2]
+
+            for fecha_fin, pk, titulo in lote:
+                revisadas += 1
+                if dry_run:
+                    self.stdout.write(f"Subasta {pk} '{titulo}' vencida el {fecha_fin:%Y-%m-%d %H:%M}")
+                    continue
+                try:
+                    liquidacion = liquidar_subasta(pk)
+                except LiquidacionError as e:
+                    fallidas += 1
+                    self.stderr.write(f"Subasta {pk} '{titulo}': {e}")
+                    continue
+                cerradas += 1
+                if liquidacion.ganador:
+                    self.stdout.write(
+                        f"Subasta {pk} '{titulo}' cerrada: ganador {liquidacion.ganador.email} "
+                        f"({liquidacion.monto} EC, {liquidacion.total_participantes} participantes)"
+                    )
+                else:
+                    self.stdout.write(f"Subasta {pk} '{titulo}' cerrada sin pujas")
+
+        if dry_run:
+            resumen = f"{revisadas} subastas vencidas por cerrar."
+        else:
+            resumen = f"{cerradas} subastas cerradas, {fallidas} con errores."
+        self.stdout.write(self.style.SUCCESS(f"[{ahora:%Y-%m-%d %H:%M:%S}] {resumen}"))
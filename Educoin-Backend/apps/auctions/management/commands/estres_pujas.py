@@ -0,0 +1,149 @@
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.auctions import bidding
+from apps.auctions.models import Auction, Bid
+from apps.classrooms.models import Classroom
+from apps.coins.models import Period, Wallet
+from apps.groups.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de estrés del motor de pujas: crea un grupo temporal con N "
+        "estudiantes que pujan en paralelo sobre la misma subasta y verifica "
+        "que el saldo bloqueado y el resumen de la subasta queden consistentes. "
+        "Usar contra una base de datos local (MySQL o SQLite), nunca producción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pujadores", type=int, default=100, help="Estudiantes pujando a la vez (por defecto 100).")
+        parser.add_argument("--rondas", type=int, default=5, help="Pujas que intenta cada estudiante (por defecto 5).")
+        parser.add_argument("--saldo", type=int, default=10000, help="Saldo inicial de cada wallet (por defecto 10000).")
+        parser.add_argument("--conservar", action="store_true", help="No borrar los datos creados al terminar.")
+
+    def handle(self, *args, **options):
+        pujadores = options["pujadores"]
+        if pujadores < 2:
+            raise CommandError("Se necesitan al menos 2 pujadores.")
+
+        docente, estudiantes, auction = self._preparar(pujadores, options["saldo"])
+        try:
+            inicio = time.monotonic()
+            with ThreadPoolExecutor(max_workers=pujadores) as executor:
+                resultados = list(executor.map(
+                    lambda estudiante: self._pujar_varias(auction.pk, estudiante, options["rondas"]),
+                    estudiantes,
+                ))
+            duracion = time.monotonic() - inicio
+
+            aceptadas = sum(r["aceptadas"] for r in resultados)
+            rechazadas = sum(r["rechazadas"] for r in resultados)
+            reintentos = sum(r["reintentos"] for r in resultados)
+            fallidas = sum(r["fallidas"] for r in resultados)
+            total = pujadores * options["rondas"]
+
+            self.stdout.write(
+                f"{total} pujas en {duracion:.2f}s ({total / duracion:.1f}/s): "
+                f"{aceptadas} aceptadas, {rechazadas} rechazadas, "
+                f"{reintentos} reintentos por bloqueo, {fallidas} fallidas."
+            )
+
+            errores = self._verificar(auction, estudiantes)
+            for error in errores[:20]:
+                self.stderr.write(error)
+            if errores:
+                raise CommandError(f"{len(errores)} inconsistencias encontradas.")
+            self.stdout.write(self.style.SUCCESS("Sin inconsistencias: bloqueos y resumen de la subasta correctos."))
+        finally:
+            if options["conservar"]:
+                self.stdout.write(f"Datos conservados: subasta {auction.pk}, docente {docente.email}.")
+            else:
+                User.objects.filter(pk__in=[docente.pk] + [e.pk for e in estudiantes]).delete()
+
+    def _preparar(self, pujadores, saldo):
+        prefijo = f"estres-{uuid.uuid4().hex[:8]}"
+        password = make_password(None)
+        docente = User.objects.create(
+            username=f"{prefijo}-docente", email=f"{prefijo}-docente@example.com",
+            role="docente", password=password,
+        )
+        User.objects.bulk_create([
+            User(
+                username=f"{prefijo}-{i}", email=f"{prefijo}-{i}@example.com",
+                role="estudiante", password=password,
+            )
+            for i in range(pujadores)
+        ])
+        estudiantes = list(User.objects.filter(username__startswith=f"{prefijo}-", role="estudiante"))
+
+        classroom = Classroom.objects.create(nombre=prefijo, docente=docente)
+        grupo = Group.objects.create(nombre=prefijo, classroom=classroom)
+        grupo.estudiantes.add(*estudiantes)
+        periodo = Period.objects.get(grupo=grupo, activo=True)
+        Wallet.objects.bulk_create([
+            Wallet(usuario=e, grupo=grupo, periodo=periodo, saldo=saldo) for e in estudiantes
+        ])
+
+        auction = Auction.objects.create(
+            titulo=prefijo, creador=docente, grupo=grupo,
+            fecha_fin=timezone.now() + timedelta(hours=1),
+        )
+        return docente, estudiantes, auction
+
+    def _pujar_varias(self, auction_id, estudiante, rondas):
+        resultado = {"aceptadas": 0, "rechazadas": 0, "reintentos": 0, "fallidas": 0}
+        try:
+            for _ in range(rondas):
+                # Lectura sin bloqueo a propósito: muchas pujas llegan con un máximo ya superado
+                puja_max = Auction.objects.filter(pk=auction_id).values_list("puja_max_cantidad", flat=True).get()
+                cantidad = (puja_max or 0) + random.randint(1, 3)
+                try:
+                    puja = bidding.pujar(auction_id, estudiante, cantidad, registrado_por=estudiante)
+                    resultado["aceptadas"] += 1
+                    resultado["reintentos"] += puja.intentos - 1
+                except ValidationError:
+                    resultado["rechazadas"] += 1
+                except OperationalError:
+                    resultado["fallidas"] += 1
+        finally:
+            connection.close()
+        return resultado
+
+    def _verificar(self, auction, estudiantes):
+        errores = []
+        pujas = dict(Bid.objects.filter(auction=auction).values_list("estudiante_id", "cantidad"))
+        wallets = Wallet.objects.filter(grupo=auction.grupo, usuario__in=estudiantes)
+
+        for wallet in wallets:
+            esperado = pujas.get(wallet.usuario_id, 0)
+            if wallet.bloqueado != esperado:
+                errores.append(f"Wallet {wallet.pk}: bloqueado={wallet.bloqueado}, puja={esperado}")
+            if wallet.bloqueado > wallet.saldo:
+                errores.append(f"Wallet {wallet.pk}: bloqueado={wallet.bloqueado} > saldo={wallet.saldo}")
+
+        if len(set(pujas.values())) != len(pujas):
+            errores.append("Hay pujas con la misma cantidad: dos pujas se validaron contra el mismo máximo.")
+
+        auction.refresh_from_db()
+        real_max = Bid.objects.filter(auction=auction).aggregate(m=Max("cantidad"))["m"]
+        if auction.total_pujas != len(pujas):
+            errores.append(f"total_pujas={auction.total_pujas}, pujas reales={len(pujas)}")
+        if auction.puja_max_cantidad != real_max:
+            errores.append(f"puja_max_cantidad={auction.puja_max_cantidad}, máximo real={real_max}")
+        elif real_max is not None and pujas.get(auction.puja_max_estudiante_id) != real_max:
+            errores.append(f"puja_max_estudiante={auction.puja_max_estudiante_id} no tiene la puja más alta")
+        return errores
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+
+from apps.auctions.models import Auction, Bid
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el resumen denormalizado de pujas de las subastas "
+        "(total_pujas, puja_max_cantidad, puja_max_estudiante) y corrige "
+        "los que no coincidan con las pujas guardadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--subasta", type=int, action="append", dest="subastas",
+            help="Id de subasta a revisar (se puede repetir). Por defecto, todas.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Solo mostrar las subastas desactualizadas, sin guardar cambios.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Tamaño de lote para bulk_update (por defecto 500).",
+        )
+
+    def handle(self, *args, **options):
+        mas_alta = Bid.objects.filter(auction=OuterRef("pk")).order_by("-cantidad", "creado")
+        subastas = Auction.objects.annotate(
+            real_total=Count("bids"),
+            real_max=Subquery(mas_alta.values("cantidad")[:1]),
+            real_estudiante=Subquery(mas_alta.values("estudiante_id")[:1]),
+        ).order_by("pk")
+        if options["subastas"]:
+            subastas = subastas.filter(pk__in=options["subastas"])
+
+        revisadas = 0
+        desactualizadas = []
+        for auction in subastas.iterator(chunk_size=options["batch_size"]):
+            revisadas += 1
+            real = (auction.real_total, auction.real_max, auction.real_estudiante)
+            guardado = (auction.total_pujas, auction.puja_max_cantidad, auction.puja_max_estudiante_id)
+            if real == guardado:
+                continue
+
+            self.stdout.write(f"Subasta {auction.pk}: {guardado} -> {real}")
+            auction.total_pujas, auction.puja_max_cantidad, auction.puja_max_estudiante_id = real
+            desactualizadas.append(auction)
+
+        if desactualizadas and not options["dry_run"]:
+            Auction.objects.bulk_update(
+                desactualizadas,
+                ["total_pujas", "puja_max_cantidad", "puja_max_estudiante"],
+                batch_size=options["batch_size"],
+            )
+
+        accion = "por corregir" if options["dry_run"] else "corregidas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{revisadas} subastas revisadas, {len(desactualizadas)} {accion}."
+        ))
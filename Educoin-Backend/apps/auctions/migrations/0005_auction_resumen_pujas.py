@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def calcular_resumen_pujas(apps, schema_editor):
+    Auction = apps.get_model('auctions', 'Auction')
+    Bid = apps.get_model('auctions', 'Bid')
+
+    mas_alta = Bid.objects.filter(auction=OuterRef('pk')).order_by('-cantidad', 'creado')
+    subastas = Auction.objects.annotate(
+        real_total=Count('bids'),
+        real_max=Subquery(mas_alta.values('cantidad')[:1]),
+        real_estudiante=Subquery(mas_alta.values('estudiante_id')[:1]),
+    ).filter(real_total__gt=0)
+
+    cambios = []
+    for auction in subastas.iterator():
+        auction.total_pujas = auction.real_total
+        auction.puja_max_cantidad = auction.real_max
+        auction.puja_max_estudiante_id = auction.real_estudiante
+        cambios.append(auction)
+    Auction.objects.bulk_update(
+        cambios, ['total_pujas', 'puja_max_cantidad', 'puja_max_estudiante'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0004_auction_valor_minimo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='puja_max_cantidad',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='puja_max_estudiante',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='total_pujas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_resumen_pujas, migrations.RunPython.noop),
+    ]
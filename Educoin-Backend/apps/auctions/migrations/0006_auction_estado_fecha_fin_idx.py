@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0005_auction_resumen_pujas'),
+        ('groups', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['estado', 'fecha_fin'], name='auctions_au_estado_67a6a5_idx'),
+        ),
+    ]
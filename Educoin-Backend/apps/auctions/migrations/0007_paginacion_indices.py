@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0006_auction_estado_fecha_fin_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['estudiante', 'creado'], name='auctions_bi_estudia_e7b972_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['auction', 'creado'], name='auctions_bi_auction_5f23c0_idx'),
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.conf import settings
 from apps.common.models import BaseModel
 
@@ -24,12 +27,59 @@ class Auction(BaseModel):
     help_text="Valor mínimo para pujar en esta subasta"
     )
 
+    # Resumen de pujas denormalizado, mantenido por el flujo de pujas
+    # (ver registrar_puja / recalcular_resumen_pujas)
+    total_pujas = models.PositiveIntegerField(default=0)
+    puja_max_cantidad = models.PositiveIntegerField(null=True, blank=True)
+    puja_max_estudiante = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
     class Meta:
         ordering = ['-creado']
+        indexes = [
+            # Búsqueda de subastas activas vencidas (cerrar_subastas_vencidas)
+            models.Index(fields=['estado', 'fecha_fin']),
+        ]
 
     def __str__(self):
         return f"{self.titulo} - {self.estado} ({self.grupo.nombre})"
 
+    def registrar_puja(self, bid, nueva):
+        """
+        Actualiza el resumen tras crear o aumentar una puja que ya fue
+        validada como la más alta. Debe llamarse dentro de la misma
+        transacción que guarda la puja.
+        """
+        cambios = {
+            "puja_max_cantidad": bid.cantidad,
+            "puja_max_estudiante": bid.estudiante_id,
+        }
+        if nueva:
+            cambios["total_pujas"] = F("total_pujas") + 1
+        Auction.objects.filter(pk=self.pk).update(**cambios)
+
+        self.puja_max_cantidad = bid.cantidad
+        self.puja_max_estudiante_id = bid.estudiante_id
+        if nueva:
+            self.total_pujas += 1
+
+    def recalcular_resumen_pujas(self):
+        """Recalcula el resumen desde las pujas guardadas (bajas, ediciones, reparaciones)."""
+        mas_alta = self.bids.order_by("-cantidad", "creado").values("cantidad", "estudiante_id").first()
+        self.total_pujas = self.bids.count()
+        self.puja_max_cantidad = mas_alta["cantidad"] if mas_alta else None
+        self.puja_max_estudiante_id = mas_alta["estudiante_id"] if mas_alta else None
+        Auction.objects.filter(pk=self.pk).update(
+            total_pujas=self.total_pujas,
+            puja_max_cantidad=self.puja_max_cantidad,
+            puja_max_estudiante=self.puja_max_estudiante_id,
+        )
+
 
 class Bid(BaseModel):
     auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name="bids")
@@ -50,6 +100,24 @@ class Bid(BaseModel):
         # REMOVER unique_together para permitir aumentar pujas
         # unique_together = ('auction', 'estudiante')
         ordering = ['-cantidad']
+        indexes = [
+            # Listados paginados por cursor (creado, id)
+            models.Index(fields=['estudiante', 'creado']),
+            models.Index(fields=['auction', 'creado']),
+        ]
 
     def __str__(self):
-        return f"{self.estudiante.email} -> {self.cantidad} en {self.auction.titulo}"
\ No newline at end of file
+        return f"{self.estudiante.email} -> {self.cantidad} en {self.auction.titulo}"
+
+
+@receiver(post_delete, sender=Bid)
+def actualizar_resumen_al_eliminar_puja(sender, instance, **kwargs):
+    """Mantener el resumen de la subasta cuando se elimina una puja (incluye borrados en cascada)"""
+    # Si se está eliminando la propia subasta no hay resumen que mantener
+    origin = kwargs.get("origin")
+    if isinstance(origin, Auction) or getattr(origin, "model", None) is Auction:
+        return
+
+    auction = Auction.objects.filter(pk=instance.auction_id).first()
+    if auction:
+        auction.recalcular_resumen_pujas()
@@ -81,11 +81,10 @@ class BidCreateSerializer(serializers.ModelSerializer):
                     f"La nueva puja debe ser mayor que tu puja actual de {existing_bid.cantidad} EC."
                 )
             
-            # Obtener la puja más alta actual
-            highest_bid = auction.bids.order_by("-cantidad").first()
-            if highest_bid and cantidad <= highest_bid.cantidad:
+            # Puja más alta actual (resumen mantenido en la subasta)
+            if auction.puja_max_cantidad and cantidad <= auction.puja_max_cantidad:
                 raise serializers.ValidationError(
-                    f"La nueva puja debe ser mayor que la puja actual más alta de {highest_bid.cantidad} EC."
+                    f"La nueva puja debe ser mayor que la puja actual más alta de {auction.puja_max_cantidad} EC."
                 )
             
             # Validar saldo para el aumento
@@ -99,9 +98,11 @@ class BidCreateSerializer(serializers.ModelSerializer):
                 )
         else:
             # Validación para NUEVA puja
-            # Obtener la puja más alta actual para establecer monto mínimo
-            highest_bid = auction.bids.order_by("-cantidad").first()
-            monto_minimo = highest_bid.cantidad + 1 if highest_bid else (getattr(auction, 'valor_minimo', 1) or 1)
+            # La puja más alta actual establece el monto mínimo
+            if auction.puja_max_cantidad:
+                monto_minimo = auction.puja_max_cantidad + 1
+            else:
+                monto_minimo = getattr(auction, 'valor_minimo', 1) or 1
             
             if cantidad < monto_minimo:
                 raise serializers.ValidationError(
@@ -120,7 +121,6 @@ class AuctionSerializer(serializers.ModelSerializer):
     creador_email = serializers.EmailField(source="creador.email", read_only=True)
     creador_nombre = serializers.SerializerMethodField()
     grupo_nombre = serializers.CharField(source="grupo.nombre", read_only=True)
-    total_pujas = serializers.SerializerMethodField()
     bids = BidSerializer(many=True, read_only=True)  # Cambio importante: mostrar todas las bids
     puja_ganadora = serializers.SerializerMethodField()
     puja_mas_alta = serializers.SerializerMethodField()
@@ -144,34 +144,32 @@ class AuctionSerializer(serializers.ModelSerializer):
             "bids",
             "creado",
         ]
-        read_only_fields = ["id", "creador", "creado", "estado"]
+        read_only_fields = ["id", "creador", "creado", "estado", "total_pujas"]
 
     def get_creador_nombre(self, obj):
         return f"{obj.creador.first_name} {obj.creador.last_name}".strip()
 
-    def get_total_pujas(self, obj):
-        return obj.bids.count()
+    def _estudiante_puja_max_nombre(self, obj):
+        estudiante = obj.puja_max_estudiante
+        return f"{estudiante.first_name} {estudiante.last_name}".strip() if estudiante else ""
 
     def get_puja_mas_alta(self, obj):
-        """Retorna la puja más alta actual"""
-        highest_bid = obj.bids.order_by("-cantidad").first()
-        if highest_bid:
+        """Retorna la puja más alta actual (resumen denormalizado en la subasta)"""
+        if obj.puja_max_cantidad:
             return {
-                "cantidad": highest_bid.cantidad,
-                "estudiante_nombre": f"{highest_bid.estudiante.first_name} {highest_bid.estudiante.last_name}".strip()
+                "cantidad": obj.puja_max_cantidad,
+                "estudiante_nombre": self._estudiante_puja_max_nombre(obj)
             }
         return None
 
     def get_puja_ganadora(self, obj):
         """Retorna la puja más alta si la subasta está cerrada"""
-        if obj.estado == "closed":
-            highest_bid = obj.bids.order_by("-cantidad").first()
-            if highest_bid:
-                return {
-                    "estudiante_id": highest_bid.estudiante.id,
-                    "estudiante_nombre": f"{highest_bid.estudiante.first_name} {highest_bid.estudiante.last_name}".strip(),
-                    "cantidad": highest_bid.cantidad
-                }
+        if obj.estado == "closed" and obj.puja_max_cantidad:
+            return {
+                "estudiante_id": obj.puja_max_estudiante_id,
+                "estudiante_nombre": self._estudiante_puja_max_nombre(obj),
+                "cantidad": obj.puja_max_cantidad
+            }
         return None
 
     def validate_grupo(self, value):
@@ -0,0 +1,112 @@
+"""
+Cierre (liquidación) de subastas.
+
+Toda la liquidación ocurre en una transacción y con un número fijo de
+consultas, sin importar cuántas pujas tenga la subasta:
+- la subasta se bloquea primero (mismo orden que apps.auctions.bidding),
+- el ganador paga con un UPDATE condicional sobre saldo y bloqueado,
+- las monedas de todos los perdedores se liberan con un único UPDATE que
+  toma la cantidad de cada uno de una subconsulta sobre sus pujas,
+- las notificaciones de subasta ganada/perdida se crean con bulk_create.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.coins import ledger
+from apps.coins.models import Period, Wallet
+from apps.notifications.utils import notificar_resultado_subasta
+from .models import Auction, Bid
+
+Liquidacion = namedtuple("Liquidacion", ["auction", "ganador", "monto", "total_participantes"])
+
+
+class LiquidacionError(Exception):
+    """La subasta no se puede cerrar (ya cerrada, sin periodo o sin wallet)."""
+
+
+def liberar_bloqueos(auction, periodo, excluir_estudiante=None):
+    """
+    Devuelve a las wallets del periodo lo bloqueado por las pujas de
+    `auction` (menos la de `excluir_estudiante`) con un solo UPDATE.
+    """
+    pujas = Bid.objects.filter(auction=auction)
+    if excluir_estudiante is not None:
+        pujas = pujas.exclude(estudiante_id=excluir_estudiante)
+
+    cantidad_puja = Subquery(
+        pujas.filter(estudiante=OuterRef("usuario")).values("cantidad")[:1]
+    )
+    return Wallet.objects.filter(
+        grupo_id=auction.grupo_id,
+        periodo=periodo,
+        usuario__in=pujas.values("estudiante"),
+    ).update(
+        bloqueado=Greatest(F("bloqueado"), cantidad_puja) - cantidad_puja,
+        actualizado=timezone.now(),
+    )
+
+
+def liquidar_subasta(auction_id):
+    """
+    Cierra la subasta, cobra la puja ganadora y libera las demás.
+
+    Lanza LiquidacionError sin modificar nada si la subasta ya estaba
+    cerrada, si el grupo no tiene periodo activo o si el ganador no tiene
+    wallet. Devuelve Liquidacion(auction, ganador, monto, total_participantes);
+    ganador es None si no hubo pujas.
+    """
+    with transaction.atomic():
+        auction = Auction.objects.select_for_update().get(pk=auction_id)
+        if auction.estado != "active":
+            raise LiquidacionError("La subasta ya está cerrada.")
+
+        ganadora = (
+            Bid.objects.filter(auction=auction)
+            .select_related("estudiante")
+            .order_by("-cantidad", "creado")
+            .first()
+        )
+
+        if ganadora is None:
+            Auction.objects.filter(pk=auction.pk).update(estado="closed", actualizado=timezone.now())
+            auction.estado = "closed"
+            return Liquidacion(auction, None, 0, 0)
+
+        periodo_activo = Period.objects.filter(grupo_id=auction.grupo_id, activo=True).first()
+        if not periodo_activo:
+            raise LiquidacionError("No hay periodo activo para procesar el pago.")
+
+        wallet_ganador = Wallet.objects.filter(
+            usuario_id=ganadora.estudiante_id, grupo_id=auction.grupo_id, periodo=periodo_activo
+        ).first()
+        if wallet_ganador is None:
+            raise LiquidacionError("Error: El ganador no tiene billetera activa.")
+
+        Auction.objects.filter(pk=auction.pk).update(estado="closed", actualizado=timezone.now())
+        auction.estado = "closed"
+
+        # 1. Cobrar coins al ganador
+        try:
+            ledger.cobrar_bloqueado(
+                wallet_ganador, ganadora.cantidad,
+                descripcion=f"Pago por ganar subasta: {auction.titulo}",
+            )
+        except ledger.FondosInsuficientes:
+            raise LiquidacionError("Error: El ganador no tiene las monedas bloqueadas para pagar.")
+
+        # 2. Devolver coins a los demás participantes
+        perdedores = list(
+            Bid.objects.filter(auction=auction)
+            .exclude(estudiante_id=ganadora.estudiante_id)
+            .values_list("estudiante_id", "cantidad")
+        )
+        if perdedores:
+            liberar_bloqueos(auction, periodo_activo, excluir_estudiante=ganadora.estudiante_id)
+
+        notificar_resultado_subasta(auction, ganadora.estudiante_id, ganadora.cantidad, perdedores)
+
+    return Liquidacion(auction, ganadora.estudiante, ganadora.cantidad, len(perdedores) + 1)
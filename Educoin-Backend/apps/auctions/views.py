@@ -2,8 +2,8 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError, PermissionDenied
-from django.utils.timezone import now
 from django.db import transaction
+from django.db.models import Prefetch
 import logging
 
 # Agrega esto al inicio del archivo
@@ -17,7 +17,9 @@ from .serializers import (
     BidCreateSerializer
 )
 from apps.users.permissions import AdminOrDocente, IsDocente
+from apps.coins import ledger
 from apps.coins.models import Wallet, Period
+from . import bidding, settlement
 
 
 class AuctionViewSet(viewsets.ModelViewSet):
@@ -35,21 +37,24 @@ class AuctionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+
+        # Resumen de pujas denormalizado + pujas con sus usuarios en una sola consulta extra
+        pujas = Prefetch('bids', queryset=Bid.objects.select_related('estudiante', 'registrado_por'))
         
         if user.role == 'docente':
             # Docente ve subastas de sus grupos
             return Auction.objects.filter(
                 grupo__classroom__docente=user
-            ).select_related('creador', 'grupo', 'grupo__classroom').prefetch_related('bids')
+            ).select_related('creador', 'grupo', 'grupo__classroom', 'puja_max_estudiante').prefetch_related(pujas)
         
         elif user.role == 'estudiante':
             # Estudiante ve subastas de los grupos a los que pertenece
             return Auction.objects.filter(
                 grupo__estudiantes=user
-            ).select_related('creador', 'grupo', 'grupo__classroom').prefetch_related('bids')
+            ).select_related('creador', 'grupo', 'grupo__classroom', 'puja_max_estudiante').prefetch_related(pujas)
         
         elif user.role == 'admin' or user.is_staff:
-            return Auction.objects.all().select_related('creador', 'grupo').prefetch_related('bids')
+            return Auction.objects.all().select_related('creador', 'grupo', 'puja_max_estudiante').prefetch_related(pujas)
         
         return Auction.objects.none()
 
@@ -89,24 +94,14 @@ class AuctionViewSet(viewsets.ModelViewSet):
             raise ValidationError("No se puede eliminar una subasta cerrada.")
         
         # Devolver monedas bloqueadas antes de eliminar
-        for bid in instance.bids.all():
-            try:
-                periodo_activo = Period.objects.filter(grupo=instance.grupo, activo=True).first()
-                if periodo_activo:
-                    wallet = Wallet.objects.get(
-                        usuario=bid.estudiante, 
-                        grupo=instance.grupo, 
-                        periodo=periodo_activo
-                    )
-                    wallet.bloqueado -= bid.cantidad
-                    wallet.save()
-            except Wallet.DoesNotExist:
-                pass
-        
-        instance.delete()
+        with transaction.atomic():
+            Auction.objects.select_for_update().filter(pk=instance.pk).first()
+            periodo_activo = Period.objects.filter(grupo=instance.grupo, activo=True).first()
+            if periodo_activo:
+                settlement.liberar_bloqueos(instance, periodo_activo)
+            instance.delete()
 
     @action(detail=True, methods=["post"], permission_classes=[AdminOrDocente])
-    @transaction.atomic
     def close(self, request, pk=None):
         """
         Cerrar la subasta y procesar el ganador.
@@ -119,82 +114,26 @@ class AuctionViewSet(viewsets.ModelViewSet):
         if user.role == 'docente' and auction.creador != user:
             raise PermissionDenied("Solo el creador de la subasta puede cerrarla.")
 
-        if auction.estado != "active":
-            return Response(
-                {"detail": "La subasta ya está cerrada."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Marcar como cerrada
-        auction.estado = "closed"
-        auction.save()
-
-        # Obtener la puja más alta
-        highest_bid = auction.bids.order_by("-cantidad").first()
+        try:
+            liquidacion = settlement.liquidar_subasta(auction.pk)
+        except settlement.LiquidacionError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not highest_bid:
+        ganador = liquidacion.ganador
+        if ganador is None:
             return Response({
                 "detail": "Subasta cerrada sin pujas."
             }, status=status.HTTP_200_OK)
 
-        ganador = highest_bid.estudiante
-        monto = highest_bid.cantidad
-
-        # Obtener periodo activo
-        periodo_activo = Period.objects.filter(grupo=auction.grupo, activo=True).first()
-        
-        if not periodo_activo:
-            return Response({
-                "detail": "No hay periodo activo para procesar el pago."
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        # 1. Cobrar coins al ganador
-        try:
-            wallet_ganador = Wallet.objects.get(
-                usuario=ganador, 
-                grupo=auction.grupo, 
-                periodo=periodo_activo
-            )
-            wallet_ganador.bloqueado -= monto
-            wallet_ganador.saldo -= monto
-            wallet_ganador.save()
-
-            # Registrar transacción
-            from apps.coins.models import CoinTransaction
-            CoinTransaction.objects.create(
-                wallet=wallet_ganador,
-                tipo="spend",
-                cantidad=monto,
-                descripcion=f"Pago por ganar subasta: {auction.titulo}"
-            )
-        except Wallet.DoesNotExist:
-            return Response({
-                "detail": "Error: El ganador no tiene billetera activa."
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        # 2. Devolver coins a los demás participantes
-        otras_pujas = auction.bids.exclude(id=highest_bid.id)
-        for bid in otras_pujas:
-            try:
-                wallet = Wallet.objects.get(
-                    usuario=bid.estudiante, 
-                    grupo=auction.grupo, 
-                    periodo=periodo_activo
-                )
-                wallet.bloqueado -= bid.cantidad
-                wallet.save()
-            except Wallet.DoesNotExist:
-                pass
-
         return Response({
             "detail": f"Subasta cerrada exitosamente",
             "ganador": {
                 "id": ganador.id,
                 "email": ganador.email,
                 "nombre": f"{ganador.first_name} {ganador.last_name}".strip(),
-                "monto_pagado": monto
+                "monto_pagado": liquidacion.monto
             },
-            "total_participantes": auction.bids.count()
+            "total_participantes": liquidacion.total_participantes
         }, status=status.HTTP_200_OK)
 
 
@@ -239,12 +178,13 @@ class BidViewSet(viewsets.ModelViewSet):
             logger.error(f"Error al crear/aumentar puja: {str(e)}")
             raise
 
-    @transaction.atomic
     def perform_create(self, serializer):
         """
         Crear o aumentar puja:
         - Si el estudiante ya tiene puja: aumentar
         - Si no tiene puja: crear nueva
+        La validación contra la puja más alta y el bloqueo de monedas se hacen
+        en apps.auctions.bidding con la subasta y la wallet bloqueadas.
         """
         user = self.request.user
         auction = serializer.validated_data['auction']
@@ -268,106 +208,13 @@ class BidViewSet(viewsets.ModelViewSet):
             logger.warning(f"Usuario {user.id} con rol {user.role} intentó crear puja sin permisos")
             raise PermissionDenied("No tienes permiso para crear pujas.")
 
-        # Validar que la subasta esté activa
-        if auction.estado != "active":
-            logger.warning(f"Subasta {auction.id} no está activa")
-            raise ValidationError("Esta subasta ya no está activa.")
-
-        if auction.fecha_fin < now():
-            logger.warning(f"Subasta {auction.id} ya expiró")
-            raise ValidationError("Esta subasta ya no está activa.")
-
-        # Buscar wallet y periodo activo
-        periodo_activo = Period.objects.filter(grupo=auction.grupo, activo=True).first()
-        
-        if not periodo_activo:
-            logger.warning(f"No hay periodo activo para grupo {auction.grupo.id}")
-            raise ValidationError("No hay un periodo activo para este grupo.")
-
         try:
-            wallet = Wallet.objects.get(
-                usuario=estudiante, 
-                grupo=auction.grupo, 
-                periodo=periodo_activo
-            )
-            logger.info(f"Wallet encontrada: saldo={wallet.saldo}, bloqueado={wallet.bloqueado}")
-        except Wallet.DoesNotExist:
-            logger.error(f"No se encontró wallet para estudiante {estudiante.id} en grupo {auction.grupo.id}")
-            raise ValidationError("El estudiante no tiene una billetera activa en este grupo.")
+            resultado = bidding.pujar(auction.id, estudiante, cantidad, registrado_por=user)
+        except ValidationError as e:
+            logger.warning(f"Puja rechazada en subasta {auction.id}: {e.detail}")
+            raise
 
-        # Validar si el estudiante ya tiene una puja en esta subasta
-        existing_bid = Bid.objects.filter(auction=auction, estudiante=estudiante).first()
-        
-        if existing_bid:
-            # AUMENTAR PUJA EXISTENTE
-            logger.info(f"Puja existente encontrada: {existing_bid.cantidad}")
-            
-            # Obtener la puja más alta actual (puede ser de otro estudiante)
-            highest_bid = auction.bids.order_by("-cantidad").first()
-            
-            # Validar que la nueva cantidad sea mayor que la puja más alta actual
-            if cantidad <= highest_bid.cantidad:
-                error_msg = f"La nueva puja ({cantidad}) debe ser mayor que la puja actual más alta ({highest_bid.cantidad})."
-                logger.warning(error_msg)
-                raise ValidationError(error_msg)
-            
-            # Calcular la diferencia a bloquear (respecto a la puja anterior del mismo estudiante)
-            diferencia = cantidad - existing_bid.cantidad
-            
-            # Validar saldo disponible para el aumento
-            saldo_disponible = wallet.saldo - wallet.bloqueado
-            logger.info(f"Saldo disponible para aumento: {saldo_disponible}, diferencia necesaria: {diferencia}")
-            
-            if diferencia > saldo_disponible:
-                error_msg = f"Saldo insuficiente para aumentar la puja. Disponible: {saldo_disponible}, Necesario: {diferencia}"
-                logger.warning(error_msg)
-                raise ValidationError(error_msg)
-            
-            # Actualizar la puja existente
-            existing_bid.cantidad = cantidad
-            existing_bid.registrado_por = user
-            existing_bid.save()
-            
-            # Bloquear monedas adicionales
-            wallet.bloqueado += diferencia
-            wallet.save()
-            
-            logger.info(f"Puja aumentada exitosamente: {existing_bid.cantidad}, bloqueado adicional: {diferencia}")
-            
-            # IMPORTANTE: Asignar la instancia existente al serializer
-            serializer.instance = existing_bid
-            
-        else:
-            # NUEVA PUJA
-            logger.info("Creando nueva puja")
-            
-            # Obtener la puja más alta actual para validar el monto mínimo
-            highest_bid = auction.bids.order_by("-cantidad").first()
-            monto_minimo = highest_bid.cantidad + 1 if highest_bid else auction.valor_minimo
-            
-            # Validar que la puja sea mayor o igual al monto mínimo requerido
-            if cantidad < monto_minimo:
-                error_msg = f"La puja debe ser mayor o igual a {monto_minimo} Educoins."
-                logger.warning(error_msg)
-                raise ValidationError(error_msg)
-            
-            # Validar saldo suficiente (saldo libre)
-            saldo_disponible = wallet.saldo - wallet.bloqueado
-            logger.info(f"Saldo disponible para nueva puja: {saldo_disponible}, cantidad solicitada: {cantidad}")
-            
-            if saldo_disponible < cantidad:
-                error_msg = f"Saldo insuficiente. Disponible: {saldo_disponible}, Solicitado: {cantidad}"
-                logger.warning(error_msg)
-                raise ValidationError(error_msg)
-
-            # Guardar la nueva puja con registro de quién la creó
-            bid = serializer.save(registrado_por=user)
-
-            # Bloquear monedas en la wallet
-            wallet.bloqueado += cantidad
-            wallet.save()
-            
-            logger.info(f"Nueva puja creada exitosamente: {bid.cantidad}, total bloqueado: {wallet.bloqueado}")
+        serializer.instance = resultado.bid
 
     # ... (el resto de los métodos permanecen igual)
     def perform_update(self, serializer):
@@ -392,29 +239,36 @@ class BidViewSet(viewsets.ModelViewSet):
         # Ajustar saldo bloqueado si cambia la cantidad
         old_cantidad = bid.cantidad
         new_cantidad = serializer.validated_data.get('cantidad', old_cantidad)
-        
-        if old_cantidad != new_cantidad:
-            logger.info(f"Cambiando cantidad de puja: {old_cantidad} -> {new_cantidad}")
-            periodo_activo = Period.objects.filter(grupo=bid.auction.grupo, activo=True).first()
-            wallet = Wallet.objects.get(
-                usuario=bid.estudiante,
-                grupo=bid.auction.grupo,
-                periodo=periodo_activo
-            )
-            
-            diferencia = new_cantidad - old_cantidad
-            saldo_disponible = wallet.saldo - wallet.bloqueado
-            
-            if diferencia > saldo_disponible:
-                error_msg = f"Saldo insuficiente para aumentar la puja. Disponible: {saldo_disponible}"
-                logger.warning(error_msg)
-                raise ValidationError(error_msg)
-            
-            wallet.bloqueado += diferencia
-            wallet.save()
-            logger.info(f"Puja actualizada: diferencia bloqueada={diferencia}, nuevo bloqueado={wallet.bloqueado}")
-        
-        serializer.save()
+
+        with transaction.atomic():
+            # Mismo orden de bloqueo que bidding.pujar: subasta y luego wallet
+            Auction.objects.select_for_update().filter(pk=bid.auction_id).first()
+
+            if old_cantidad != new_cantidad:
+                logger.info(f"Cambiando cantidad de puja: {old_cantidad} -> {new_cantidad}")
+                periodo_activo = Period.objects.filter(grupo=bid.auction.grupo, activo=True).first()
+                wallet = Wallet.objects.select_for_update().get(
+                    usuario=bid.estudiante,
+                    grupo=bid.auction.grupo,
+                    periodo=periodo_activo
+                )
+
+                diferencia = new_cantidad - old_cantidad
+                if diferencia > 0:
+                    try:
+                        ledger.bloquear(wallet, diferencia)
+                    except ledger.FondosInsuficientes:
+                        error_msg = f"Saldo insuficiente para aumentar la puja. Disponible: {wallet.saldo - wallet.bloqueado}"
+                        logger.warning(error_msg)
+                        raise ValidationError(error_msg)
+                else:
+                    ledger.desbloquear(wallet, -diferencia)
+                logger.info(f"Puja actualizada: diferencia bloqueada={diferencia}, nuevo bloqueado={wallet.bloqueado}")
+
+            serializer.save()
+            bid.auction.recalcular_resumen_pujas()
+            if serializer.instance.auction_id != bid.auction_id:
+                serializer.instance.auction.recalcular_resumen_pujas()
         logger.info(f"Puja {bid.id} actualizada exitosamente")
 
     def perform_destroy(self, instance):
@@ -436,22 +290,21 @@ class BidViewSet(viewsets.ModelViewSet):
             raise ValidationError("No se pueden eliminar pujas de subastas cerradas.")
         
         # Desbloquear monedas
-        try:
+        with transaction.atomic():
+            Auction.objects.select_for_update().filter(pk=instance.auction_id).first()
             periodo_activo = Period.objects.filter(grupo=instance.auction.grupo, activo=True).first()
-            if periodo_activo:
-                wallet = Wallet.objects.get(
-                    usuario=instance.estudiante,
-                    grupo=instance.auction.grupo,
-                    periodo=periodo_activo
-                )
-                wallet.bloqueado -= instance.cantidad
-                wallet.save()
+            wallet = Wallet.objects.filter(
+                usuario=instance.estudiante,
+                grupo=instance.auction.grupo,
+                periodo=periodo_activo
+            ).first() if periodo_activo else None
+            if wallet:
+                ledger.desbloquear(wallet, instance.cantidad)
                 logger.info(f"Monedas desbloqueadas: {instance.cantidad}, nuevo bloqueado={wallet.bloqueado}")
-        except Wallet.DoesNotExist:
-            logger.error(f"No se encontró wallet al eliminar puja {instance.id}")
-            pass
-        
-        instance.delete()
+            else:
+                logger.error(f"No se encontró wallet al eliminar puja {instance.id}")
+
+            instance.delete()
         logger.info(f"Puja {instance.id} eliminada exitosamente")
 
     @action(detail=False, methods=['get'], url_path='por-subasta/(?P<auction_id>[^/.]+)')
@@ -0,0 +1,272 @@
+"""
+Operaciones atómicas sobre el saldo de las wallets.
+
+Los cambios de saldo se aplican directamente en la base de datos con
+expresiones F() y UPDATE condicionales, en lugar de leer la wallet, modificarla
+en Python y guardar todas las columnas. Así dos depósitos (o una recompensa y
+un pago de subasta) sobre la misma wallet nunca se pisan entre sí, y la falta
+de fondos se detecta por el número de filas afectadas.
+
+Todas las funciones aceptan una instancia de Wallet o su id. Si reciben la
+instancia, ajustan sus campos en memoria con el mismo delta aplicado en la
+base de datos (sin releer la fila).
+"""
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Wallet, CoinTransaction
+
+# Reintentos del compare-and-swap de `resetear` ante escrituras concurrentes
+MAX_REINTENTOS_RESET = 5
+
+
+class FondosInsuficientes(ValueError):
+    """La wallet no tiene saldo suficiente para la operación."""
+
+
+def _wallet_id(wallet):
+    return wallet.pk if isinstance(wallet, Wallet) else wallet
+
+
+def _validar_cantidad(cantidad):
+    cantidad = int(cantidad)
+    if cantidad <= 0:
+        raise ValueError("La cantidad debe ser mayor a 0.")
+    return cantidad
+
+
+def _registrar(wallet, tipo, cantidad, descripcion):
+    """Inserta la CoinTransaction asociada al movimiento."""
+    if isinstance(wallet, Wallet):
+        return CoinTransaction.objects.create(
+            wallet=wallet, tipo=tipo, cantidad=cantidad, descripcion=descripcion
+        )
+    return CoinTransaction.objects.create(
+        wallet_id=wallet, tipo=tipo, cantidad=cantidad, descripcion=descripcion
+    )
+
+
+def depositar(wallet, cantidad, descripcion=""):
+    """
+    Suma `cantidad` al saldo con un único UPDATE y registra la transacción.
+    Devuelve la CoinTransaction creada.
+    """
+    cantidad = _validar_cantidad(cantidad)
+    wallet_id = _wallet_id(wallet)
+
+    with transaction.atomic():
+        actualizadas = Wallet.objects.filter(pk=wallet_id).update(
+            saldo=F("saldo") + cantidad,
+            actualizado=timezone.now(),
+        )
+        if not actualizadas:
+            raise Wallet.DoesNotExist(f"No existe la wallet {wallet_id}.")
+
+        if isinstance(wallet, Wallet):
+            wallet.saldo += cantidad
+
+        return _registrar(wallet, "earn", cantidad, descripcion)
+
+
+def gastar(wallet, cantidad, descripcion=""):
+    """
+    Resta `cantidad` del saldo con un UPDATE condicional (saldo >= cantidad).
+    Si ninguna fila cumple la condición se lanza FondosInsuficientes.
+    """
+    cantidad = _validar_cantidad(cantidad)
+    wallet_id = _wallet_id(wallet)
+
+    with transaction.atomic():
+        actualizadas = Wallet.objects.filter(pk=wallet_id, saldo__gte=cantidad).update(
+            saldo=F("saldo") - cantidad,
+            actualizado=timezone.now(),
+        )
+        if not actualizadas:
+            if not Wallet.objects.filter(pk=wallet_id).exists():
+                raise Wallet.DoesNotExist(f"No existe la wallet {wallet_id}.")
+            raise FondosInsuficientes("Fondos insuficientes.")
+
+        if isinstance(wallet, Wallet):
+            wallet.saldo -= cantidad
+
+        return _registrar(wallet, "spend", cantidad, descripcion)
+
+
+def bloquear(wallet, cantidad):
+    """
+    Reserva `cantidad` del saldo disponible (saldo - bloqueado), por ejemplo
+    al pujar. UPDATE condicional: lanza FondosInsuficientes si no alcanza.
+    """
+    cantidad = _validar_cantidad(cantidad)
+    wallet_id = _wallet_id(wallet)
+
+    actualizadas = Wallet.objects.filter(
+        pk=wallet_id, saldo__gte=F("bloqueado") + cantidad
+    ).update(bloqueado=F("bloqueado") + cantidad, actualizado=timezone.now())
+    if not actualizadas:
+        if not Wallet.objects.filter(pk=wallet_id).exists():
+            raise Wallet.DoesNotExist(f"No existe la wallet {wallet_id}.")
+        raise FondosInsuficientes("Saldo disponible insuficiente.")
+
+    if isinstance(wallet, Wallet):
+        wallet.bloqueado += cantidad
+
+
+def desbloquear(wallet, cantidad):
+    """
+    Libera `cantidad` de lo bloqueado. Nunca deja bloqueado por debajo de 0
+    (GREATEST(bloqueado, n) - n), así un desbloqueo repetido no rompe la
+    columna sin signo.
+    """
+    cantidad = _validar_cantidad(cantidad)
+    wallet_id = _wallet_id(wallet)
+
+    Wallet.objects.filter(pk=wallet_id).update(
+        bloqueado=Greatest(F("bloqueado"), Value(cantidad)) - cantidad,
+        actualizado=timezone.now(),
+    )
+
+    if isinstance(wallet, Wallet):
+        wallet.bloqueado = max(wallet.bloqueado, cantidad) - cantidad
+
+
+def cobrar_bloqueado(wallet, cantidad, descripcion=""):
+    """
+    Cobra `cantidad` de lo que estaba bloqueado (por ejemplo, la puja ganadora
+    de una subasta): resta de saldo y de bloqueado en el mismo UPDATE y
+    registra la transacción `spend`.
+    """
+    cantidad = _validar_cantidad(cantidad)
+    wallet_id = _wallet_id(wallet)
+
+    with transaction.atomic():
+        actualizadas = Wallet.objects.filter(
+            pk=wallet_id, saldo__gte=cantidad, bloqueado__gte=cantidad
+        ).update(
+            saldo=F("saldo") - cantidad,
+            bloqueado=F("bloqueado") - cantidad,
+            actualizado=timezone.now(),
+        )
+        if not actualizadas:
+            if not Wallet.objects.filter(pk=wallet_id).exists():
+                raise Wallet.DoesNotExist(f"No existe la wallet {wallet_id}.")
+            raise FondosInsuficientes("Fondos bloqueados insuficientes.")
+
+        if isinstance(wallet, Wallet):
+            wallet.saldo -= cantidad
+            wallet.bloqueado -= cantidad
+
+        return _registrar(wallet, "spend", cantidad, descripcion)
+
+
+def resetear(wallet, descripcion="Reinicio de periodo"):
+    """
+    Deja saldo y bloqueado en 0 y registra una transacción `reset` con el
+    saldo que tenía la wallet.
+
+    El saldo anterior se lee y se usa como condición del UPDATE
+    (compare-and-swap): si otra operación lo modificó entre medio, se vuelve
+    a intentar con el valor nuevo.
+    """
+    wallet_id = _wallet_id(wallet)
+
+    with transaction.atomic():
+        for _ in range(MAX_REINTENTOS_RESET):
+            actual = Wallet.objects.filter(pk=wallet_id).values("saldo", "bloqueado").first()
+            if actual is None:
+                raise Wallet.DoesNotExist(f"No existe la wallet {wallet_id}.")
+
+            actualizadas = Wallet.objects.filter(
+                pk=wallet_id, saldo=actual["saldo"], bloqueado=actual["bloqueado"]
+            ).update(saldo=0, bloqueado=0, actualizado=timezone.now())
+            if actualizadas:
+                break
+        else:
+            raise DatabaseError(
+                f"No se pudo reiniciar la wallet {wallet_id}: modificada concurrentemente."
+            )
+
+        if isinstance(wallet, Wallet):
+            wallet.saldo = 0
+            wallet.bloqueado = 0
+
+        return _registrar(wallet, "reset", actual["saldo"], descripcion)
+
+
+def resetear_lote(wallets, descripcion="Reinicio de periodo"):
+    """
+    Versión en lote de `resetear` para un queryset de wallets (por ejemplo,
+    todas las de un periodo que se cierra). Bloquea las filas, inserta las
+    transacciones `reset` con bulk_create y pone saldo y bloqueado en 0 con
+    un único UPDATE.
+
+    Solo se registra transacción para las wallets que tenían algo. Devuelve
+    la lista de CoinTransaction creadas (cantidad = saldo anterior).
+    """
+    with transaction.atomic():
+        bloqueadas = list(wallets.select_for_update().only("id", "usuario_id", "saldo", "bloqueado"))
+        if not bloqueadas:
+            return []
+
+        transacciones = CoinTransaction.objects.bulk_create([
+            CoinTransaction(wallet=wallet, tipo="reset", cantidad=wallet.saldo, descripcion=descripcion)
+            for wallet in bloqueadas
+            if wallet.saldo or wallet.bloqueado
+        ])
+        Wallet.objects.filter(pk__in=[w.pk for w in bloqueadas]).update(
+            saldo=0, bloqueado=0, actualizado=timezone.now()
+        )
+
+    return transacciones
+
+
+def depositar_lote(movimientos):
+    """
+    Aplica varios depósitos con un solo UPDATE (CASE por wallet), inserta las
+    transacciones con bulk_create y crea las notificaciones de "monedas
+    recibidas" también en lote, ya que bulk_create no dispara post_save.
+
+    `movimientos` es una lista de tuplas (wallet, cantidad, descripcion) con
+    instancias de Wallet. Devuelve la lista de CoinTransaction creadas, en el
+    mismo orden.
+    """
+    from apps.notifications.utils import notificar_monedas_recibidas_lote
+
+    movimientos = [
+        (wallet, _validar_cantidad(cantidad), descripcion)
+        for wallet, cantidad, descripcion in movimientos
+    ]
+    if not movimientos:
+        return []
+
+    totales = {}
+    for wallet, cantidad, _ in movimientos:
+        totales[wallet.pk] = totales.get(wallet.pk, 0) + cantidad
+
+    with transaction.atomic():
+        Wallet.objects.filter(pk__in=totales).update(
+            saldo=F("saldo") + Case(
+                *[When(pk=wallet_id, then=Value(total)) for wallet_id, total in totales.items()],
+                default=Value(0),
+                output_field=PositiveIntegerField(),
+            ),
+            actualizado=timezone.now(),
+        )
+
+        transacciones = CoinTransaction.objects.bulk_create([
+            CoinTransaction(wallet=wallet, tipo="earn", cantidad=cantidad, descripcion=descripcion)
+            for wallet, cantidad, descripcion in movimientos
+        ])
+
+        # Ajustar cada instancia en memoria una sola vez con su total
+        vistas = set()
+        for wallet, _, _ in movimientos:
+            if id(wallet) not in vistas:
+                vistas.add(id(wallet))
+                wallet.saldo += totales[wallet.pk]
+
+        notificar_monedas_recibidas_lote(transacciones)
+
+    return transacciones
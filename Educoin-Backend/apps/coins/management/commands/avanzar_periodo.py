@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.coins.models import Period
+from apps.coins.rollover import RolloverError, avanzar_periodo
+
+
+class Command(BaseCommand):
+    help = (
+        "Cambia un grupo al periodo indicado: crea las wallets que falten, "
+        "reinicia las del periodo activo anterior y activa el nuevo. Con "
+        "--grupo se usa el periodo siguiente (por fecha_inicio) al activo."
+    )
+
+    def add_arguments(self, parser):
+        destino = parser.add_mutually_exclusive_group(required=True)
+        destino.add_argument("--periodo", type=int, help="Id del periodo a activar.")
+        destino.add_argument("--grupo", type=int, help="Id del grupo que pasa a su siguiente periodo.")
+        parser.add_argument(
+            "--arrastrar-saldo", action="store_true",
+            help="Depositar en la wallet nueva el saldo que tenía cada estudiante.",
+        )
+
+    def handle(self, *args, **options):
+        if options["periodo"]:
+            periodo = Period.objects.select_related("grupo").filter(pk=options["periodo"]).first()
+            if periodo is None:
+                raise CommandError(f"No existe el periodo {options['periodo']}.")
+        else:
+            periodo = self._siguiente_periodo(options["grupo"])
+
+        try:
+            resumen = avanzar_periodo(periodo, arrastrar_saldo=options["arrastrar_saldo"])
+        except RolloverError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Grupo '{periodo.grupo.nombre}': {resumen['periodo_anterior'] or '(sin periodo activo)'} -> "
+            f"{resumen['periodo_nuevo']}. {resumen['wallets_creadas']} wallets creadas, "
+            f"{resumen['wallets_reiniciadas']} reiniciadas, {resumen['saldo_arrastrado']} EC arrastrados."
+        ))
+
+    def _siguiente_periodo(self, grupo_id):
+        periodos = list(Period.objects.select_related("grupo").filter(grupo_id=grupo_id).order_by("fecha_inicio", "pk"))
+        if not periodos:
+            raise CommandError(f"El grupo {grupo_id} no tiene periodos.")
+
+        activos = [i for i, p in enumerate(periodos) if p.activo]
+        siguiente = activos[0] + 1 if activos else 0
+        if siguiente >= len(periodos):
+            raise CommandError(f"El grupo {grupo_id} ya está en su último periodo.")
+        return periodos[siguiente]
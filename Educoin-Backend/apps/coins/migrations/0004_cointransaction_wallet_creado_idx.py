@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coins', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cointransaction',
+            index=models.Index(fields=['wallet', 'creado'], name='coins_coint_wallet__5c662a_idx'),
+        ),
+    ]
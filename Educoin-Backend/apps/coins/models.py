@@ -66,23 +66,19 @@ class Wallet(BaseModel):
         return f"{self.usuario.email} ({self.grupo.nombre} - {self.periodo.nombre})"
 
     def depositar(self, cantidad, descripcion=""):
-        self.saldo += cantidad
-        self.save()
-        CoinTransaction.objects.create(wallet=self, tipo="earn", cantidad=cantidad, descripcion=descripcion)
+        """Suma coins al saldo de forma atómica (ver apps.coins.ledger)."""
+        from . import ledger
+        return ledger.depositar(self, cantidad, descripcion)
 
     def gastar(self, cantidad, descripcion=""):
-        if cantidad > self.saldo:
-            raise ValueError("Fondos insuficientes.")
-        self.saldo -= cantidad
-        self.save()
-        CoinTransaction.objects.create(wallet=self, tipo="spend", cantidad=cantidad, descripcion=descripcion)
+        """Resta coins del saldo; lanza ledger.FondosInsuficientes si no alcanza."""
+        from . import ledger
+        return ledger.gastar(self, cantidad, descripcion)
 
     def resetear(self, descripcion="Reinicio de periodo"):
-        total = self.saldo
-        self.saldo = 0
-        self.bloqueado = 0
-        self.save()
-        CoinTransaction.objects.create(wallet=self, tipo="reset", cantidad=total, descripcion=descripcion)
+        """Deja saldo y bloqueado en 0 registrando una transacción de reinicio."""
+        from . import ledger
+        return ledger.resetear(self, descripcion)
 
 
 class CoinTransaction(BaseModel):
@@ -97,5 +93,12 @@ class CoinTransaction(BaseModel):
     cantidad = models.PositiveIntegerField()
     descripcion = models.TextField(blank=True, null=True)
 
+    class Meta:
+        ordering = ['-creado']
+        indexes = [
+            # Historial paginado por wallet (keyset sobre creado, id)
+            models.Index(fields=['wallet', 'creado']),
+        ]
+
     def __str__(self):
         return f"{self.tipo} {self.cantidad} -> {self.wallet.usuario.email}"
\ No newline at end of file
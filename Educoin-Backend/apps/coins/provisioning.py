@@ -0,0 +1,38 @@
+"""
+Creación de wallets en lote.
+
+Cada estudiante necesita una wallet por (grupo, periodo). En lugar de un
+get_or_create por estudiante, las wallets que faltan se calculan con una
+sola consulta (anti-join contra las wallets existentes del periodo) y se
+insertan con un único bulk_create(ignore_conflicts=True): si otra petición
+crea la misma wallet entre medio, la restricción unique_together la descarta
+sin error.
+"""
+from django.contrib.auth import get_user_model
+
+from .models import Wallet
+
+
+def provisionar_wallets(grupo, periodo, usuarios=None):
+    """
+    Crea las wallets faltantes de `periodo` en `grupo`.
+
+    `usuarios` es una lista de ids o un queryset de usuarios; por defecto,
+    todos los estudiantes del grupo. Devuelve la cantidad de wallets que
+    faltaban (y se insertaron).
+    """
+    if usuarios is None:
+        candidatos = grupo.estudiantes.all()
+    else:
+        candidatos = get_user_model().objects.filter(pk__in=usuarios)
+
+    existentes = Wallet.objects.filter(grupo=grupo, periodo=periodo).values("usuario_id")
+    faltantes = list(candidatos.exclude(pk__in=existentes).values_list("pk", flat=True))
+    if not faltantes:
+        return 0
+
+    Wallet.objects.bulk_create(
+        [Wallet(usuario_id=usuario_id, grupo=grupo, periodo=periodo) for usuario_id in faltantes],
+        ignore_conflicts=True,
+    )
+    return len(faltantes)
@@ -0,0 +1,70 @@
+"""
+Cambio de periodo de un grupo (por ejemplo, de "Corte 1" a "Corte 2").
+
+En una sola transacción y con un número fijo de consultas:
+- se crean las wallets del periodo nuevo que falten (una por estudiante),
+- se reinician las wallets del periodo anterior con transacciones `reset`,
+- opcionalmente se arrastra el saldo anterior a la wallet nueva,
+- y se activa el periodo nuevo.
+"""
+from django.db import transaction
+
+from . import ledger
+from .models import Period, Wallet
+from .provisioning import provisionar_wallets
+
+
+class RolloverError(Exception):
+    """El cambio de periodo no se puede realizar."""
+
+
+def avanzar_periodo(periodo_nuevo, arrastrar_saldo=False):
+    """
+    Cierra el periodo activo del grupo y activa `periodo_nuevo`.
+
+    Lanza RolloverError si `periodo_nuevo` ya es el activo o si el grupo
+    tiene subastas activas con pujas (sus monedas bloqueadas se perderían
+    al reiniciar las wallets). Devuelve un resumen con lo realizado.
+    """
+    from apps.auctions.models import Auction
+
+    grupo = periodo_nuevo.grupo
+
+    with transaction.atomic():
+        anterior = Period.objects.select_for_update().filter(grupo=grupo, activo=True).first()
+        if anterior and anterior.pk == periodo_nuevo.pk:
+            raise RolloverError(f"El periodo '{periodo_nuevo.nombre}' ya es el periodo activo.")
+
+        if Auction.objects.filter(grupo=grupo, estado="active", total_pujas__gt=0).exists():
+            raise RolloverError(
+                "El grupo tiene subastas activas con pujas. Ciérralas antes de cambiar de periodo."
+            )
+
+        wallets_creadas = provisionar_wallets(grupo, periodo_nuevo)
+
+        resets = []
+        if anterior:
+            resets = ledger.resetear_lote(
+                Wallet.objects.filter(periodo=anterior),
+                descripcion=f"Cierre del periodo '{anterior.nombre}'",
+            )
+
+        saldo_arrastrado = 0
+        if arrastrar_saldo and resets:
+            saldos = {tx.wallet.usuario_id: tx.cantidad for tx in resets if tx.cantidad}
+            wallets_nuevas = Wallet.objects.filter(periodo=periodo_nuevo, usuario_id__in=saldos)
+            transacciones = ledger.depositar_lote([
+                (wallet, saldos[wallet.usuario_id], f"Saldo arrastrado del periodo '{anterior.nombre}'")
+                for wallet in wallets_nuevas
+            ])
+            saldo_arrastrado = sum(tx.cantidad for tx in transacciones)
+
+        periodo_nuevo.activar()
+
+    return {
+        "periodo_anterior": anterior.nombre if anterior else None,
+        "periodo_nuevo": periodo_nuevo.nombre,
+        "wallets_creadas": wallets_creadas,
+        "wallets_reiniciadas": len(resets),
+        "saldo_arrastrado": saldo_arrastrado,
+    }
@@ -24,7 +24,11 @@ class CoinTransactionSerializer(serializers.ModelSerializer):
 
 
 class WalletSerializer(serializers.ModelSerializer):
-    transacciones = CoinTransactionSerializer(many=True, read_only=True)
+    """
+    Resumen de la wallet, sin el historial. Las transacciones se consultan
+    paginadas en /wallets/{id}/transacciones/; con ?expand=transacciones
+    la vista precarga las más recientes y se incluyen en "transacciones".
+    """
     usuario_email = serializers.EmailField(source="usuario.email", read_only=True)
     grupo_nombre = serializers.CharField(source="grupo.nombre", read_only=True)
     periodo_nombre = serializers.CharField(source="periodo.nombre", read_only=True)
@@ -35,9 +39,51 @@ class WalletSerializer(serializers.ModelSerializer):
         fields = [
             "id", "usuario", "usuario_email", "grupo", "grupo_nombre",
             "periodo", "periodo_nombre", "saldo", "bloqueado", 
-            "saldo_disponible", "transacciones"
+            "saldo_disponible"
         ]
         read_only_fields = ["usuario"]
 
     def get_saldo_disponible(self, obj):
-        return obj.saldo - obj.bloqueado
\ No newline at end of file
+        return obj.saldo - obj.bloqueado
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if hasattr(instance, "transacciones_recientes"):
+            data["transacciones"] = CoinTransactionSerializer(instance.transacciones_recientes, many=True).data
+        return data
+
+class DepositoItemSerializer(serializers.Serializer):
+    """Un depósito dentro de un lote: por wallet o por estudiante del grupo"""
+    wallet = serializers.IntegerField(required=False)
+    estudiante = serializers.IntegerField(required=False)
+    cantidad = serializers.IntegerField(min_value=1)
+    descripcion = serializers.CharField(required=False, allow_blank=True, default="Depósito del docente")
+
+    def validate(self, data):
+        if bool(data.get("wallet")) == bool(data.get("estudiante")):
+            raise serializers.ValidationError("Indica wallet o estudiante (solo uno).")
+        return data
+
+
+class BulkDepositoSerializer(serializers.Serializer):
+    """
+    Body de POST /api/coins/wallets/bulk-depositar/
+    {
+        "grupo": 1,  # requerido si algún depósito usa "estudiante"
+        "depositos": [
+            {"wallet": 10, "cantidad": 5, "descripcion": "..."},
+            {"estudiante": 3, "cantidad": 8}
+        ]
+    }
+    """
+    MAX_DEPOSITOS = 500
+
+    grupo = serializers.IntegerField(required=False)
+    depositos = DepositoItemSerializer(many=True, allow_empty=False, max_length=MAX_DEPOSITOS)
+
+    def validate(self, data):
+        if not data.get("grupo") and any(d.get("estudiante") for d in data["depositos"]):
+            raise serializers.ValidationError(
+                {"grupo": "Es requerido para depósitos por estudiante."}
+            )
+        return data
@@ -1,12 +1,22 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
+from django.db.models import Prefetch, Q
 from .models import Period, Wallet, CoinTransaction
-from .serializers import PeriodSerializer, WalletSerializer, CoinTransactionSerializer
+from .serializers import (
+    PeriodSerializer, WalletSerializer, CoinTransactionSerializer, BulkDepositoSerializer
+)
+from . import ledger, rollover
+from .provisioning import provisionar_wallets
+from apps.common.pagination import HistorialWalletPagination, TransaccionPagination
 from apps.users.permissions import AdminOrDocente
 
+# ?expand=transacciones en wallets: cantidad por defecto y máxima
+TRANSACCIONES_EXPANDIDAS = 20
+MAX_TRANSACCIONES_EXPANDIDAS = 100
+
 
 class PeriodViewSet(viewsets.ModelViewSet):
     queryset = Period.objects.all()  # Queryset base requerido por DRF
@@ -53,18 +63,7 @@ class PeriodViewSet(viewsets.ModelViewSet):
         periodo = serializer.save()
         
         # Crear wallets para todos los estudiantes actuales del grupo
-        estudiantes = grupo.estudiantes.all()
-        wallets_creadas = 0
-        
-        for estudiante in estudiantes:
-            wallet, created = Wallet.objects.get_or_create(
-                usuario=estudiante,
-                grupo=grupo,
-                periodo=periodo,
-                defaults={'saldo': 0, 'bloqueado': 0}
-            )
-            if created:
-                wallets_creadas += 1
+        wallets_creadas = provisionar_wallets(grupo, periodo)
         
         # Log de cuántas wallets se crearon
         print(f"✅ Periodo '{periodo.nombre}' creado. {wallets_creadas} wallets generadas.")
@@ -91,6 +90,36 @@ class PeriodViewSet(viewsets.ModelViewSet):
             "periodo": serializer.data
         }, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['post'], permission_classes=[AdminOrDocente])
+    def rollover(self, request, pk=None):
+        """
+        Cambia el grupo a este periodo: crea las wallets que falten, reinicia
+        las del periodo activo anterior y activa este periodo.
+        POST /api/coins/periods/{id}/rollover/
+        Body opcional: {"arrastrar_saldo": true} para pasar el saldo anterior.
+        """
+        periodo = self.get_object()
+
+        if request.user.role == 'docente':
+            if periodo.grupo.classroom.docente != request.user:
+                raise PermissionDenied("No tienes permiso para cambiar el periodo de este grupo.")
+
+        arrastrar_saldo = serializers.BooleanField().to_internal_value(
+            request.data.get("arrastrar_saldo", False)
+        )
+
+        try:
+            resumen = rollover.avanzar_periodo(periodo, arrastrar_saldo=arrastrar_saldo)
+        except rollover.RolloverError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(periodo)
+        return Response({
+            "mensaje": f"Periodo '{periodo.nombre}' activado correctamente.",
+            "periodo": serializer.data,
+            **resumen
+        }, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def mis_periodos(self, request):
         """
@@ -121,8 +150,27 @@ class WalletViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.role == "estudiante":
-            return Wallet.objects.filter(usuario=user)
-        return super().get_queryset()
+            return self._expandir_transacciones(Wallet.objects.filter(usuario=user))
+        return self._expandir_transacciones(super().get_queryset())
+
+    def _expandir_transacciones(self, queryset):
+        """
+        Con ?expand=transacciones precarga las `limit` transacciones más
+        recientes de cada wallet (por defecto 20, máximo 100) en una sola
+        consulta extra.
+        """
+        if "transacciones" not in self.request.query_params.get("expand", "").split(","):
+            return queryset
+        try:
+            limite = int(self.request.query_params.get("limit", TRANSACCIONES_EXPANDIDAS))
+        except ValueError:
+            limite = TRANSACCIONES_EXPANDIDAS
+        limite = max(1, min(limite, MAX_TRANSACCIONES_EXPANDIDAS))
+
+        recientes = CoinTransaction.objects.order_by("-creado", "-id")[:limite]
+        return queryset.prefetch_related(
+            Prefetch("transacciones", queryset=recientes, to_attr="transacciones_recientes")
+        )
 
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
     def mi_wallet(self, request):
@@ -138,10 +186,10 @@ class WalletViewSet(viewsets.ModelViewSet):
         
         try:
             # Buscar wallet del periodo activo
-            wallet = Wallet.objects.filter(
+            wallet = self._expandir_transacciones(Wallet.objects.filter(
                 usuario=user,
                 periodo__activo=True
-            ).select_related("usuario", "grupo", "periodo").first()
+            ).select_related("usuario", "grupo", "periodo")).first()
             
             if not wallet:
                 return Response(
@@ -175,9 +223,96 @@ class WalletViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+    @action(detail=True, methods=["get"], permission_classes=[permissions.IsAuthenticated])
+    def transacciones(self, request, pk=None):
+        """
+        Historial de la wallet, paginado por cursor (del más reciente al más antiguo).
+        GET /api/coins/wallets/{id}/transacciones/?page_size=50&cursor=...
+        """
+        wallet = self.get_object()
+        paginator = HistorialWalletPagination()
+        pagina = paginator.paginate_queryset(
+            CoinTransaction.objects.filter(wallet=wallet), request, view=self
+        )
+        serializer = CoinTransactionSerializer(pagina, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["post"], url_path="bulk-depositar", permission_classes=[AdminOrDocente])
+    def bulk_depositar(self, request):
+        """
+        Deposita monedas a varias wallets en una sola petición.
+        POST /api/coins/wallets/bulk-depositar/
+        Las wallets se resuelven con una consulta y los saldos se actualizan
+        con un único UPDATE; las filas inválidas se reportan sin abortar el resto.
+        """
+        serializer = BulkDepositoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        grupo_id = serializer.validated_data.get("grupo")
+        depositos = serializer.validated_data["depositos"]
+        user = request.user
+
+        # Resolver todas las wallets de una vez (por id o por estudiante del periodo activo)
+        wallet_ids = {d["wallet"] for d in depositos if d.get("wallet")}
+        estudiante_ids = {d["estudiante"] for d in depositos if d.get("estudiante")}
+
+        filtro = Q(id__in=wallet_ids)
+        if estudiante_ids:
+            filtro |= Q(grupo_id=grupo_id, periodo__activo=True, usuario_id__in=estudiante_ids)
+
+        wallets = Wallet.objects.filter(filtro).select_related("usuario", "grupo__classroom", "periodo")
+        if user.role == "docente":
+            wallets = wallets.filter(grupo__classroom__docente=user)
+
+        por_id = {}
+        por_estudiante = {}
+        for wallet in wallets:
+            por_id[wallet.id] = wallet
+            # Las pedidas por id pueden ser de un periodo cerrado: por estudiante solo vale el activo
+            if wallet.grupo_id == grupo_id and wallet.periodo.activo:
+                por_estudiante[wallet.usuario_id] = wallet
+
+        movimientos = []
+        errores = []
+        for indice, deposito in enumerate(depositos):
+            if deposito.get("wallet"):
+                wallet = por_id.get(deposito["wallet"])
+            else:
+                wallet = por_estudiante.get(deposito["estudiante"])
+
+            if wallet is None:
+                errores.append({
+                    "indice": indice,
+                    "wallet": deposito.get("wallet"),
+                    "estudiante": deposito.get("estudiante"),
+                    "errores": "Wallet no encontrada o sin permiso para depositar en ella."
+                })
+                continue
+            movimientos.append((indice, wallet, deposito["cantidad"], deposito["descripcion"]))
+
+        transacciones = ledger.depositar_lote([(w, c, d) for _, w, c, d in movimientos])
+
+        depositados = [
+            {
+                "indice": indice,
+                "wallet": wallet.id,
+                "estudiante": wallet.usuario_id,
+                "cantidad": cantidad,
+                "saldo": wallet.saldo,
+            }
+            for (indice, wallet, cantidad, _) in movimientos
+        ]
+
+        return Response({
+            "depositados": len(transacciones),
+            "errores": len(errores),
+            "detalles_depositos": depositados,
+            "detalles_errores": errores
+        }, status=status.HTTP_200_OK if depositados else status.HTTP_400_BAD_REQUEST)
+
 class CoinTransactionViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = CoinTransaction.objects.all().select_related("wallet", "wallet__usuario")
     serializer_class = CoinTransactionSerializer
+    pagination_class = TransaccionPagination
     
     def get_queryset(self):
         user = self.request.user
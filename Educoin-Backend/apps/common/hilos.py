@@ -0,0 +1,28 @@
+"""
+Tareas cortas fuera del hilo de la petición, para el modo sin worker de las
+colas (outbox): la respuesta no espera a la tarea.
+
+El hilo es daemon: si el proceso termina antes, la fila sigue en la cola y
+la toma el worker cuando corra.
+"""
+import logging
+import threading
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+def en_segundo_plano(funcion, *args, **kwargs):
+    """Ejecuta `funcion` en un hilo aparte y cierra su conexión a la base al terminar."""
+    def ejecutar():
+        try:
+            funcion(*args, **kwargs)
+        except Exception:
+            logger.exception(f"Error en la tarea en segundo plano {funcion.__name__}")
+        finally:
+            connection.close()
+
+    hilo = threading.Thread(target=ejecutar, daemon=True)
+    hilo.start()
+    return hilo
@@ -0,0 +1,120 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CreadoCursorPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (creado, id), del más reciente al
+    más antiguo.
+
+    Cada página filtra con `creado < c OR (creado = c AND id < i)` a partir
+    del último elemento de la anterior, así el costo no crece con la página
+    pedida (a diferencia de OFFSET) y los registros nuevos no desplazan las
+    páginas siguientes. Requiere un índice que empiece por las columnas de
+    filtro de la vista y termine en `creado`.
+
+    Parámetros: ?page_size=n (tope en max_page_size) y ?cursor=<valor de next>.
+
+    Compatibilidad: para clientes que esperan la lista simple de antes, con
+    ?paginacion=lista no se pagina: la vista devuelve la lista completa con
+    su orden original. API_LISTAS_PLANAS = True en settings (por defecto
+    False) lo aplica a todos los listados salvo ?paginacion=cursor. Las subclases con `listas_planas = False`
+    siempre paginan por cursor.
+    """
+    page_size = 100
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    modo_query_param = "paginacion"
+    invalid_cursor_message = "Cursor inválido."
+    listas_planas = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.listas_planas and self.usar_lista_plana(request):
+            # None: la vista responde sin paginar, como antes del cursor
+            return None
+        limite = self.get_page_size(request)
+        posicion = self.decode_cursor(request)
+
+        queryset = queryset.order_by("-creado", "-id")
+        if posicion:
+            creado, pk = posicion
+            queryset = queryset.filter(Q(creado__lt=creado) | Q(creado=creado, id__lt=pk))
+
+        resultados = list(queryset[:limite + 1])
+        self.has_next = len(resultados) > limite
+        resultados = resultados[:limite]
+        self.siguiente = (resultados[-1].creado, resultados[-1].pk) if self.has_next else None
+        return resultados
+
+    def usar_lista_plana(self, request):
+        modo = request.query_params.get(self.modo_query_param)
+        if modo in ("lista", "cursor"):
+            return modo == "lista"
+        return getattr(settings, "API_LISTAS_PLANAS", False)
+
+    def get_page_size(self, request):
+        try:
+            limite = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(limite, self.max_page_size))
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            creado, pk = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split("|")
+            return datetime.fromisoformat(creado), int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, creado, pk):
+        return base64.urlsafe_b64encode(f"{creado.isoformat()}|{pk}".encode("ascii")).decode("ascii")
+
+    def get_next_link(self):
+        if not self.siguiente:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(*self.siguiente))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class TransaccionPagination(CreadoCursorPagination):
+    page_size = 50
+    max_page_size = 200
+
+
+class HistorialWalletPagination(TransaccionPagination):
+    # El historial de la wallet ya se paginaba por cursor antes del modo de compatibilidad
+    listas_planas = False
+
+
+class NotificacionPagination(CreadoCursorPagination):
+    page_size = 20
+    max_page_size = 100
@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Habilita `?format=csv` en una acción. Las vistas devuelven su propio
+    StreamingHttpResponse con el CSV; este renderer solo se usa para las
+    respuestas normales de DRF (por ejemplo errores 403/404), que se
+    escriben como una fila de encabezados y una de valores.
+    """
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not isinstance(data, dict):
+            data = {"detail": data}
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data.keys())
+        writer.writerow(data.values())
+        return buffer.getvalue().encode(self.charset)
+
+
+class ArchivoRenderer(BaseRenderer):
+    """
+    Para acciones que devuelven un archivo (FileResponse o
+    StreamingHttpResponse propios): acepta cualquier Accept, p. ej.
+    application/pdf o application/zip, en lugar de responder 406. Las
+    respuestas normales de DRF (errores 403/404) se escriben como JSON.
+    """
+    media_type = "*/*"
+    format = "archivo"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = "application/json"
+        if data is None:
+            return b""
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
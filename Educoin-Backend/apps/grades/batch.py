@@ -0,0 +1,126 @@
+"""
+Calificación en lote de una actividad.
+
+Equivale a crear cada Grade por separado (con las señales asignar_educoins y
+notificar_calificacion), pero con un número fijo de consultas sin importar el
+tamaño del grupo: las validaciones se resuelven contra conjuntos precargados,
+las notas se insertan con bulk_create y las recompensas se depositan con un
+único UPDATE a través de apps.coins.ledger.
+"""
+from django.db import transaction
+
+from apps.coins import ledger
+from apps.coins.models import Period, Wallet
+from apps.notifications.utils import notificar_calificaciones_lote
+from .models import Grade
+from .serializers import GradeLoteItemSerializer
+
+
+def calificar_lote(activity, calificaciones):
+    """
+    Crea las calificaciones de `activity` y asigna sus Educoins.
+
+    `calificaciones` es la lista recibida en el body:
+    [{"student": 1, "nota": 85, "retroalimentacion": "..."}, ...]
+
+    Devuelve (grades_creadas, errores), donde errores sigue el formato
+    [{"student": id, "errores": {...}}] usado por calificar_multiple.
+    """
+    grupo = activity.group
+    estudiantes_grupo = set(grupo.estudiantes.values_list("id", flat=True))
+
+    validas = []
+    errores = []
+    for indice, cal in enumerate(calificaciones):
+        serializer = GradeLoteItemSerializer(data=cal)
+        if not serializer.is_valid():
+            errores.append((indice, {"student": cal.get("student"), "errores": serializer.errors}))
+            continue
+        validas.append((indice, serializer.validated_data))
+
+    ya_calificados = set(
+        Grade.objects.filter(
+            activity=activity, student_id__in=[data["student"] for _, data in validas]
+        ).values_list("student_id", flat=True)
+    )
+
+    nuevas = []
+    vistos = set()
+    for indice, data in validas:
+        student_id = data["student"]
+        if student_id not in estudiantes_grupo:
+            error = "El estudiante no pertenece al grupo de esta actividad."
+        elif student_id in ya_calificados or student_id in vistos:
+            error = "Ya existe una calificación para este estudiante en esta actividad."
+        else:
+            error = None
+
+        if error:
+            errores.append((indice, {"student": student_id, "errores": {"non_field_errors": [error]}}))
+            continue
+
+        vistos.add(student_id)
+        nuevas.append(Grade(
+            activity=activity,
+            student_id=student_id,
+            nota=data["nota"],
+            retroalimentacion=data.get("retroalimentacion"),
+        ))
+
+    # Reportar los errores en el mismo orden en que llegaron las calificaciones
+    errores = [error for _, error in sorted(errores, key=lambda e: e[0])]
+
+    if not nuevas:
+        return [], errores
+
+    with transaction.atomic():
+        grades = Grade.objects.bulk_create(nuevas)
+
+        # MySQL no devuelve los ids en bulk_create; recuperarlos en una consulta
+        if any(g.pk is None for g in grades):
+            ids = dict(
+                Grade.objects.filter(
+                    activity=activity, student_id__in=vistos
+                ).values_list("student_id", "id")
+            )
+            for grade in grades:
+                grade.pk = ids[grade.student_id]
+
+        _aplicar_recompensas(activity, grades)
+        notificar_calificaciones_lote(grades)
+
+    return grades, errores
+
+
+def _aplicar_recompensas(activity, grades):
+    """Deposita en lote los Educoins ganados en las wallets del periodo activo."""
+    periodo_actual = Period.objects.filter(grupo=activity.group, activo=True).first()
+    if not periodo_actual:
+        print(f"No hay periodo activo para el grupo {activity.group}")
+        return
+
+    wallets = {
+        w.usuario_id: w
+        for w in Wallet.objects.filter(
+            grupo=activity.group,
+            periodo=periodo_actual,
+            usuario_id__in=[g.student_id for g in grades],
+        )
+    }
+
+    movimientos = []
+    for grade in grades:
+        coins = grade.calcular_coins_ganados()
+        wallet = wallets.get(grade.student_id)
+        if coins <= 0:
+            continue
+        if wallet is None:
+            print(f"ERROR: No se encontro wallet para el estudiante {grade.student_id} en grupo {activity.group.nombre}")
+            continue
+        movimientos.append((
+            wallet,
+            coins,
+            f"Recompensa por '{activity.nombre}' (nota {grade.nota}/{activity.valor_notas})",
+        ))
+
+    ledger.depositar_lote(movimientos)
@@ -2,6 +2,12 @@ from rest_framework import serializers
 from .models import Grade
 
 
+def validar_rango_nota(value):
+    if value < 0 or value > 100:
+        raise serializers.ValidationError("La nota debe estar entre 0 y 100.")
+    return value
+
+
 class GradeSerializer(serializers.ModelSerializer):
     student_email = serializers.EmailField(source="student.email", read_only=True)
     student_name = serializers.SerializerMethodField()
@@ -31,9 +37,7 @@ class GradeCreateSerializer(serializers.ModelSerializer):
         fields = ["activity", "student", "nota", "retroalimentacion"]
 
     def validate_nota(self, value):
-        if value < 0 or value > 100:
-            raise serializers.ValidationError("La nota debe estar entre 0 y 100.")
-        return value
+        return validar_rango_nota(value)
 
     def validate(self, data):
         # Verificar que el estudiante pertenezca al grupo de la actividad
@@ -46,4 +50,17 @@ class GradeCreateSerializer(serializers.ModelSerializer):
                     "El estudiante no pertenece al grupo de esta actividad."
                 )
         
-        return data
\ No newline at end of file
+        return data
+
+
+class GradeLoteItemSerializer(serializers.Serializer):
+    """
+    Una calificación dentro de calificar-multiple. No resuelve el estudiante
+    contra la base de datos: la pertenencia al grupo se valida en lote.
+    """
+    student = serializers.IntegerField()
+    nota = serializers.DecimalField(max_digits=5, decimal_places=2)
+    retroalimentacion = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate_nota(self, value):
+        return validar_rango_nota(value)
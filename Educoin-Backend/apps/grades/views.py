@@ -1,13 +1,18 @@
+import csv
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django.db import models
+from django.http import StreamingHttpResponse
 from apps.groups.models import Group
 from apps.coins.models import Wallet
 from apps.activities.models import Activity
 from apps.users.permissions import AdminOrDocente
+from apps.common.renderers import CSVRenderer, Echo
 from .models import Grade
 from .serializers import GradeSerializer, GradeCreateSerializer
+from .batch import calificar_lote
 
 
 class GradeViewSet(viewsets.ModelViewSet):
@@ -67,15 +72,18 @@ class GradeViewSet(viewsets.ModelViewSet):
             "calificaciones": serializer.data
         })
 
-    @action(detail=False, methods=["get"], url_path="grupo/(?P<group_id>[^/.]+)/reporte", 
-            permission_classes=[AdminOrDocente])
+    @action(detail=False, methods=["get"], url_path="grupo/(?P<group_id>[^/.]+)/reporte",
+            permission_classes=[AdminOrDocente],
+            renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [CSVRenderer])
     def group_report(self, request, group_id=None):
         """
         Genera un reporte completo de notas y educoins por grupo.
         Solo accesible por docentes.
+        Con ?format=csv devuelve el mismo reporte como CSV en streaming
+        (una fila por calificación).
         """
         try:
-            group = Group.objects.get(pk=group_id)
+            group = Group.objects.select_related("classroom").get(pk=group_id)
         except Group.DoesNotExist:
             return Response(
                 {"detail": "Grupo no encontrado."},
@@ -84,51 +92,29 @@ class GradeViewSet(viewsets.ModelViewSet):
 
         # Verificar que el docente tenga acceso a este grupo
         if request.user.role == "docente":
-            if not group.classroom or group.classroom.docente != request.user:
+            if not group.classroom or group.classroom.docente_id != request.user.id:
                 return Response(
                     {"detail": "No tienes permiso para ver este grupo."},
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-        estudiantes = group.estudiantes.all()
-        data = []
+        estudiantes = self._estudiantes_reporte(group)
 
-        for est in estudiantes:
-            grades = Grade.objects.filter(
-                student=est,
-                activity__group=group
-            ).select_related("activity")
-
-            promedio = grades.aggregate(models.Avg("nota"))["nota__avg"] or 0
-
-            wallet = Wallet.objects.filter(
-                usuario=est,
-                grupo=group,
-                periodo__activo=True
-            ).first()
-            
-            saldo = wallet.saldo if wallet else 0
-
-            detalles = [
-                {
-                    "activity_id": g.activity.id,
-                    "activity": g.activity.nombre,
-                    "nota": float(g.nota),
-                    "educoins_ganados": g.calcular_coins_ganados(),
-                    "fecha": g.creado.isoformat() if g.creado else None,
-                }
-                for g in grades
-            ]
+        if request.accepted_renderer.format == "csv":
+            response = StreamingHttpResponse(
+                self._filas_csv_reporte(estudiantes.iterator(chunk_size=200)),
+                content_type="text/csv; charset=utf-8",
+            )
+            response["Content-Disposition"] = f'attachment; filename="reporte_grupo_{group.id}.csv"'
+            return response
 
-            data.append({
-                "student_id": est.id,
-                "student_name": f"{est.first_name} {est.last_name}",
-                "student_email": est.email,
-                "promedio_nota": round(promedio, 2),
-                "total_educoins": saldo,
-                "total_actividades": grades.count(),
-                "detalles": detalles,
-            })
+        data = [
+            {
+                **self._resumen_estudiante(est),
+                "detalles": [self._detalle_grade(g) for g in est.grades_grupo],
+            }
+            for est in estudiantes
+        ]
 
         return Response({
             "grupo_id": group.id,
@@ -137,6 +123,71 @@ class GradeViewSet(viewsets.ModelViewSet):
             "estudiantes": data
         })
 
+    @staticmethod
+    def _estudiantes_reporte(group):
+        """
+        Estudiantes del grupo con promedio, total de actividades y saldo de la
+        wallet activa anotados en SQL, más sus notas del grupo precargadas.
+        Se ejecuta en dos consultas sin importar el tamaño del grupo.
+        """
+        del_grupo = models.Q(grades__activity__group=group)
+        saldo_activo = Wallet.objects.filter(
+            usuario=models.OuterRef("pk"),
+            grupo=group,
+            periodo__activo=True
+        ).values("saldo")[:1]
+
+        return group.estudiantes.annotate(
+            promedio_nota=models.Avg("grades__nota", filter=del_grupo),
+            total_actividades=models.Count("grades", filter=del_grupo),
+            saldo_activo=models.Subquery(saldo_activo),
+        ).prefetch_related(
+            models.Prefetch(
+                "grades",
+                queryset=Grade.objects.filter(activity__group=group).select_related("activity"),
+                to_attr="grades_grupo",
+            )
+        )
+
+    @staticmethod
+    def _resumen_estudiante(est):
+        return {
+            "student_id": est.id,
+            "student_name": f"{est.first_name} {est.last_name}",
+            "student_email": est.email,
+            "promedio_nota": round(est.promedio_nota or 0, 2),
+            "total_educoins": est.saldo_activo or 0,
+            "total_actividades": est.total_actividades,
+        }
+
+    @staticmethod
+    def _detalle_grade(g):
+        return {
+            "activity_id": g.activity.id,
+            "activity": g.activity.nombre,
+            "nota": float(g.nota),
+            "educoins_ganados": g.calcular_coins_ganados(),
+            "fecha": g.creado.isoformat() if g.creado else None,
+        }
+
+    REPORTE_CSV_COLUMNAS = [
+        "student_id", "student_name", "student_email", "promedio_nota",
+        "total_educoins", "total_actividades",
+        "activity_id", "activity", "nota", "educoins_ganados", "fecha",
+    ]
+
+    @classmethod
+    def _filas_csv_reporte(cls, estudiantes):
+        """Genera el CSV línea por línea; los estudiantes sin notas ocupan una fila."""
+        writer = csv.writer(Echo())
+        yield writer.writerow(cls.REPORTE_CSV_COLUMNAS)
+        for est in estudiantes:
+            resumen = cls._resumen_estudiante(est)
+            detalles = [cls._detalle_grade(g) for g in est.grades_grupo] or [{}]
+            for detalle in detalles:
+                fila = {**resumen, **detalle}
+                yield writer.writerow([fila.get(col, "") for col in cls.REPORTE_CSV_COLUMNAS])
+
     @action(detail=False, methods=["post"], url_path="calificar-multiple",
             permission_classes=[AdminOrDocente])
     def calificar_multiple(self, request):
@@ -160,28 +211,15 @@ class GradeViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            activity = Activity.objects.get(pk=activity_id)
+            activity = Activity.objects.select_related("group").get(pk=activity_id)
         except Activity.DoesNotExist:
             return Response(
                 {"detail": "Actividad no encontrada."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        creadas = []
-        errores = []
-
-        for cal in calificaciones:
-            cal['activity'] = activity_id
-            serializer = GradeCreateSerializer(data=cal)
-            
-            if serializer.is_valid():
-                serializer.save()
-                creadas.append(serializer.data)
-            else:
-                errores.append({
-                    "student": cal.get('student'),
-                    "errores": serializer.errors
-                })
+        grades, errores = calificar_lote(activity, calificaciones)
+        creadas = GradeCreateSerializer(grades, many=True).data
 
         return Response({
             "creadas": len(creadas),
@@ -6,7 +6,8 @@ from django.utils import timezone
 from django.db import transaction
 from .models import Group
 from .serializers import GroupSerializer, GroupJoinSerializer
-from apps.coins.models import Wallet, Period
+from apps.coins.models import Period
+from apps.coins.provisioning import provisionar_wallets
 from apps.users.permissions import IsDocente
 
 class GroupViewSet(viewsets.ModelViewSet):
@@ -69,13 +70,7 @@ class GroupViewSet(viewsets.ModelViewSet):
             wallet_creada = False
             
             if periodo_activo:
-                wallet, created = Wallet.objects.get_or_create(
-                    usuario=user,
-                    grupo=group,
-                    periodo=periodo_activo,
-                    defaults={'saldo': 0, 'bloqueado': 0}
-                )
-                wallet_creada = created
+                wallet_creada = provisionar_wallets(group, periodo_activo, usuarios=[user.pk]) > 0
                 print(f"Wallet creada: {wallet_creada} para {user.email} en grupo {group.nombre}")
             else:
                 print(f"No hay periodo activo para el grupo {group.nombre}")
@@ -114,13 +109,7 @@ class GroupViewSet(viewsets.ModelViewSet):
             wallet_creada = False
             
             if periodo_activo:
-                wallet, created = Wallet.objects.get_or_create(
-                    usuario=user,
-                    grupo=group,
-                    periodo=periodo_activo,
-                    defaults={'saldo': 0, 'bloqueado': 0}
-                )
-                wallet_creada = created
+                wallet_creada = provisionar_wallets(group, periodo_activo, usuarios=[user.pk]) > 0
                 print(f"Wallet creada: {wallet_creada} para {user.email} en grupo {group.nombre}")
             else:
                 print(f"No hay periodo activo para el grupo {group.nombre}")
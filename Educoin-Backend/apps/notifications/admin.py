@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationCounter, NotificationOutbox
+from .stats import resumir_notificaciones
 
 
 @admin.register(Notification)
@@ -9,6 +10,38 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ['usuario__email', 'titulo', 'mensaje']
     readonly_fields = ['creado', 'actualizado']
     list_per_page = 50
+    actions = ['ver_estadisticas']
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('usuario')
\ No newline at end of file
+        return super().get_queryset(request).select_related('usuario')
+
+    @admin.action(description='Ver estadísticas de las notificaciones seleccionadas')
+    def ver_estadisticas(self, request, queryset):
+        resumen = resumir_notificaciones(queryset)
+        por_tipo = ', '.join(f'{tipo}: {n}' for tipo, n in resumen['por_tipo'].items() if n)
+        self.message_user(
+            request,
+            f"{resumen['total']} notificaciones ({resumen['no_leidas']} no leídas, "
+            f"{resumen['leidas']} leídas). Por tipo: {por_tipo or '-'}"
+        )
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'tipo', 'total', 'no_leidas']
+    list_filter = ['tipo']
+    search_fields = ['usuario__email']
+    readonly_fields = ['usuario', 'tipo', 'total', 'no_leidas']
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'estado', 'grupo_id', 'intentos', 'creado', 'procesada_en']
+    list_filter = ['estado']
+    readonly_fields = ['plantilla', 'items', 'grupo_id', 'intentos', 'ultimo_error', 'procesada_en', 'creado', 'actualizado']
+    actions = ['reintentar']
+
+    @admin.action(description='Reintentar las filas seleccionadas')
+    def reintentar(self, request, queryset):
+        count = queryset.exclude(estado='procesada').update(estado='pendiente', intentos=0)
+        self.message_user(request, f'{count} filas vuelven a la cola')
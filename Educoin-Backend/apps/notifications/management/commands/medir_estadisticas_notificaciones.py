@@ -0,0 +1,73 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.notifications.models import Notification, NotificationCounter
+from apps.notifications.stats import resumir_notificaciones
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el cálculo de estadísticas con un COUNT por tipo (versión "
+        "anterior) contra resumir_notificaciones (un solo GROUP BY), sobre un "
+        "usuario temporal con N notificaciones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--notificaciones", type=int, default=10000)
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument(
+            "--conservar", action="store_true",
+            help="No borrar el usuario ni las notificaciones al terminar.",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        sufijo = uuid.uuid4().hex[:8]
+        usuario = User.objects.create_user(
+            username=f"bench_notif_{sufijo}", email=f"bench_notif_{sufijo}@example.com",
+            password=None, role="estudiante",
+        )
+        tipos = [tipo for tipo, _ in Notification.TIPO_CHOICES]
+        Notification.objects.bulk_create([
+            Notification(usuario=usuario, tipo=tipos[i % len(tipos)], titulo="bench",
+                         mensaje="bench", leida=i % 3 == 0)
+            for i in range(options["notificaciones"])
+        ], batch_size=1000)
+
+        try:
+            qs = Notification.objects.filter(usuario=usuario)
+            anterior = self._medir(lambda: self._por_tipo(qs), options["repeticiones"])
+            agrupado = self._medir(lambda: resumir_notificaciones(qs), options["repeticiones"])
+            if anterior[2] != agrupado[2]:
+                self.stderr.write(self.style.ERROR("Los resultados no coinciden."))
+
+            for nombre, (consultas, segundos, _) in (("COUNT por tipo", anterior), ("GROUP BY", agrupado)):
+                self.stdout.write(f"{nombre:>15}: {consultas} consultas, {segundos * 1000:.1f} ms")
+        finally:
+            if not options["conservar"]:
+                Notification.objects.filter(usuario=usuario).delete()
+                NotificationCounter.objects.filter(usuario=usuario).delete()
+                usuario.delete()
+
+    def _por_tipo(self, qs):
+        total = qs.count()
+        no_leidas = qs.filter(leida=False).count()
+        return {
+            'total': total,
+            'no_leidas': no_leidas,
+            'leidas': total - no_leidas,
+            'por_tipo': {tipo: qs.filter(tipo=tipo).count() for tipo, _ in Notification.TIPO_CHOICES},
+        }
+
+    def _medir(self, funcion, repeticiones):
+        with CaptureQueriesContext(connection) as ctx:
+            resultado = funcion()
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        return len(ctx.captured_queries), (time.perf_counter() - inicio) / repeticiones, resultado
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.notifications.outbox import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea las notificaciones encoladas en NotificationOutbox (calificaciones, "
+        "monedas, subastas) con bulk_create en bloques. Con --intervalo queda "
+        "corriendo y revisa la cola cada N segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo", type=float, default=0,
+            help="Segundos de espera cuando la cola está vacía. 0 (por defecto) vacía la cola una vez y termina.",
+        )
+        parser.add_argument(
+            "--lote", type=int, default=100,
+            help="Filas de la cola tomadas por transacción (por defecto 100).",
+        )
+        parser.add_argument(
+            "--chunk", type=int, default=500,
+            help="Notificaciones por INSERT (por defecto 500).",
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options["intervalo"]
+        try:
+            while True:
+                close_old_connections()
+                vacia = self._vaciar(options["lote"], options["chunk"])
+                if intervalo <= 0:
+                    break
+                if vacia:
+                    time.sleep(intervalo)
+        except KeyboardInterrupt:
+            self.stdout.write("Detenido.")
+
+    def _vaciar(self, lote, chunk):
+        """Procesa lotes hasta vaciar la cola. True si no había nada pendiente."""
+        total_filas = total_notificaciones = 0
+        while True:
+            filas, notificaciones, errores = procesar_pendientes(lote=lote, chunk=chunk)
+            if errores:
+                self.stderr.write(f"{errores} filas de la cola fallaron; se reintentarán.")
+            total_filas += filas
+            total_notificaciones += notificaciones
+            if filas < lote:
+                break
+        if total_filas:
+            self.stdout.write(self.style.SUCCESS(
+                f"{total_notificaciones} notificaciones creadas desde {total_filas} filas de la cola."
+            ))
+        return total_filas == 0
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.models import NotificationCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye NotificationCounter a partir de la tabla de notificaciones "
+        "(por ejemplo, tras cargar datos o borrar notificaciones con SQL directo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--usuario", type=int, action="append", dest="usuarios",
+            help="Id de usuario a recalcular (se puede repetir). Por defecto, todos.",
+        )
+
+    def handle(self, *args, **options):
+        filas = NotificationCounter.reconstruir(usuarios=options["usuarios"])
+        self.stdout.write(self.style.SUCCESS(f"{filas} contadores recalculados."))
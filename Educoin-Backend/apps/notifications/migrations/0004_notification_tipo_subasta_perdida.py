@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_alter_notification_tipo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='tipo',
+            field=models.CharField(choices=[('actividad', 'Nueva Actividad'), ('calificacion', 'Calificación Recibida'), ('monedas', 'Monedas Recibidas'), ('subasta_nueva', 'Nueva Subasta'), ('subasta_ganada', 'Subasta Ganada'), ('subasta_perdida', 'Subasta Perdida'), ('anuncio', 'Anuncio'), ('general', 'General'), ('email_verificado', 'Email Verificado'), ('password_changed', 'Contraseña Cambiada'), ('password_reset', 'Contraseña Restablecida'), ('login_failed', 'Intento de Login Fallido'), ('account_security', 'Alerta de Seguridad')], max_length=20),
+        ),
+    ]
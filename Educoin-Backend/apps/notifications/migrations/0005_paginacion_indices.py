@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_tipo_subasta_perdida'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['usuario', 'creado'], name='notificatio_usuario_88523e_idx'),
+        ),
+    ]
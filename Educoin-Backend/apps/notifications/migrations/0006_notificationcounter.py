@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def calcular_contadores(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationCounter = apps.get_model('notifications', 'NotificationCounter')
+
+    filas = (
+        Notification.objects.order_by()
+        .values('usuario_id', 'tipo')
+        .annotate(total=Count('id'), no_leidas=Count('id', filter=Q(leida=False)))
+    )
+    NotificationCounter.objects.bulk_create(
+        (NotificationCounter(**fila) for fila in filas.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_paginacion_indices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('actividad', 'Nueva Actividad'), ('calificacion', 'Calificación Recibida'), ('monedas', 'Monedas Recibidas'), ('subasta_nueva', 'Nueva Subasta'), ('subasta_ganada', 'Subasta Ganada'), ('subasta_perdida', 'Subasta Perdida'), ('anuncio', 'Anuncio'), ('general', 'General'), ('email_verificado', 'Email Verificado'), ('password_changed', 'Contraseña Cambiada'), ('password_reset', 'Contraseña Restablecida'), ('login_failed', 'Intento de Login Fallido'), ('account_security', 'Alerta de Seguridad')], max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('no_leidas', models.PositiveIntegerField(default=0)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_notificaciones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Contador de notificaciones',
+                'verbose_name_plural': 'Contadores de notificaciones',
+                'unique_together': {('usuario', 'tipo')},
+            },
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notificationcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('plantilla', models.JSONField(default=dict)),
+                ('items', models.JSONField(blank=True, default=list)),
+                ('grupo_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesada', 'Procesada'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('procesada_en', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Notificación en cola',
+                'verbose_name_plural': 'Notificaciones en cola',
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['estado', 'id'], name='notificatio_estado_08dc76_idx')],
+            },
+        ),
+    ]
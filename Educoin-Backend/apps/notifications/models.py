@@ -1,9 +1,68 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
 from django.conf import settings
+from django.dispatch import Signal
 from apps.common.models import BaseModel
 
 User = settings.AUTH_USER_MODEL
 
+# bulk_create no envía post_save: esta señal avisa de las altas masivas
+# (argumento `notificaciones`) para que el stream en vivo las publique.
+notificaciones_creadas = Signal()
+
+
+def _deltas(filas):
+    """
+    Agrupa filas (usuario_id, tipo, leida, cantidad) en deltas
+    {(usuario_id, tipo): (total, no_leidas)} para NotificationCounter.aplicar.
+    La cantidad es negativa para las bajas.
+    """
+    deltas = {}
+    for usuario_id, tipo, leida, cantidad in filas:
+        total, no_leidas = deltas.get((usuario_id, tipo), (0, 0))
+        deltas[(usuario_id, tipo)] = (total + cantidad, no_leidas + (0 if leida else cantidad))
+    return deltas
+
+
+class NotificationQuerySet(models.QuerySet):
+    """
+    Las operaciones masivas mantienen NotificationCounter en la misma
+    transacción (bulk_create y update no pasan por save()).
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic():
+            creadas = super().bulk_create(objs, *args, **kwargs)
+            NotificationCounter.aplicar(_deltas(
+                (n.usuario_id, n.tipo, n.leida, 1) for n in creadas
+            ))
+            notificaciones_creadas.send(sender=self.model, notificaciones=creadas)
+        return creadas
+
+    def delete(self):
+        with transaction.atomic():
+            filas = self.order_by().values_list("usuario_id", "tipo", "leida").annotate(n=Count("id"))
+            deltas = _deltas((usuario_id, tipo, leida, -n) for usuario_id, tipo, leida, n in filas)
+            resultado = super().delete()
+            NotificationCounter.aplicar(deltas)
+        return resultado
+
+    def marcar_leidas(self):
+        """Marca como leídas las no leídas del queryset y descuenta los contadores."""
+        with transaction.atomic():
+            pendientes = list(
+                self.filter(leida=False).select_for_update().values_list("id", "usuario_id", "tipo")
+            )
+            if not pendientes:
+                return 0
+            Notification.objects.filter(pk__in=[p[0] for p in pendientes]).update(leida=True)
+            por_clave = Counter((usuario_id, tipo) for _, usuario_id, tipo in pendientes)
+            NotificationCounter.aplicar({clave: (0, -n) for clave, n in por_clave.items()})
+        return len(pendientes)
+
 
 class Notification(BaseModel):
     TIPO_CHOICES = [
@@ -12,6 +71,7 @@ class Notification(BaseModel):
         ('monedas', 'Monedas Recibidas'),
         ('subasta_nueva', 'Nueva Subasta'),
         ('subasta_ganada', 'Subasta Ganada'),
+        ('subasta_perdida', 'Subasta Perdida'),
         ('anuncio', 'Anuncio'),
         ('general', 'General'),
         ('email_verificado', 'Email Verificado'),
@@ -46,12 +106,186 @@ class Notification(BaseModel):
         indexes = [
             models.Index(fields=['usuario', 'leida']),
             models.Index(fields=['-creado']),
+            models.Index(fields=['usuario', 'creado']),
         ]
 
     def __str__(self):
         return f"{self.usuario.email} - {self.titulo} ({'Leída' if self.leida else 'No leída'})"
 
+    objects = NotificationQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        """Guarda y ajusta NotificationCounter con la diferencia respecto a la fila anterior."""
+        with transaction.atomic():
+            filas = []
+            if not self._state.adding and self.pk:
+                anterior = (
+                    Notification.objects.select_for_update()
+                    .filter(pk=self.pk).values_list("usuario_id", "tipo", "leida").first()
+                )
+                if anterior:
+                    filas.append((*anterior, -1))
+            super().save(*args, **kwargs)
+            filas.append((self.usuario_id, self.tipo, self.leida, 1))
+            NotificationCounter.aplicar(_deltas(filas))
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            anterior = (
+                Notification.objects.select_for_update()
+                .filter(pk=self.pk).values_list("usuario_id", "tipo", "leida").first()
+            )
+            resultado = super().delete(*args, **kwargs)
+            if anterior:
+                NotificationCounter.aplicar(_deltas([(*anterior, -1)]))
+        return resultado
+
     def marcar_como_leida(self):
         if not self.leida:
             self.leida = True
-            self.save(update_fields=['leida'])
\ No newline at end of file
+            self.save(update_fields=['leida'])
+
+
+class NotificationCounter(models.Model):
+    """
+    Totales de notificaciones por usuario y tipo, mantenidos en la misma
+    transacción que cada alta, lectura o baja de Notification. Permiten
+    responder el badge y las estadísticas sin contar la tabla de
+    notificaciones. `recalcular_contadores_notificaciones` los reconstruye.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contadores_notificaciones')
+    tipo = models.CharField(max_length=20, choices=Notification.TIPO_CHOICES)
+    total = models.PositiveIntegerField(default=0)
+    no_leidas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('usuario', 'tipo')
+        verbose_name = 'Contador de notificaciones'
+        verbose_name_plural = 'Contadores de notificaciones'
+
+    def __str__(self):
+        return f"{self.usuario_id} - {self.tipo}: {self.no_leidas}/{self.total}"
+
+    @staticmethod
+    def _sumar(campo, delta):
+        # GREATEST(campo, n) - n evita restar por debajo de 0 en columnas sin signo
+        if delta >= 0:
+            return F(campo) + delta
+        return Greatest(F(campo), Value(-delta)) - (-delta)
+
+    @classmethod
+    def aplicar(cls, deltas):
+        """
+        Aplica {(usuario_id, tipo): (delta_total, delta_no_leidas)} con un
+        número fijo de consultas: crea en lote las filas que falten
+        (ignore_conflicts por si otra transacción las crea a la vez) y hace
+        un UPDATE atómico por cada par de deltas distinto (en una alta masiva,
+        todas las filas reciben +1/+1 en un solo UPDATE).
+        """
+        deltas = {clave: d for clave, d in deltas.items() if d != (0, 0)}
+        if not deltas:
+            return
+
+        usuarios = {usuario_id for usuario_id, _ in deltas}
+        tipos = {tipo for _, tipo in deltas}
+
+        def buscar_ids():
+            return {
+                (usuario_id, tipo): pk
+                for pk, usuario_id, tipo in cls.objects.filter(
+                    usuario_id__in=usuarios, tipo__in=tipos
+                ).values_list("id", "usuario_id", "tipo")
+            }
+
+        ids = buscar_ids()
+        if any(clave not in ids for clave in deltas):
+            cls.objects.bulk_create(
+                [cls(usuario_id=usuario_id, tipo=tipo) for usuario_id, tipo in deltas if (usuario_id, tipo) not in ids],
+                ignore_conflicts=True,
+            )
+            ids = buscar_ids()
+
+        por_delta = {}
+        for clave, delta in deltas.items():
+            por_delta.setdefault(delta, []).append(ids[clave])
+        for (total, no_leidas), pks in por_delta.items():
+            cls.objects.filter(pk__in=sorted(pks)).update(
+                total=cls._sumar("total", total),
+                no_leidas=cls._sumar("no_leidas", no_leidas),
+            )
+
+    @classmethod
+    def reconstruir(cls, usuarios=None):
+        """
+        Recalcula los contadores desde la tabla de notificaciones (todos, o
+        solo los de `usuarios`). Devuelve la cantidad de filas escritas.
+        """
+        notificaciones = Notification.objects.order_by()
+        contadores = cls.objects.all()
+        if usuarios is not None:
+            notificaciones = notificaciones.filter(usuario__in=usuarios)
+            contadores = contadores.filter(usuario__in=usuarios)
+
+        filas = notificaciones.values("usuario_id", "tipo").annotate(
+            total=Count("id"), no_leidas=Count("id", filter=models.Q(leida=False))
+        )
+        with transaction.atomic():
+            contadores.delete()
+            creados = cls.objects.bulk_create((cls(**fila) for fila in filas.iterator()), batch_size=1000)
+        return len(creados)
+
+    @classmethod
+    def resumen(cls, usuario):
+        """
+        Totales del usuario en una consulta:
+        {'total', 'no_leidas', 'leidas', 'por_tipo': {tipo: total}}
+        """
+        por_tipo = {tipo: 0 for tipo, _ in Notification.TIPO_CHOICES}
+        total = no_leidas = 0
+        for tipo, t, n in cls.objects.filter(usuario=usuario).values_list("tipo", "total", "no_leidas"):
+            por_tipo[tipo] = t
+            total += t
+            no_leidas += n
+        return {
+            'total': total,
+            'no_leidas': no_leidas,
+            'leidas': total - no_leidas,
+            'por_tipo': por_tipo,
+        }
+
+
+class NotificationOutbox(BaseModel):
+    """
+    Notificaciones pendientes de crear, escritas con una sola fila en la
+    transacción que las origina (calificar, depositar, crear o cerrar una
+    subasta) y materializadas después por `procesar_notificaciones`.
+
+    Cada fila es una plantilla común (tipo, título, mensaje, ids y metadata)
+    más sus destinatarios: `items` trae los campos propios de cada uno
+    (siempre `usuario_id`) y `grupo_id` agrega a todos los estudiantes del
+    grupo, resueltos por el worker.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesada', 'Procesada'),
+        ('error', 'Error'),
+    ]
+
+    plantilla = models.JSONField(default=dict)
+    items = models.JSONField(default=list, blank=True)
+    grupo_id = models.PositiveIntegerField(null=True, blank=True)
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    ultimo_error = models.TextField(blank=True, default='')
+    procesada_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-creado']
+        verbose_name = 'Notificación en cola'
+        verbose_name_plural = 'Notificaciones en cola'
+        indexes = [
+            models.Index(fields=['estado', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.plantilla.get('tipo', '?')} - {self.estado} ({len(self.items)} destinatarios{' + grupo' if self.grupo_id else ''})"
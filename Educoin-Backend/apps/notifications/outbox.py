@@ -0,0 +1,129 @@
+"""
+Cola (outbox) de notificaciones fuera del camino de la petición.
+
+Quien genera notificaciones llama a `encolar`, que escribe UNA fila de
+NotificationOutbox en la transacción actual sin importar cuántos
+destinatarios haya; si la transacción se revierte, la fila también. El
+worker (`python manage.py procesar_notificaciones`) toma las filas
+pendientes, arma las Notification y las inserta con bulk_create en
+bloques, así calificar o crear una subasta para un grupo grande ya no
+depende del número de estudiantes.
+
+Con NOTIFICACIONES_OUTBOX_SINCRONO = True (desarrollo sin worker) cada
+fila se procesa al confirmar la transacción, en un hilo aparte del mismo
+proceso: la petición no espera los INSERT.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common.hilos import en_segundo_plano
+from .models import Notification, NotificationOutbox
+
+MAX_INTENTOS = 5
+CAMPOS = {'usuario_id', 'tipo', 'titulo', 'mensaje', 'activity_id', 'grade_id', 'auction_id', 'metadata'}
+
+
+def encolar(items=(), grupo=None, **plantilla):
+    """
+    Encola notificaciones con los campos comunes de `plantilla` para:
+    - cada dict de `items` (con `usuario_id` y los campos que cambian), y/o
+    - todos los estudiantes de `grupo` (Group o id), resueltos al procesar.
+    Devuelve la fila creada, o None si no hay destinatarios.
+    """
+    items = list(items)
+    if not items and grupo is None:
+        return None
+
+    campos = set(plantilla).union(*items) - CAMPOS
+    if campos:
+        raise ValueError(f"Campos de notificación desconocidos: {', '.join(sorted(campos))}")
+
+    entrada = NotificationOutbox.objects.create(
+        plantilla=plantilla,
+        items=items,
+        grupo_id=getattr(grupo, 'pk', grupo),
+    )
+    if getattr(settings, 'NOTIFICACIONES_OUTBOX_SINCRONO', False):
+        transaction.on_commit(lambda: en_segundo_plano(procesar_pendientes, ids=[entrada.pk]))
+    return entrada
+
+
+def _notificaciones(entrada, estudiantes_por_grupo):
+    destinatarios = list(entrada.items)
+    if entrada.grupo_id:
+        destinatarios += [{'usuario_id': pk} for pk in estudiantes_por_grupo.get(entrada.grupo_id, ())]
+    return [Notification(**{**entrada.plantilla, **item}) for item in destinatarios]
+
+
+def _descartar_usuarios_eliminados(por_entrada):
+    """Quita las notificaciones de usuarios borrados entre el encolado y el procesamiento."""
+    from django.contrib.auth import get_user_model
+
+    usuario_ids = {n.usuario_id for notificaciones in por_entrada.values() for n in notificaciones}
+    existentes = set(get_user_model().objects.filter(pk__in=usuario_ids).values_list("pk", flat=True))
+    if existentes != usuario_ids:
+        for pk, notificaciones in por_entrada.items():
+            por_entrada[pk] = [n for n in notificaciones if n.usuario_id in existentes]
+
+
+def _estudiantes_por_grupo(grupo_ids):
+    from apps.groups.models import Group
+
+    por_grupo = {}
+    if grupo_ids:
+        filas = Group.estudiantes.through.objects.filter(group_id__in=grupo_ids).values_list("group_id", "user_id")
+        for grupo_id, usuario_id in filas:
+            por_grupo.setdefault(grupo_id, []).append(usuario_id)
+    return por_grupo
+
+
+def procesar_pendientes(lote=100, chunk=500, ids=None):
+    """
+    Materializa hasta `lote` filas pendientes (o solo `ids`) e inserta sus
+    notificaciones con bulk_create de a `chunk`. Si el lote completo falla,
+    reintenta fila por fila para aislar la defectuosa, que suma un intento
+    y queda en 'error' tras MAX_INTENTOS. Devuelve (filas_procesadas,
+    notificaciones_creadas, filas_con_error).
+    """
+    with transaction.atomic():
+        pendientes = NotificationOutbox.objects.filter(estado='pendiente')
+        if ids is not None:
+            pendientes = pendientes.filter(pk__in=ids)
+        # skip_locked: varios workers pueden correr a la vez sin tomar las mismas filas
+        entradas = list(pendientes.select_for_update(skip_locked=True).order_by('id')[:lote])
+        if not entradas:
+            return 0, 0, 0
+
+        estudiantes = _estudiantes_por_grupo({e.grupo_id for e in entradas if e.grupo_id})
+        por_entrada = {e.pk: _notificaciones(e, estudiantes) for e in entradas}
+        _descartar_usuarios_eliminados(por_entrada)
+
+        fallidas = {}
+        try:
+            with transaction.atomic():
+                Notification.objects.bulk_create(
+                    [n for notificaciones in por_entrada.values() for n in notificaciones], batch_size=chunk
+                )
+        except Exception:
+            for entrada in entradas:
+                try:
+                    with transaction.atomic():
+                        Notification.objects.bulk_create(por_entrada[entrada.pk], batch_size=chunk)
+                except Exception as e:
+                    fallidas[entrada.pk] = e
+
+        procesadas = [e.pk for e in entradas if e.pk not in fallidas]
+        NotificationOutbox.objects.filter(pk__in=procesadas).update(
+            estado='procesada', procesada_en=timezone.now(), actualizado=timezone.now()
+        )
+        for entrada in entradas:
+            if entrada.pk in fallidas:
+                entrada.intentos += 1
+                entrada.ultimo_error = str(fallidas[entrada.pk])[:2000]
+                if entrada.intentos >= MAX_INTENTOS:
+                    entrada.estado = 'error'
+                entrada.save(update_fields=['intentos', 'ultimo_error', 'estado', 'actualizado'])
+
+    creadas = sum(len(por_entrada[pk]) for pk in procesadas)
+    return len(procesadas), creadas, len(fallidas)
@@ -1,19 +1,21 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from apps.grades.models import Grade
 from apps.auctions.models import Auction, Bid
 from apps.coins.models import CoinTransaction
 from apps.activities.models import Submission
-from apps.users.token_models import EmailVerificationToken, LoginFailureTracker
-from .models import Notification
+from apps.users.token_models import EmailVerificationToken
+from .models import Notification, notificaciones_creadas
+from . import outbox, stream
 
 
 @receiver(post_save, sender=Grade)
 def notificar_calificacion(sender, instance, created, **kwargs):
-    """Notificar al estudiante cuando recibe una calificación"""
+    """Notificar al estudiante cuando recibe una calificación (vía outbox)"""
     if created:
-        Notification.objects.create(
-            usuario=instance.student,
+        outbox.encolar(
+            [{'usuario_id': instance.student_id}],
             tipo='calificacion',
             titulo='Nueva calificación recibida',
             mensaje=f'Has recibido una calificación de {instance.nota} en "{instance.activity.nombre}"',
@@ -54,32 +56,26 @@ def notificar_entrega_estudiante(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=Auction)
 def notificar_nueva_subasta(sender, instance, created, **kwargs):
-    """Notificar a los estudiantes del grupo cuando hay una nueva subasta"""
+    """
+    Notificar a los estudiantes del grupo cuando hay una nueva subasta.
+    Se encola una sola fila; el worker resuelve los estudiantes del grupo.
+    """
     if created and instance.estado == 'active':
         try:
-            grupo = instance.grupo
-            estudiantes = grupo.estudiantes.all()
-            
-            notificaciones = [
-                Notification(
-                    usuario=estudiante,
-                    tipo='subasta_nueva',
-                    titulo='Nueva subasta disponible',
-                    mensaje=f'Nueva subasta: "{instance.titulo}" - ¡Participa ahora!',
-                    auction_id=instance.id,
-                    metadata={
-                        'auction_titulo': instance.titulo,
-                        'fecha_fin': instance.fecha_fin.isoformat(),
-                        'precio_inicial': str(instance.precio_inicial)
-                    }
-                )
-                for estudiante in estudiantes
-            ]
-            
-            if notificaciones:
-                Notification.objects.bulk_create(notificaciones)
+            outbox.encolar(
+                grupo=instance.grupo_id,
+                tipo='subasta_nueva',
+                titulo='Nueva subasta disponible',
+                mensaje=f'Nueva subasta: "{instance.titulo}" - ¡Participa ahora!',
+                auction_id=instance.id,
+                metadata={
+                    'auction_titulo': instance.titulo,
+                    'fecha_fin': instance.fecha_fin.isoformat(),
+                    'valor_minimo': instance.valor_minimo
+                }
+            )
         except Exception as e:
-            print(f"Error creando notificaciones de subasta: {e}")
+            print(f"Error encolando notificaciones de subasta: {e}")
 
 
 @receiver(post_save, sender=Bid)
@@ -110,10 +106,10 @@ def notificar_nueva_puja(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=CoinTransaction)
 def notificar_monedas_recibidas(sender, instance, created, **kwargs):
-    """Notificar cuando un estudiante recibe monedas"""
+    """Notificar cuando un estudiante recibe monedas (vía outbox)"""
     if created and instance.tipo == 'earn':
-        Notification.objects.create(
-            usuario=instance.wallet.usuario,
+        outbox.encolar(
+            [{'usuario_id': instance.wallet.usuario_id}],
             tipo='monedas',
             titulo='Educoins recibidas',
             mensaje=f'Has recibido {instance.cantidad} Educoins. {instance.descripcion}',
@@ -127,33 +123,24 @@ def notificar_monedas_recibidas(sender, instance, created, **kwargs):
 # ==========================================
 # 🆕 SEÑALES DE SEGURIDAD Y CUENTA
 # ==========================================
+# El aviso por intentos de login fallidos lo crea apps/users/login_failures.py
+# al cruzar el umbral (los fallos ya no se guardan como filas).
 
-@receiver(post_save, sender=LoginFailureTracker)
-def notificar_intento_login_fallido(sender, instance, created, **kwargs):
-    """Notificar después de 3 intentos fallidos de login"""
+
+# ==========================================
+# STREAM EN VIVO (SSE)
+# ==========================================
+
+@receiver(post_save, sender=Notification)
+def publicar_notificacion(sender, instance, created, **kwargs):
+    """Avisar al stream del usuario cuando se confirma la notificación"""
     if created:
-        try:
-            from apps.users.models import User
-            
-            # Verificar si hay 3+ fallos en las últimas 24 horas
-            if LoginFailureTracker.should_suggest_reset(instance.email):
-                try:
-                    user = User.objects.get(email=instance.email)
-                    
-                    Notification.objects.create(
-                        usuario=user,
-                        tipo='account_security',
-                        titulo='⚠️ Múltiples intentos de inicio de sesión fallidos',
-                        mensaje='Hemos detectado varios intentos fallidos de iniciar sesión en tu cuenta. Si no fuiste tú, te recomendamos cambiar tu contraseña inmediatamente.',
-                        metadata={
-                            'ip_address': instance.ip_address,
-                            'timestamp': instance.attempt_time.isoformat(),
-                            'intentos_recientes': LoginFailureTracker.objects.filter(
-                                email=instance.email
-                            ).count()
-                        }
-                    )
-                except User.DoesNotExist:
-                    pass  # Usuario no existe, no crear notificación
-        except Exception as e:
-            print(f"Error creando notificación de login fallido: {e}")
\ No newline at end of file
+        usuario_id = instance.usuario_id
+        transaction.on_commit(lambda: stream.publicar([usuario_id]))
+
+
+@receiver(notificaciones_creadas, sender=Notification)
+def publicar_notificaciones_masivas(sender, notificaciones, **kwargs):
+    """Un solo aviso por usuario para las altas con bulk_create"""
+    usuario_ids = {n.usuario_id for n in notificaciones}
+    transaction.on_commit(lambda: stream.publicar(usuario_ids))
@@ -0,0 +1,39 @@
+"""
+Estadísticas de notificaciones calculadas con una sola consulta.
+
+A diferencia de NotificationCounter (totales acumulados por usuario), este
+helper agrupa cualquier queryset de notificaciones con un único
+GROUP BY (tipo, leida), por lo que sirve para ventanas de tiempo (`desde`),
+varios usuarios a la vez o vistas del admin.
+"""
+from django.db.models import Count
+
+from .models import Notification
+
+
+def resumir_notificaciones(notificaciones=None, desde=None):
+    """
+    Devuelve {'total', 'no_leidas', 'leidas', 'por_tipo': {tipo: total}}
+    para `notificaciones` (por defecto, todas), opcionalmente solo las
+    creadas a partir de `desde` (date o datetime).
+    """
+    if notificaciones is None:
+        notificaciones = Notification.objects.all()
+    if desde is not None:
+        notificaciones = notificaciones.filter(creado__gte=desde)
+
+    por_tipo = {tipo: 0 for tipo, _ in Notification.TIPO_CHOICES}
+    total = no_leidas = 0
+    filas = notificaciones.order_by().values_list("tipo", "leida").annotate(n=Count("id"))
+    for tipo, leida, n in filas:
+        por_tipo[tipo] = por_tipo.get(tipo, 0) + n
+        total += n
+        if not leida:
+            no_leidas += n
+
+    return {
+        'total': total,
+        'no_leidas': no_leidas,
+        'leidas': total - no_leidas,
+        'por_tipo': por_tipo,
+    }
@@ -0,0 +1,143 @@
+"""
+Pub/sub para el stream de notificaciones en vivo (SSE).
+
+Cuando se confirma una transacción que creó notificaciones, se publica el
+id de cada usuario afectado. Las conexiones abiertas de ese usuario
+despiertan y leen sus notificaciones nuevas (id > último enviado) con una
+consulta. El mensaje solo avisa: la base de datos sigue siendo la fuente
+de verdad, así que una conexión que pierde un aviso lo recupera en el
+siguiente, y al reconectar con Last-Event-ID no se pierde nada.
+
+Backends (setting NOTIFICACIONES_STREAM_BACKEND, ruta con puntos):
+- MemoriaBackend: dentro del proceso; sirve con un solo worker y en pruebas.
+- RedisBackend: canales de Redis, para varios workers o servidores.
+  Requiere el paquete `redis` y NOTIFICACIONES_REDIS_URL.
+"""
+import asyncio
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+BACKEND_POR_DEFECTO = "apps.notifications.stream.MemoriaBackend"
+
+
+class MemoriaBackend:
+    """Suscripciones en memoria del proceso (un asyncio.Event por conexión)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscripciones = {}
+
+    def publicar(self, usuario_ids):
+        with self._lock:
+            destinos = [s for uid in set(usuario_ids) for s in self._suscripciones.get(uid, ())]
+        for suscripcion in destinos:
+            suscripcion.avisar()
+
+    async def suscribir(self, usuario_id):
+        suscripcion = _SuscripcionMemoria(self, usuario_id, asyncio.get_running_loop())
+        with self._lock:
+            self._suscripciones.setdefault(usuario_id, set()).add(suscripcion)
+        return suscripcion
+
+    def _quitar(self, suscripcion):
+        with self._lock:
+            activas = self._suscripciones.get(suscripcion.usuario_id)
+            if activas:
+                activas.discard(suscripcion)
+                if not activas:
+                    del self._suscripciones[suscripcion.usuario_id]
+
+
+class _SuscripcionMemoria:
+    def __init__(self, backend, usuario_id, loop):
+        self.backend = backend
+        self.usuario_id = usuario_id
+        self.loop = loop
+        self.evento = asyncio.Event()
+
+    def avisar(self):
+        # publicar() corre en el hilo de la vista síncrona, no en el del loop
+        self.loop.call_soon_threadsafe(self.evento.set)
+
+    async def esperar(self, timeout):
+        """True si llegó un aviso antes de `timeout` segundos."""
+        try:
+            await asyncio.wait_for(self.evento.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.evento.clear()
+        return True
+
+    async def cerrar(self):
+        self.backend._quitar(self)
+
+
+class RedisBackend:
+    """Un canal de Redis por usuario: `<prefijo>:<usuario_id>`."""
+
+    prefijo = "educoin:notificaciones"
+
+    def __init__(self):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError:
+            raise ImproperlyConfigured("RedisBackend requiere el paquete 'redis' (pip install redis).")
+        url = getattr(settings, "NOTIFICACIONES_REDIS_URL", "redis://localhost:6379/0")
+        self.url = url
+        self.cliente = redis.Redis.from_url(url)
+        self._redis_async = redis.asyncio
+
+    def canal(self, usuario_id):
+        return f"{self.prefijo}:{usuario_id}"
+
+    def publicar(self, usuario_ids):
+        with self.cliente.pipeline(transaction=False) as pipe:
+            for usuario_id in set(usuario_ids):
+                pipe.publish(self.canal(usuario_id), "1")
+            pipe.execute()
+
+    async def suscribir(self, usuario_id):
+        cliente = self._redis_async.Redis.from_url(self.url)
+        pubsub = cliente.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.canal(usuario_id))
+        return _SuscripcionRedis(cliente, pubsub)
+
+
+class _SuscripcionRedis:
+    def __init__(self, cliente, pubsub):
+        self.cliente = cliente
+        self.pubsub = pubsub
+
+    async def esperar(self, timeout):
+        mensaje = await self.pubsub.get_message(timeout=timeout)
+        if mensaje is None:
+            return False
+        # Varios avisos seguidos se atienden con una sola lectura
+        while await self.pubsub.get_message(timeout=0):
+            pass
+        return True
+
+    async def cerrar(self):
+        await self.pubsub.aclose()
+        await self.cliente.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    ruta = getattr(settings, "NOTIFICACIONES_STREAM_BACKEND", BACKEND_POR_DEFECTO)
+    return import_string(ruta)()
+
+
+def publicar(usuario_ids):
+    """Avisa a las conexiones abiertas de `usuario_ids`; los errores del backend no cortan la petición."""
+    if not usuario_ids:
+        return
+    try:
+        get_backend().publicar(usuario_ids)
+    except Exception as e:
+        print(f"Error publicando notificaciones en el stream: {e}")
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import NotificationViewSet
+from .views import NotificationViewSet, stream_notificaciones, ticket_stream
 
 router = DefaultRouter()
 router.register(r'notifications', NotificationViewSet, basename='notifications')
 
 urlpatterns = [
+    path('stream/', stream_notificaciones, name='notifications-stream'),
+    path('stream/ticket/', ticket_stream, name='notifications-stream-ticket'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,7 +1,10 @@
 """
 Utilidades para crear notificaciones de seguridad y cuenta
 """
+from django.utils import timezone
+
 from .models import Notification
+from . import outbox
 
 
 def notificar_email_verificado(user):
@@ -92,6 +95,104 @@ def notificar_login_exitoso(user, ip_address=None):
     )
 
 
+def notificar_intentos_login_fallidos(user, ip_address, intentos):
+    """Alerta de seguridad al acumular varios logins fallidos"""
+    Notification.objects.create(
+        usuario=user,
+        tipo='account_security',
+        titulo='⚠️ Múltiples intentos de inicio de sesión fallidos',
+        mensaje='Hemos detectado varios intentos fallidos de iniciar sesión en tu cuenta. Si no fuiste tú, te recomendamos cambiar tu contraseña inmediatamente.',
+        metadata={
+            'ip_address': ip_address,
+            'timestamp': timezone.now().isoformat(),
+            'intentos_recientes': intentos
+        }
+    )
+
+
+def notificar_monedas_recibidas_lote(transacciones):
+    """
+    Versión en lote de la señal notificar_monedas_recibidas, para depósitos
+    creados con bulk_create (que no dispara post_save). Se encolan en una
+    sola fila del outbox; cada destinatario lleva su cantidad y saldo.
+    """
+    return outbox.encolar(
+        [
+            {
+                'usuario_id': tx.wallet.usuario_id,
+                'mensaje': f'Has recibido {tx.cantidad} Educoins. {tx.descripcion}',
+                'metadata': {
+                    'cantidad': tx.cantidad,
+                    'saldo_nuevo': tx.wallet.saldo
+                }
+            }
+            for tx in transacciones
+            if tx.tipo == 'earn'
+        ],
+        tipo='monedas',
+        titulo='Educoins recibidas',
+    )
+
+def notificar_calificaciones_lote(grades):
+    """
+    Versión en lote de la señal notificar_calificacion, para calificaciones
+    creadas con bulk_create (que no dispara post_save). Se encolan en una
+    sola fila del outbox.
+    """
+    return outbox.encolar(
+        [
+            {
+                'usuario_id': grade.student_id,
+                'mensaje': f'Has recibido una calificación de {grade.nota} en "{grade.activity.nombre}"',
+                'grade_id': grade.id,
+                'activity_id': grade.activity_id,
+                'metadata': {
+                    'nota': str(grade.nota),
+                    'activity_nombre': grade.activity.nombre,
+                    'educoins_ganados': grade.calcular_coins_ganados()
+                }
+            }
+            for grade in grades
+        ],
+        tipo='calificacion',
+        titulo='Nueva calificación recibida',
+    )
+
+def notificar_resultado_subasta(auction, ganador_id, monto, perdedores):
+    """
+    Encola el aviso de cierre de una subasta: "ganada" al ganador y
+    "perdida" a cada participante de `perdedores` [(estudiante_id, cantidad)]
+    """
+    outbox.encolar(
+        [
+            {
+                'usuario_id': estudiante_id,
+                'mensaje': f'La subasta "{auction.titulo}" ha finalizado y no ganaste. Se liberaron tus {cantidad} EC bloqueados.',
+                'metadata': {
+                    'auction_titulo': auction.titulo,
+                    'cantidad_liberada': cantidad,
+                    'puja_ganadora': monto
+                }
+            }
+            for estudiante_id, cantidad in perdedores
+        ],
+        tipo='subasta_perdida',
+        titulo='Subasta finalizada',
+        auction_id=auction.id,
+    )
+    if ganador_id:
+        outbox.encolar(
+            [{'usuario_id': ganador_id}],
+            tipo='subasta_ganada',
+            titulo='¡Ganaste la subasta!',
+            mensaje=f'Ganaste la subasta "{auction.titulo}" con una puja de {monto} EC.',
+            auction_id=auction.id,
+            metadata={
+                'auction_titulo': auction.titulo,
+                'monto_pagado': monto
+            }
+        )
+
 def notificar_cuenta_eliminada(email, nombre):
     """
     Esta no crea una notificación porque la cuenta ya está eliminada,
@@ -1,11 +1,29 @@
+import json
+import secrets
+import time as reloj
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Q
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
-from .models import Notification
+from apps.common.pagination import NotificacionPagination
+from apps.users.authentication import CachedJWTAuthentication
+from .models import Notification, NotificationCounter
 from .serializers import NotificationSerializer, NotificationCreateSerializer
+from .stats import resumir_notificaciones
+from . import stream
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -16,6 +34,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificacionPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -35,14 +54,23 @@ class NotificationViewSet(viewsets.ModelViewSet):
         notificaciones = self.get_queryset().filter(leida=False)
         serializer = self.get_serializer(notificaciones, many=True)
         return Response({
-            'total': notificaciones.count(),
+            'total': NotificationCounter.resumen(request.user)['no_leidas'],
             'notificaciones': serializer.data
         })
 
+    @action(detail=False, methods=['get'], url_path='contador')
+    def contador(self, request):
+        """Badge de no leídas: una sola consulta a NotificationCounter"""
+        resumen = NotificationCounter.resumen(request.user)
+        return Response({
+            'no_leidas': resumen['no_leidas'],
+            'total': resumen['total']
+        })
+
     @action(detail=False, methods=['post'], url_path='marcar-todas-leidas')
     def marcar_todas_leidas(self, request):
         """Marcar todas las notificaciones del usuario como leídas"""
-        count = self.get_queryset().filter(leida=False).update(leida=True)
+        count = self.get_queryset().marcar_leidas()
         return Response({
             'message': f'{count} notificaciones marcadas como leídas'
         })
@@ -67,30 +95,39 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='estadisticas')
     def estadisticas(self, request):
-        """Obtener estadísticas de notificaciones"""
-        qs = self.get_queryset()
-        total = qs.count()
-        no_leidas = qs.filter(leida=False).count()
-        leidas = qs.filter(leida=True).count()
+        """
+        Obtener estadísticas de notificaciones.
+        Sin parámetros se leen de NotificationCounter; con ?desde=AAAA-MM-DD
+        (o fecha y hora ISO) se agrupan las notificaciones de esa ventana en
+        una sola consulta.
+        """
+        desde = request.query_params.get('desde')
+        if not desde:
+            return Response(NotificationCounter.resumen(request.user))
 
-        por_tipo = {}
-        for tipo, label in Notification.TIPO_CHOICES:
-            por_tipo[tipo] = qs.filter(tipo=tipo).count()
+        try:
+            fecha = parse_datetime(desde) or parse_date(desde)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            return Response({
+                'error': 'El parámetro desde debe ser una fecha ISO (AAAA-MM-DD o AAAA-MM-DDTHH:MM)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(fecha, datetime):
+            fecha = datetime.combine(fecha, time.min)
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha)
 
-        return Response({
-            'total': total,
-            'no_leidas': no_leidas,
-            'leidas': leidas,
-            'por_tipo': por_tipo
-        })
+        return Response(resumir_notificaciones(self.get_queryset(), desde=fecha))
 
     @action(detail=False, methods=['post'], url_path='enviar-estudiantes')
     def enviar_a_estudiantes(self, request):
         """
-        Permite a docentes enviar notificaciones a sus estudiantes
+        Permite a docentes enviar notificaciones a sus estudiantes.
+        Con enviar_email=true también se envía por correo.
         """
-        from apps.classrooms.models import Classroom
-        
+        from django.contrib.auth import get_user_model
+
         user = request.user
         
         # Verificar que sea docente
@@ -99,11 +136,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
                 'error': 'Solo los docentes pueden enviar notificaciones a estudiantes'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Obtener estudiantes del docente
-        classrooms = Classroom.objects.filter(docente=user)
-        estudiantes = []
-        for classroom in classrooms:
-            estudiantes.extend(classroom.estudiantes.all())
+        # Estudiantes de los grupos de las clases del docente (una consulta, sin repetidos)
+        estudiantes = list(
+            get_user_model().objects.filter(grupos_estudiante__classroom__docente=user).distinct()
+        )
         
         if not estudiantes:
             return Response({
@@ -135,7 +171,141 @@ class NotificationViewSet(viewsets.ModelViewSet):
         ]
         
         Notification.objects.bulk_create(notificaciones)
-        
+
+        # Opcional: también por email (render en lote y un solo INSERT en la cola)
+        emails = 0
+        if request.data.get('enviar_email') in (True, 'true', '1', 1):
+            from apps.users.email_utils import send_announcement_emails
+            emails = send_announcement_emails(
+                estudiantes, titulo, mensaje, remitente=f'{user.first_name} {user.last_name}'.strip() or user.email
+            )
+
         return Response({
-            'message': f'Notificación enviada a {len(estudiantes)} estudiantes'
-        })
\ No newline at end of file
+            'message': f'Notificación enviada a {len(estudiantes)} estudiantes',
+            'emails_encolados': emails
+        })
+
+
+# ==========================================
+# STREAM EN VIVO (SSE)
+# ==========================================
+
+def _clave_ticket(ticket):
+    return f"stream_ticket:{ticket}"
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def ticket_stream(request):
+    """
+    POST /api/notifications/stream/ticket/ — ticket para abrir el stream.
+    EventSource no permite enviar headers: en lugar del access token (que
+    quedaría en los logs de la URL) se pasa ?ticket=, que solo sirve para
+    el stream y vence si no se usa en NOTIFICACIONES_STREAM_TICKET_TTL
+    segundos. Si el stream responde 401, pedir otro.
+    """
+    ttl = getattr(settings, 'NOTIFICACIONES_STREAM_TICKET_TTL', 60)
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_clave_ticket(ticket), request.user.id, timeout=ttl)
+    return Response({'ticket': ticket, 'expira_en': ttl})
+
+
+def _usuario_del_stream(request):
+    """
+    Autentica con ?ticket= (ver ticket_stream) o con el header JWT de la API.
+    Cada uso del ticket renueva su vigencia, así las reconexiones del
+    navegador siguen funcionando mientras el cliente esté conectado.
+    """
+    ticket = request.GET.get('ticket')
+    if ticket:
+        clave = _clave_ticket(ticket)
+        usuario_id = cache.get(clave)
+        if usuario_id is None:
+            return None
+        cache.touch(clave, getattr(settings, 'NOTIFICACIONES_STREAM_TICKET_TTL', 60))
+        return get_user_model().objects.filter(pk=usuario_id, is_active=True).first()
+
+    try:
+        resultado = CachedJWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return resultado[0] if resultado else None
+
+
+def _ultimo_id(usuario, request):
+    """Last-Event-ID (reconexión del navegador) o ?ultimo_id=; si no, la última notificación existente."""
+    valor = request.headers.get('Last-Event-ID') or request.GET.get('ultimo_id')
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return Notification.objects.filter(usuario=usuario).aggregate(m=Max('id'))['m'] or 0
+
+
+def _notificaciones_nuevas(usuario, ultimo_id, limite=100):
+    notificaciones = Notification.objects.filter(usuario=usuario, id__gt=ultimo_id).order_by('id')[:limite]
+    return NotificationSerializer(notificaciones, many=True).data
+
+
+async def _eventos(usuario, ultimo_id):
+    heartbeat = getattr(settings, 'NOTIFICACIONES_STREAM_HEARTBEAT', 25)
+    fin = reloj.monotonic() + getattr(settings, 'NOTIFICACIONES_STREAM_DURACION', 600)
+    # Suscribirse antes de la primera lectura para no perder avisos entre medio
+    suscripcion = await stream.get_backend().suscribir(usuario.id)
+    try:
+        yield "retry: 5000\n\n"
+        hay_nuevas = True
+        while reloj.monotonic() < fin:
+            if hay_nuevas:
+                for datos in await sync_to_async(_notificaciones_nuevas)(usuario, ultimo_id):
+                    ultimo_id = datos['id']
+                    yield _evento(datos)
+            hay_nuevas = await suscripcion.esperar(min(heartbeat, max(fin - reloj.monotonic(), 0)))
+            if not hay_nuevas:
+                yield ": ping\n\n"
+    finally:
+        await suscripcion.cerrar()
+
+
+def _evento(datos):
+    return f"id: {datos['id']}\nevent: notificacion\ndata: {json.dumps(datos, cls=DjangoJSONEncoder)}\n\n"
+
+
+def _sondeo(usuario, ultimo_id):
+    """
+    Respuesta para WSGI: un stream abierto ocuparía un worker síncrono, así
+    que se envían las notificaciones pendientes y se cierra. Con `retry:`
+    el navegador vuelve a conectar tras NOTIFICACIONES_STREAM_SONDEO
+    segundos (con Last-Event-ID), lo que equivale a consultar periódicamente.
+    """
+    sondeo = getattr(settings, 'NOTIFICACIONES_STREAM_SONDEO', 15)
+    eventos = [_evento(datos) for datos in _notificaciones_nuevas(usuario, ultimo_id)]
+    return HttpResponse(f"retry: {sondeo * 1000}\n\n" + "".join(eventos), content_type='text/event-stream')
+
+
+async def stream_notificaciones(request):
+    """
+    GET /api/notifications/stream/?ticket=... — Server-Sent Events con las
+    notificaciones nuevas del usuario, en lugar de consultar no-leidas
+    periódicamente. Cada evento `notificacion` lleva el mismo JSON que el
+    listado y su id; al reconectar, el navegador envía Last-Event-ID y se
+    reenvían las que falten. Con ASGI la conexión queda abierta hasta
+    NOTIFICACIONES_STREAM_DURACION segundos (el cliente reconecta solo);
+    con WSGI se responde lo pendiente y se cierra (ver _sondeo).
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Método no permitido.'}, status=405)
+
+    usuario = await sync_to_async(_usuario_del_stream)(request)
+    if usuario is None:
+        return JsonResponse({'detail': 'Token inválido o ausente.'}, status=401)
+
+    ultimo_id = await sync_to_async(_ultimo_id)(usuario, request)
+    if not isinstance(request, ASGIRequest):
+        response = await sync_to_async(_sondeo)(usuario, ultimo_id)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    response = StreamingHttpResponse(_eventos(usuario, ultimo_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx no debe acumular el stream
+    return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Profile
+from .models import User, Profile, EmailOutbox
 from .token_models import EmailVerificationToken, PasswordResetAttempt, LoginFailureTracker
 
 @admin.register(User)
@@ -58,4 +58,21 @@ class LoginFailureTrackerAdmin(admin.ModelAdmin):
         count = queryset.count()
         queryset.delete()
         self.message_user(request, f"{count} fallos de login eliminados.")
-    clear_failures.short_description = "Limpiar fallos seleccionados"
\ No newline at end of file
+    clear_failures.short_description = "Limpiar fallos seleccionados"
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "destinatario", "asunto", "estado", "intentos", "proximo_intento", "enviado_en", "creado")
+    search_fields = ("destinatario", "asunto")
+    list_filter = ("estado",)
+    ordering = ("-creado",)
+    exclude = ("html", "texto")  # pueden contener enlaces de verificación o reset
+    readonly_fields = ("destinatario", "asunto", "huella", "intentos", "respuesta", "ultimo_error", "enviado_en", "creado", "actualizado")
+    actions = ["reintentar"]
+
+    @admin.action(description="Reintentar los correos seleccionados")
+    def reintentar(self, request, queryset):
+        from django.utils import timezone
+        count = queryset.exclude(estado="enviado").update(estado="pendiente", intentos=0, proximo_intento=timezone.now())
+        self.message_user(request, f"{count} correos vuelven a la cola")
@@ -0,0 +1,70 @@
+"""
+Autenticación JWT con el usuario en caché.
+
+simplejwt carga el User desde MySQL en cada petición autenticada. Esta
+subclase lo guarda en el caché compartido (settings.CACHES) bajo
+`auth_usuario:v<VERSION>:<user_id>`, así que una petición normal ya no
+consulta la tabla de usuarios.
+
+La entrada se borra al guardar o eliminar el User o su Profile (rol,
+contraseña, is_active, datos de perfil...; ver signals.py) y además expira
+tras JWT_USUARIO_CACHE_TIMEOUT segundos. Los cambios hechos con
+QuerySet.update() no disparan señales: llamar a `invalidar_usuario`.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+# Subir si cambia el modelo User: las entradas viejas dejan de leerse
+VERSION = 1
+
+
+def _clave(user_id):
+    return f"auth_usuario:v{VERSION}:{user_id}"
+
+
+def invalidar_usuario(user_id):
+    try:
+        cache.delete(_clave(user_id))
+    except Exception as e:
+        logger.error(f"Caché no disponible para invalidar el usuario {user_id}: {e}")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("El token no contiene un identificador de usuario reconocible")
+
+        clave = _clave(user_id)
+        try:
+            user = cache.get(clave)
+        except Exception as e:
+            logger.error(f"Caché no disponible para autenticar, usando la base de datos: {e}")
+            return super().get_user(validated_token)
+
+        if user is None:
+            # super() valida is_active y la revocación por cambio de contraseña
+            user = super().get_user(validated_token)
+            try:
+                cache.set(clave, user, timeout=getattr(settings, 'JWT_USUARIO_CACHE_TIMEOUT', 300))
+            except Exception as e:
+                logger.error(f"No se pudo guardar el usuario {user_id} en caché: {e}")
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("El usuario está inactivo", code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("La contraseña del usuario cambió", code="password_changed")
+        return user
+
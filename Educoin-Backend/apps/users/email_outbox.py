@@ -0,0 +1,208 @@
+"""
+Cola de correos salientes.
+
+`encolar_email` guarda el correo en EmailOutbox y vuelve enseguida, así el
+registro, el reenvío de verificación o el reset de contraseña ya no esperan
+la llamada HTTPS a SendGrid. `python manage.py enviar_emails` los envía en
+lotes con un transporte:
+
+- SendGridTransport (por defecto): API de SendGrid, un cliente por lote.
+- FakeTransport: guarda los mensajes en FakeTransport.enviados (pruebas y
+  desarrollo sin credenciales).
+
+Setting EMAIL_OUTBOX_TRANSPORT (ruta con puntos). Un envío fallido se
+reintenta con espera exponencial (1, 2, 4... minutos, máximo 1 hora) y tras
+MAX_INTENTOS queda en 'fallido'. Si ya hay un correo pendiente idéntico
+(mismo destinatario, asunto y cuerpo) no se encola otro.
+
+Al enviarse (o descartarse) se borra el cuerpo: los enlaces de
+verificación y reset no quedan guardados. `python manage.py purgar_emails`
+elimina las filas ya resueltas.
+
+Con EMAIL_OUTBOX_SINCRONO = True (desarrollo sin worker) cada correo se
+envía al confirmar la transacción, en un hilo aparte: la respuesta no
+espera a SendGrid.
+"""
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.common.hilos import en_segundo_plano
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_INTENTOS = 6
+ESPERA_BASE = timedelta(minutes=1)
+ESPERA_MAXIMA = timedelta(hours=1)
+# Un correo en 'enviando' más tiempo que esto se considera abandonado (worker caído)
+ENVIO_ABANDONADO = timedelta(minutes=10)
+
+
+class SendGridTransport:
+    def __init__(self):
+        from sendgrid import SendGridAPIClient
+
+        # EMAIL_HOST_PASSWORD contiene la API Key de SendGrid
+        self.cliente = SendGridAPIClient(settings.EMAIL_HOST_PASSWORD)
+
+    def enviar(self, correo):
+        """Envía un EmailOutbox; devuelve la respuesta a registrar o lanza excepción."""
+        from sendgrid.helpers.mail import Mail
+
+        mensaje = Mail(
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to_emails=correo.destinatario,
+            subject=correo.asunto,
+            html_content=correo.html,
+            plain_text_content=correo.texto or None,
+        )
+        response = self.cliente.send(mensaje)
+        if response.status_code >= 400:
+            raise RuntimeError(f"SendGrid respondió {response.status_code}")
+        return f"SendGrid {response.status_code} {response.headers.get('X-Message-Id', '')}".strip()
+
+
+class FakeTransport:
+    enviados = []
+
+    def enviar(self, correo):
+        FakeTransport.enviados.append({
+            'destinatario': correo.destinatario,
+            'asunto': correo.asunto,
+            'html': correo.html,
+            'texto': correo.texto,
+        })
+        return f"fake #{len(FakeTransport.enviados)}"
+
+
+def get_transport():
+    ruta = getattr(settings, 'EMAIL_OUTBOX_TRANSPORT', 'apps.users.email_outbox.SendGridTransport')
+    return import_string(ruta)()
+
+
+def _huella(destinatario, asunto, html, texto):
+    contenido = "\x00".join([destinatario.lower(), asunto, html, texto])
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def encolar_email(destinatario, asunto, html, texto=''):
+    """
+    Encola un correo y devuelve la fila de EmailOutbox (la ya pendiente si
+    es un duplicado).
+    """
+    huella = _huella(destinatario, asunto, html, texto)
+
+    existente = EmailOutbox.objects.filter(huella=huella, estado='pendiente').first()
+    if existente:
+        logger.info(f"Correo duplicado, ya estaba en cola (#{existente.pk}) para {destinatario}")
+        return existente
+
+    correo = EmailOutbox.objects.create(
+        destinatario=destinatario, asunto=asunto, html=html, texto=texto, huella=huella,
+    )
+    logger.info(f"Correo #{correo.pk} encolado para {destinatario}: {asunto}")
+    if getattr(settings, 'EMAIL_OUTBOX_SINCRONO', False):
+        transaction.on_commit(lambda: en_segundo_plano(enviar_pendientes, ids=[correo.pk]))
+    return correo
+
+
+def encolar_emails(mensajes):
+    """
+    Versión en lote de encolar_email para envíos masivos: `mensajes` es una
+    lista de (destinatario, asunto, html, texto). Descarta los que ya están
+    pendientes con una sola consulta e inserta el resto con bulk_create.
+    Devuelve cuántos se encolaron.
+    """
+    filas = {}
+    for destinatario, asunto, html, texto in mensajes:
+        huella = _huella(destinatario, asunto, html, texto)
+        filas[huella] = EmailOutbox(destinatario=destinatario, asunto=asunto, html=html, texto=texto, huella=huella)
+
+    pendientes = set(
+        EmailOutbox.objects.filter(huella__in=filas, estado='pendiente').values_list('huella', flat=True)
+    )
+    nuevos = [fila for huella, fila in filas.items() if huella not in pendientes]
+    EmailOutbox.objects.bulk_create(nuevos, batch_size=500)
+    logger.info(f"{len(nuevos)} correos encolados en lote ({len(filas) - len(nuevos)} duplicados)")
+    if nuevos and getattr(settings, 'EMAIL_OUTBOX_SINCRONO', False):
+        # bulk_create no devuelve los ids en MySQL: se buscan por huella
+        ids = list(EmailOutbox.objects.filter(
+            huella__in=[fila.huella for fila in nuevos], estado='pendiente',
+        ).values_list('pk', flat=True))
+        transaction.on_commit(lambda: en_segundo_plano(enviar_pendientes, lote=len(ids), ids=ids))
+    return len(nuevos)
+
+
+def _espera(intentos):
+    return min(ESPERA_BASE * (2 ** (intentos - 1)), ESPERA_MAXIMA)
+
+
+def _tomar(lote, ids):
+    """Marca como 'enviando' hasta `lote` correos listos y los devuelve."""
+    ahora = timezone.now()
+    listos = EmailOutbox.objects.filter(
+        Q(estado='pendiente', proximo_intento__lte=ahora)
+        | Q(estado='enviando', actualizado__lt=ahora - ENVIO_ABANDONADO)
+    )
+    if ids is not None:
+        listos = listos.filter(pk__in=ids)
+
+    with transaction.atomic():
+        correos = list(listos.select_for_update(skip_locked=True).order_by('proximo_intento', 'id')[:lote])
+        EmailOutbox.objects.filter(pk__in=[c.pk for c in correos]).update(estado='enviando', actualizado=ahora)
+    return correos
+
+
+def enviar_pendientes(lote=50, ids=None, transport=None):
+    """
+    Envía hasta `lote` correos listos (o solo `ids`) con un mismo
+    transporte. Devuelve (enviados, reintentos, fallidos).
+    """
+    correos = _tomar(lote, ids)
+    if not correos:
+        return 0, 0, 0
+
+    try:
+        transport = transport or get_transport()
+    except Exception as e:
+        # Sin transporte (p. ej. falta el paquete o la API key): devolverlos a la cola
+        logger.error(f"No se pudo crear el transporte de correo: {e}")
+        EmailOutbox.objects.filter(pk__in=[c.pk for c in correos]).update(estado='pendiente')
+        return 0, len(correos), 0
+
+    enviados = reintentos = fallidos = 0
+    for correo in correos:
+        correo.intentos += 1
+        try:
+            correo.respuesta = transport.enviar(correo)[:255]
+        except Exception as e:
+            correo.ultimo_error = f"{type(e).__name__}: {e}"[:2000]
+            if correo.intentos >= MAX_INTENTOS:
+                correo.estado = 'fallido'
+                fallidos += 1
+                logger.error(f"Correo #{correo.pk} a {correo.destinatario} descartado tras {correo.intentos} intentos: {e}")
+            else:
+                correo.estado = 'pendiente'
+                correo.proximo_intento = timezone.now() + _espera(correo.intentos)
+                reintentos += 1
+                logger.warning(f"Correo #{correo.pk} a {correo.destinatario} falló (intento {correo.intentos}): {e}")
+        else:
+            correo.estado = 'enviado'
+            correo.enviado_en = timezone.now()
+            enviados += 1
+        if correo.estado != 'pendiente':
+            # El cuerpo lleva enlaces con tokens: no guardarlo una vez resuelto
+            correo.html = correo.texto = ''
+        correo.save(update_fields=[
+            'intentos', 'estado', 'respuesta', 'ultimo_error', 'proximo_intento', 'enviado_en',
+            'html', 'texto', 'actualizado',
+        ])
+
+    return enviados, reintentos, fallidos
@@ -0,0 +1,52 @@
+"""
+Plantillas de correo de Educoin (apps/users/templates/emails/).
+
+Cada correo tiene una versión HTML y una de texto que extienden el mismo
+layout (base.html / base.txt) y se renderizan con el mismo contexto. Las
+plantillas se compilan una sola vez por proceso (loader cacheado de Django
+más el caché de este módulo), así cada envío solo paga el render.
+
+`renderizar_lote` sirve para envíos masivos (p. ej. un anuncio a todo un
+grupo): carga las plantillas una vez y renderiza un correo por contexto.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader import get_template
+
+ASUNTOS = {
+    'verificacion': '🎓 Verifica tu correo - Educoin',
+    'bienvenida': '🎊 ¡Tu cuenta está lista! - Educoin',
+    'reset_password': '🔒 Restablece tu contraseña - Educoin',
+    'cuenta_eliminada': '👋 Confirmación de eliminación de cuenta - Educoin',
+    'anuncio': '📢 {{ titulo }} - Educoin',
+}
+
+
+@lru_cache(maxsize=None)
+def _plantillas(nombre):
+    # El asunto es texto plano: sin escapar HTML
+    asunto = engines['django'].from_string("{% autoescape off %}" + ASUNTOS[nombre] + "{% endautoescape %}")
+    return asunto, get_template(f"emails/{nombre}.txt"), get_template(f"emails/{nombre}.html")
+
+
+def _contexto(contexto):
+    return {'frontend_url': settings.FRONTEND_URL, **contexto}
+
+
+def renderizar(nombre, contexto):
+    """Devuelve (asunto, texto, html) del correo `nombre` con `contexto`."""
+    asunto, texto, html = _plantillas(nombre)
+    contexto = _contexto(contexto)
+    return asunto.render(contexto).strip(), texto.render(contexto).strip(), html.render(contexto)
+
+
+def renderizar_lote(nombre, contextos):
+    """Como renderizar, para varios contextos con las mismas plantillas."""
+    asunto, texto, html = _plantillas(nombre)
+    resultado = []
+    for contexto in contextos:
+        contexto = _contexto(contexto)
+        resultado.append((asunto.render(contexto).strip(), texto.render(contexto).strip(), html.render(contexto)))
+    return resultado
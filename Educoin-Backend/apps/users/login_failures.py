@@ -0,0 +1,141 @@
+"""
+Conteo de logins fallidos con ventana deslizante en el caché.
+
+Cada fallo incrementa un contador por email y otro por IP en el caché de
+Django (sin tocar MySQL), repartidos en porciones de la ventana: la cuenta
+es la suma de las porciones vigentes, leída con un solo get_many. Así una
+ráfaga de intentos (credential stuffing) no se convierte en una ráfaga de
+INSERT/COUNT contra la base.
+
+Si el caché falla, se vuelve al registro en LoginFailureTracker (una fila
+por intento). `python manage.py purgar_fallos_login` borra las filas viejas.
+"""
+import hashlib
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .token_models import LoginFailureTracker
+
+logger = logging.getLogger(__name__)
+
+# Fallos del mismo email en 24 h a partir de los cuales se sugiere (y avisa) el reset
+UMBRAL_EMAIL = 3
+# Fallos desde la misma IP en 1 h a partir de los cuales se registra una alerta
+UMBRAL_IP = 20
+
+EstadoFallos = namedtuple("EstadoFallos", ["fallos_email", "fallos_ip", "sugerir_reset"])
+
+
+class VentanaDeslizante:
+    """
+    Contador por clave sobre los últimos `ventana` segundos, dividido en
+    `porciones` claves de caché que expiran solas.
+    """
+
+    def __init__(self, prefijo, ventana, porciones):
+        self.prefijo = prefijo
+        self.ventana = ventana
+        self.porcion = ventana // porciones
+        self.porciones = porciones
+
+    def _digest(self, clave):
+        return hashlib.sha1(clave.lower().encode("utf-8")).hexdigest()
+
+    def _claves(self, clave, ahora=None):
+        actual = int((ahora or timezone.now()).timestamp()) // self.porcion
+        digest = self._digest(clave)
+        return [f"{self.prefijo}:{digest}:{actual - i}" for i in range(self.porciones)]
+
+    def _clave_aviso(self, clave):
+        return f"{self.prefijo}:avisado:{self._digest(clave)}"
+
+    def incrementar(self, clave):
+        """Suma un fallo y devuelve el total de la ventana."""
+        claves = self._claves(clave)
+        cache.add(claves[0], 0, timeout=self.ventana + self.porcion)
+        try:
+            cache.incr(claves[0])
+        except ValueError:
+            # La clave expiró entre add e incr
+            cache.set(claves[0], 1, timeout=self.ventana + self.porcion)
+        return self.contar(clave, claves)
+
+    def contar(self, clave, claves=None):
+        return sum(cache.get_many(claves or self._claves(clave)).values())
+
+    def primer_aviso(self, clave):
+        """True solo la primera vez por ventana (cache.add es atómico entre procesos)."""
+        return cache.add(self._clave_aviso(clave), 1, timeout=self.ventana)
+
+    def limpiar(self, clave):
+        cache.delete_many(self._claves(clave) + [self._clave_aviso(clave)])
+
+
+por_email = VentanaDeslizante("login_fallos:email", ventana=24 * 3600, porciones=24)
+por_ip = VentanaDeslizante("login_fallos:ip", ventana=3600, porciones=12)
+
+
+def _registrar_en_bd(email, ip_address):
+    LoginFailureTracker.objects.create(email=email, ip_address=ip_address)
+    desde = timezone.now() - timedelta(hours=24)
+    fallos_email = LoginFailureTracker.objects.filter(email=email, attempt_time__gte=desde).count()
+    return EstadoFallos(fallos_email, None, fallos_email >= UMBRAL_EMAIL)
+
+
+def registrar_fallo(email, ip_address=None):
+    """
+    Registra un login fallido y devuelve EstadoFallos. Al llegar a
+    UMBRAL_EMAIL fallos se avisa al usuario (una sola vez por ventana).
+    """
+    try:
+        fallos_email = por_email.incrementar(email)
+        fallos_ip = por_ip.incrementar(ip_address) if ip_address else None
+        estado = EstadoFallos(fallos_email, fallos_ip, fallos_email >= UMBRAL_EMAIL)
+    except Exception as e:
+        logger.error(f"Caché no disponible para contar fallos de login, usando la base de datos: {e}")
+        estado = _registrar_en_bd(email, ip_address)
+
+    # Con >= y un aviso por ventana: fallos concurrentes pueden saltarse el valor exacto del umbral
+    if estado.fallos_ip is not None and estado.fallos_ip >= UMBRAL_IP and _primer_aviso(
+        por_ip, ip_address, estado.fallos_ip == UMBRAL_IP
+    ):
+        logger.warning(f"🚨 {estado.fallos_ip} logins fallidos en 1 h desde la IP {ip_address}")
+    if estado.fallos_email >= UMBRAL_EMAIL and _primer_aviso(
+        por_email, email, estado.fallos_email == UMBRAL_EMAIL
+    ):
+        _avisar_usuario(email, ip_address, estado.fallos_email)
+    return estado
+
+
+def _primer_aviso(ventana, clave, sin_cache):
+    # Sin caché (conteo en la base) se avisa solo al llegar justo al umbral
+    try:
+        return ventana.primer_aviso(clave)
+    except Exception as e:
+        logger.error(f"Caché no disponible para el aviso de fallos de login: {e}")
+        return sin_cache
+
+
+def limpiar_fallos(email):
+    """Tras un login correcto o un reset de contraseña."""
+    try:
+        por_email.limpiar(email)
+    except Exception as e:
+        logger.error(f"Caché no disponible para limpiar fallos de login: {e}")
+        LoginFailureTracker.clear_failures(email)
+
+
+def _avisar_usuario(email, ip_address, intentos):
+    from apps.notifications.utils import notificar_intentos_login_fallidos
+    from .models import User
+
+    user = User.objects.filter(email=email).first()
+    if user:
+        try:
+            notificar_intentos_login_fallidos(user, ip_address, intentos)
+        except Exception as e:
+            logger.error(f"Error creando notificación de login fallido: {e}")
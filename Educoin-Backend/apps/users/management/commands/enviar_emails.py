@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.users.email_outbox import enviar_pendientes, get_transport
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos encolados en EmailOutbox (verificación, bienvenida, "
+        "reset de contraseña...) en lotes, reintentando con espera creciente. "
+        "Con --intervalo queda corriendo y revisa la cola cada N segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo", type=float, default=0,
+            help="Segundos de espera cuando no hay correos listos. 0 (por defecto) vacía la cola una vez y termina.",
+        )
+        parser.add_argument(
+            "--lote", type=int, default=50,
+            help="Correos enviados por lote con el mismo cliente (por defecto 50).",
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options["intervalo"]
+        try:
+            while True:
+                close_old_connections()
+                enviados = self._vaciar(options["lote"])
+                if intervalo <= 0:
+                    break
+                if not enviados:
+                    time.sleep(intervalo)
+        except KeyboardInterrupt:
+            self.stdout.write("Detenido.")
+
+    def _vaciar(self, lote):
+        """Envía lotes mientras haya correos listos. Devuelve cuántos se procesaron."""
+        transport = None
+        procesados = 0
+        while True:
+            if transport is None:
+                try:
+                    transport = get_transport()
+                except Exception as e:
+                    self.stderr.write(f"No se pudo crear el transporte de correo: {e}")
+                    return procesados
+            enviados, reintentos, fallidos = enviar_pendientes(lote=lote, transport=transport)
+            total = enviados + reintentos + fallidos
+            if total:
+                self.stdout.write(f"{enviados} enviados, {reintentos} para reintentar, {fallidos} fallidos.")
+            procesados += total
+            if total < lote:
+                return procesados
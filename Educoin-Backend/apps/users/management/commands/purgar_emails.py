@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.users.models import EmailOutbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los correos de EmailOutbox ya enviados o fallidos más antiguos "
+        "que --dias, en lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=30, help="Antigüedad mínima en días (por defecto 30).")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Filas borradas por DELETE (por defecto 5000).")
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options["dias"])
+        queryset = EmailOutbox.objects.filter(estado__in=["enviado", "fallido"], actualizado__lt=limite)
+        borrados = self._purgar(queryset, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{borrados} correos enviados o fallidos anteriores a {limite:%Y-%m-%d} eliminados."
+        ))
+
+    def _purgar(self, queryset, batch_size):
+        # Borrar por lotes de ids para no bloquear la tabla con un DELETE enorme
+        total = 0
+        while True:
+            ids = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return total
+            borrados, _ = EmailOutbox.objects.filter(pk__in=ids).delete()
+            total += borrados
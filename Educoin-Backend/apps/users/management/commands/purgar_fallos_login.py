@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.users.token_models import LoginFailureTracker, PasswordResetAttempt
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los fallos de login (LoginFailureTracker) y los intentos de "
+        "reset de contraseña más antiguos que --dias, en lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=30, help="Antigüedad mínima en días (por defecto 30).")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Filas borradas por DELETE (por defecto 5000).")
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options["dias"])
+        fallos = self._purgar(LoginFailureTracker.objects.filter(attempt_time__lt=limite), options["batch_size"])
+        resets = self._purgar(PasswordResetAttempt.objects.filter(created_at__lt=limite), options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{fallos} fallos de login y {resets} intentos de reset anteriores a {limite:%Y-%m-%d} eliminados."
+        ))
+
+    def _purgar(self, queryset, batch_size):
+        # Borrar por lotes de ids para no bloquear la tabla con un DELETE enorme
+        total = 0
+        while True:
+            ids = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return total
+            borrados, _ = queryset.model.objects.filter(pk__in=ids).delete()
+            total += borrados
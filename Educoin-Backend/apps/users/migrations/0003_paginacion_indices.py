@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_loginfailuretracker_passwordresetattempt_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['creado'], name='users_user_creado_e38c62_idx'),
+        ),
+    ]
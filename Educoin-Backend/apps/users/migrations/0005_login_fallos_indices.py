@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loginfailuretracker',
+            index=models.Index(fields=['email', 'attempt_time'], name='users_login_email_26b942_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loginfailuretracker',
+            index=models.Index(fields=['attempt_time'], name='users_login_attempt_30e674_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 from apps.common.models import BaseModel
 
 class User(AbstractUser, BaseModel):
@@ -18,6 +19,12 @@ class User(AbstractUser, BaseModel):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']  
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Listado de usuarios paginado por cursor (creado, id)
+            models.Index(fields=['creado']),
+        ]
+
     def __str__(self):
         return f'{self.email} ({self.get_role_display()})'
 
@@ -31,4 +38,42 @@ class Profile(BaseModel):
     institucion = models.CharField(max_length=255, null=True, blank=True)
 
     def __str__(self):
-        return f"Perfil de {self.user.email}"
\ No newline at end of file
+        return f"Perfil de {self.user.email}"
+
+
+class EmailOutbox(BaseModel):
+    """
+    Correo pendiente de enviar. Las vistas lo encolan (ver
+    apps/users/email_outbox.py) y `python manage.py enviar_emails` lo envía
+    en lotes, con reintentos y espera creciente entre intentos.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    destinatario = models.EmailField()
+    asunto = models.CharField(max_length=255)
+    html = models.TextField()
+    texto = models.TextField(blank=True, default='')
+    # sha256 de destinatario + asunto + cuerpo: evita encolar dos veces el mismo correo pendiente
+    huella = models.CharField(max_length=64, db_index=True)
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True, default='')
+    respuesta = models.CharField(max_length=255, blank=True, default='')
+    enviado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-creado']
+        verbose_name = 'Correo en cola'
+        verbose_name_plural = 'Correos en cola'
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento']),
+        ]
+
+    def __str__(self):
+        return f"{self.destinatario} - {self.asunto} ({self.get_estado_display()})"
@@ -1,5 +1,6 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from .authentication import invalidar_usuario
 from .models import User, Profile
 
 @receiver(post_save, sender=User)
@@ -10,3 +11,12 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
+
+@receiver([post_save, post_delete], sender=User)
+def invalidar_usuario_en_cache(sender, instance, **kwargs):
+    # Rol, contraseña, is_active... la próxima petición recarga el usuario
+    invalidar_usuario(instance.pk)
+
+@receiver([post_save, post_delete], sender=Profile)
+def invalidar_perfil_en_cache(sender, instance, **kwargs):
+    invalidar_usuario(instance.user_id)
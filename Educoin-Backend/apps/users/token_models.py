@@ -59,7 +59,10 @@ class PasswordResetAttempt(models.Model):
 
 
 class LoginFailureTracker(models.Model):
-    """Rastrea fallos de login para sugerir reset de contraseña"""
+    """
+    Fallos de login guardados en la base. Solo se usa como respaldo cuando el
+    caché no está disponible (ver apps/users/login_failures.py).
+    """
     email = models.EmailField()
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     attempt_time = models.DateTimeField(auto_now_add=True)
@@ -68,6 +71,10 @@ class LoginFailureTracker(models.Model):
         ordering = ['-attempt_time']
         verbose_name = 'Fallo de Login'
         verbose_name_plural = 'Fallos de Login'
+        indexes = [
+            models.Index(fields=['email', 'attempt_time']),
+            models.Index(fields=['attempt_time']),
+        ]
 
     @classmethod
     def should_suggest_reset(cls, email):
@@ -13,10 +13,10 @@ from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.utils import timezone
-from threading import Thread
 
 from .models import User
-from .token_models import EmailVerificationToken, PasswordResetAttempt, LoginFailureTracker
+from .token_models import EmailVerificationToken, PasswordResetAttempt
+from .login_failures import registrar_fallo, limpiar_fallos
 from .email_utils import (
     send_verification_email_api,  # 🆕 Importar función API
     send_welcome_email_api,       # 🆕 Importar función API  
@@ -31,6 +31,7 @@ from .serializers import (
     ChangePasswordSerializer
 )
 from .permissions import IsAdmin
+from apps.common.pagination import CreadoCursorPagination
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -69,17 +70,17 @@ def api_register(request):
         # Crear y enviar token de verificación
         verification_token = EmailVerificationToken.objects.create(user=user)
         
-        # 🆕 USAR SENDGRID API EN LUGAR DE SMTP
+        # Encolar el correo; lo envía el worker enviar_emails
         try:
-            logger.info("🔄 ENVIANDO EMAIL VÍA SENDGRID API...")
+            logger.info("🔄 ENCOLANDO EMAIL...")
             success = send_verification_email_api(user, verification_token)
             if success:
-                logger.info(f"✅ Email enviado exitosamente via API a: {user.email}")
+                logger.info(f"✅ Email encolado para: {user.email}")
             else:
-                logger.error(f"❌ Falló el envío de email via API a: {user.email}")
+                logger.error(f"❌ No se pudo encolar el email para: {user.email}")
                 
         except Exception as e:
-            logger.error(f"💥 Error crítico con SendGrid API: {str(e)}")
+            logger.error(f"💥 Error al encolar email: {str(e)}")
             # Continuar con el registro aunque falle el email
         
         return Response({
@@ -105,11 +106,11 @@ def verify_email(request, token):
     Verifica el email del usuario usando el token
     """
     try:
-        logger.info(f"🔍 Intentando verificar email con token: {token}")
+        logger.info(f"🔍 Intentando verificar email con token: {token[:8]}...")
         verification_token = EmailVerificationToken.objects.get(token=token)
         
         if not verification_token.is_valid():
-            logger.warning(f"⚠️ Token inválido o expirado: {token}")
+            logger.warning(f"⚠️ Token inválido o expirado: {token[:8]}...")
             return Response({
                 'detail': 'El token de verificación ha expirado o ya fue usado.'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -123,16 +124,16 @@ def verify_email(request, token):
         # Marcar token como usado
         verification_token.mark_as_used()
         
-        # 🆕 Enviar email de bienvenida usando API
+        # Encolar email de bienvenida
         try:
-            logger.info("🔄 ENVIANDO BIENVENIDA VÍA SENDGRID API...")
+            logger.info("🔄 ENCOLANDO BIENVENIDA...")
             success = send_welcome_email_api(user, is_google_signup=False)
             if success:
-                logger.info(f"✅ Email de bienvenida enviado via API a: {user.email}")
+                logger.info(f"✅ Email de bienvenida encolado para: {user.email}")
             else:
-                logger.error(f"❌ Falló el envío de bienvenida via API a: {user.email}")
+                logger.error(f"❌ No se pudo encolar la bienvenida para: {user.email}")
         except Exception as e:
-            logger.error(f"💥 Error con bienvenida SendGrid API: {str(e)}")
+            logger.error(f"💥 Error al encolar bienvenida: {str(e)}")
         
         # Generar tokens JWT
         refresh = RefreshToken.for_user(user)
@@ -149,7 +150,7 @@ def verify_email(request, token):
         }, status=status.HTTP_200_OK)
         
     except EmailVerificationToken.DoesNotExist:
-        logger.warning(f"❌ Token no encontrado: {token}")
+        logger.warning(f"❌ Token no encontrado: {token[:8]}...")
         return Response({
             'detail': 'Token de verificación inválido.'
         }, status=status.HTTP_400_BAD_REQUEST)
@@ -191,16 +192,16 @@ def resend_verification_email(request):
         # Crear nuevo token
         verification_token = EmailVerificationToken.objects.create(user=user)
         
-        # 🆕 USAR SENDGRID API EN LUGAR DE SMTP
+        # Encolar el correo; lo envía el worker enviar_emails
         try:
-            logger.info("🔄 REENVIANDO EMAIL VÍA SENDGRID API...")
+            logger.info("🔄 ENCOLANDO REENVÍO...")
             success = send_verification_email_api(user, verification_token)
             if success:
-                logger.info(f"✅ Reenvío exitoso via API a: {user.email}")
+                logger.info(f"✅ Reenvío encolado para: {user.email}")
             else:
-                logger.error(f"❌ Falló el reenvío via API a: {user.email}")
+                logger.error(f"❌ No se pudo encolar el reenvío para: {user.email}")
         except Exception as e:
-            logger.error(f"💥 Error crítico con reenvío SendGrid API: {str(e)}")
+            logger.error(f"💥 Error al encolar reenvío: {str(e)}")
         
         logger.info(f"✅ Reenvío de verificación procesado para: {email}")
         
@@ -245,7 +246,7 @@ def api_login(request):
             }, status=status.HTTP_403_FORBIDDEN)
         
         # Login exitoso - limpiar fallos
-        LoginFailureTracker.clear_failures(user.email)
+        limpiar_fallos(user.email)
         
         refresh = RefreshToken.for_user(user)
         
@@ -260,17 +261,11 @@ def api_login(request):
             }
         }, status=status.HTTP_200_OK)
     
-    # Login fallido - registrar intento
+    # Login fallido - contar en la ventana deslizante (caché) y ver si sugerir reset
     email = request.data.get('email')
     if email:
         ip_address = get_client_ip(request)
-        LoginFailureTracker.objects.create(
-            email=email,
-            ip_address=ip_address
-        )
-        
-        # Verificar si sugerir reset
-        suggest_reset = LoginFailureTracker.should_suggest_reset(email)
+        suggest_reset = registrar_fallo(email, ip_address).sugerir_reset
         
         logger.warning(f"❌ Login fallido para: {email} desde IP: {ip_address}")
         
@@ -329,16 +324,16 @@ class GoogleLoginAPIView(APIView):
                 user.role = "estudiante"
                 user.save()
                 
-                # 🆕 Enviar email de bienvenida usando API
+                # Encolar email de bienvenida
                 try:
-                    logger.info("🔄 ENVIANDO BIENVENIDA GOOGLE VÍA SENDGRID API...")
+                    logger.info("🔄 ENCOLANDO BIENVENIDA GOOGLE...")
                     success = send_welcome_email_api(user, is_google_signup=True)
                     if success:
-                        logger.info(f"✅ Bienvenida Google enviada via API a: {user.email}")
+                        logger.info(f"✅ Bienvenida Google encolada para: {user.email}")
                     else:
-                        logger.error(f"❌ Falló bienvenida Google via API a: {user.email}")
+                        logger.error(f"❌ No se pudo encolar la bienvenida Google para: {user.email}")
                 except Exception as e:
-                    logger.error(f"💥 Error con bienvenida Google SendGrid API: {str(e)}")
+                    logger.error(f"💥 Error al encolar bienvenida Google: {str(e)}")
                 
                 logger.info(f"👤 Nuevo usuario Google creado: {email}")
             else:
@@ -457,16 +452,16 @@ class PasswordResetRequestView(APIView):
                 success=True
             )
             
-            # 🆕 Enviar email de reset usando API
+            # Encolar email de reset
             try:
-                logger.info("🔄 ENVIANDO RESET VÍA SENDGRID API...")
+                logger.info("🔄 ENCOLANDO RESET...")
                 success = send_password_reset_email_api(user, reset_link)
                 if success:
-                    logger.info(f"✅ Email de reset enviado via API a: {user.email}")
+                    logger.info(f"✅ Email de reset encolado para: {user.email}")
                 else:
-                    logger.error(f"❌ Falló el envío de reset via API a: {user.email}")
+                    logger.error(f"❌ No se pudo encolar el reset para: {user.email}")
             except Exception as e:
-                logger.error(f"💥 Error con reset SendGrid API: {str(e)}")
+                logger.error(f"💥 Error al encolar reset: {str(e)}")
             
             logger.info(f"✅ Solicitud de reset procesada para: {email}")
             
@@ -508,7 +503,7 @@ class PasswordResetConfirmView(APIView):
             user.save()
             
             # Limpiar fallos de login
-            LoginFailureTracker.clear_failures(user.email)
+            limpiar_fallos(user.email)
             
             logger.info(f"✅ Contraseña restablecida exitosamente para: {user.email}")
             
@@ -551,17 +546,17 @@ def api_delete_account(request):
             'detail': 'No puedes eliminar la última cuenta de administrador'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # 🆕 Enviar email de confirmación usando API
+    # Encolar email de confirmación
     user_email = user.email
     try:
-        logger.info("🔄 ENVIANDO CONFIRMACIÓN ELIMINACIÓN VÍA SENDGRID API...")
+        logger.info("🔄 ENCOLANDO CONFIRMACIÓN ELIMINACIÓN...")
         success = send_account_deletion_confirmation_email_api(user)
         if success:
-            logger.info(f"✅ Confirmación eliminación enviada via API a: {user.email}")
+            logger.info(f"✅ Confirmación eliminación encolada para: {user.email}")
         else:
-            logger.error(f"❌ Falló confirmación eliminación via API a: {user.email}")
+            logger.error(f"❌ No se pudo encolar la confirmación de eliminación para: {user.email}")
     except Exception as e:
-        logger.error(f"💥 Error con confirmación eliminación SendGrid API: {str(e)}")
+        logger.error(f"💥 Error al encolar confirmación de eliminación: {str(e)}")
     
     # Eliminar usuario
     user.delete()
@@ -584,9 +579,13 @@ def api_list_users(request):
     Lista todos los usuarios del sistema (solo admin)
     """
     logger.info(f"📋 Listando usuarios - solicitado por: {request.user.email}")
-    users = User.objects.all().order_by('-date_joined')
+    paginator = CreadoCursorPagination()
+    users = paginator.paginate_queryset(User.objects.select_related('profile'), request)
+    if users is None:
+        users = User.objects.select_related('profile').order_by('-date_joined')
+        return Response(UserProfileSerializer(users, many=True).data, status=status.HTTP_200_OK)
     serializer = UserProfileSerializer(users, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return paginator.get_paginated_response(serializer.data)
 
 
 # --------------------------
@@ -0,0 +1,14 @@
+#!/bin/bash
+# Proceso de Railway: la web (gunicorn) y, en segundo plano, los workers de
+# las colas. Si un worker termina, se reinicia a los 5 segundos.
+
+python manage.py migrate
+python manage.py collectstatic --noinput
+
+echo "📬 Starting notification worker..."
+(while true; do python manage.py procesar_notificaciones --intervalo 2; sleep 5; done) &
+
+echo "✉️ Starting email worker..."
+(while true; do python manage.py enviar_emails --intervalo 5; sleep 5; done) &
+
+exec gunicorn Educoin.wsgi:application --bind 0.0.0.0:$PORT